@@ -1,5 +1,89 @@
-from gui.MainGUI import *
+import time
 
-# Get the main gui application, and start it
-gui = MainGUI()
-gui.start()
+# Taken before anything else is imported, for measuring the startup time
+START = time.perf_counter()
+
+import argparse
+import sys
+
+
+def parse_args(args=None):
+  '''Parse the command line arguments'''
+  parser = argparse.ArgumentParser(description="Engineering Calculator")
+  parser.add_argument("--batch", nargs="?", const="-", metavar="FILE",
+                      help="solve each line of FILE (or stdin) instead of starting the GUI")
+  parser.add_argument("-o", "--output", default="-", metavar="FILE",
+                      help="file to write batch results to (default: stdout)")
+  parser.add_argument("--workers", type=int, default=None,
+                      help="number of worker processes for batch mode (default: one per CPU)")
+  parser.add_argument("--chunk-size", type=int, default=10000,
+                      help="number of lines sent to a worker at a time in batch mode")
+  parser.add_argument("--csv", metavar="FILE",
+                      help="evaluate --expr for each row of the CSV FILE (or stdin if -), adding a result column")
+  parser.add_argument("--expr", metavar="EXPRESSION",
+                      help="with --csv, the expression to evaluate, using col1, col2... for the columns")
+  parser.add_argument("--header", action="store_true",
+                      help="with --csv, the first row is a header")
+  parser.add_argument("--record", metavar="FILE",
+                      help="record the Basic Calculator's button and key presses to FILE")
+  parser.add_argument("--replay", metavar="FILE",
+                      help="replay a recorded session without the GUI, and print the final display")
+  parser.add_argument("--realtime", action="store_true",
+                      help="with --replay, replay at the recorded speed instead of as fast as possible")
+  parser.add_argument("--fuzz", type=int, metavar="N",
+                      help="replay N random sessions across the workers, checking for divergence")
+  parser.add_argument("--session-length", type=int, default=50,
+                      help="number of presses in each --fuzz session")
+  parser.add_argument("--startup-time", action="store_true",
+                      help="print the time from launch to the first paint of the GUI, then exit")
+  parser.add_argument("--startup-budget", type=float, default=None, metavar="MS",
+                      help="with --startup-time, exit with an error if startup took longer than MS")
+  parsed = parser.parse_args(args)
+  if parsed.csv is not None and parsed.expr is None:
+    parser.error("--csv needs an --expr to evaluate")
+  return parsed
+
+
+def report_startup(gui, budget=None):
+  '''
+  Print the time from launch until the GUI's first paint, then close it.
+  Exits with status 1 if the time is over budget (in milliseconds).
+  '''
+  # Flush any pending redraws, so the window has been fully painted
+  gui.root.update_idletasks()
+  elapsed = (time.perf_counter() - START) * 1000
+  print(f'Startup time: {elapsed:.1f}ms', file=sys.stderr)
+  gui.root.destroy()
+  if budget is not None and elapsed > budget:
+    print(f'Over the startup budget of {budget:.1f}ms', file=sys.stderr)
+    sys.exit(1)
+
+
+# Only start the app when run directly, so that worker processes that
+# import this module don't open a window of their own
+if __name__ == "__main__":
+  args = parse_args()
+  if args.batch is not None:
+    from calc.BatchEval import main
+    main(args.batch, args.output, args.workers, args.chunk_size)
+  elif args.csv is not None:
+    from calc.ColumnCalc import main
+    sys.exit(main(args.expr, args.csv, args.output, args.header))
+  elif args.replay is not None:
+    from calc.Session import main_replay
+    sys.exit(main_replay(args.replay, args.realtime))
+  elif args.fuzz is not None:
+    from calc.Session import main_fuzz
+    sys.exit(main_fuzz(args.fuzz, args.session_length, args.workers))
+  else:
+    from gui.MainGUI import MainGUI
+    recorder = None
+    if args.record is not None:
+      from calc.Session import SessionRecorder
+      recorder = SessionRecorder(args.record)
+    # Get the main gui application, and start it
+    gui = MainGUI(recorder)
+    # The first callback run by the mainloop comes after the window is shown
+    if args.startup_time:
+      gui.root.after(0, report_startup, gui, args.startup_budget)
+    gui.start()
@@ -0,0 +1,83 @@
+'''
+Benchmark the latency of the BasicCalc actions, including the redraw of
+the display, for expressions of 10 to 1M chars. This needs a display, as
+it drives a real (withdrawn) Tk window.
+
+Run from the repository root with:
+  python -m bench.bench_BasicCalc
+'''
+import time
+import tkinter as tk
+
+from bench.bench_ExprEngine import make_expression
+from gui.BasicCalc import BasicCalc
+
+# Expression lengths (in chars) to benchmark
+SIZES = [10, 100, 1000, 10000, 100000, 1000000]
+# Actions to time, as (name, suffix, function called with the BasicCalc).
+# Each one is applied to an expression ending in suffix, so it takes the
+# same path at every size.
+ACTIONS = [("but_press", "", lambda calc: calc.but_press(7)),
+           ("update_eqn", "", lambda calc: calc.update_eqn(".")),
+           ("negate_num", "", lambda calc: calc.negate_num()),
+           ("change_operation", "+", lambda calc: calc.change_operation("*")),
+           ("solve_eqn", "", lambda calc: calc.solve_eqn())]
+
+
+def time_action(calc, expression, action, repeat=5):
+  '''
+  Return the best time, in seconds, to apply action to expression and
+  have the result drawn. Solves that go to the background are waited for.
+  '''
+  best = None
+  for i in range(repeat):
+    # Setting the expression and drawing it isn't part of the timing. Each
+    # repeat has a different last number, so no solve hits the result cache.
+    calc.expression = expression.replace("#", str(i))
+    calc.total_flag = False
+    calc.refresh_display()
+    calc.root.update_idletasks()
+    start = time.perf_counter()
+    action(calc)
+    while calc.solving:
+      calc.root.update()
+      time.sleep(0.0005)
+    calc.root.update_idletasks()
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+
+def run(sizes=SIZES):
+  '''Run the benchmark, returning a list of result dicts'''
+  root = tk.Tk()
+  root.withdraw()
+  frame = tk.Frame(root)
+  frame.pack()
+  calc = BasicCalc(root, frame)
+  results = []
+  try:
+    for size in sizes:
+      expression = make_expression(size - 1)
+      result = { "name": "basic_calc", "size": size }
+      for name, suffix, action in ACTIONS:
+        # Solving the biggest expressions takes seconds, so it isn't repeated
+        result[name] = time_action(calc, expression + "#" + suffix, action,
+                                   1 if size >= 100000 else 5)
+      results.append(result)
+  finally:
+    if calc.solver is not None:
+      calc.solver.close()
+    root.destroy()
+  return results
+
+
+def main():
+  print(f'{"size":>8} ' + " ".join(f'{name:>17}' for name, suffix, action in ACTIONS))
+  for result in run():
+    print(f'{result["size"]:>8} '
+          + " ".join(f'{result[name] * 1e3:>15.3f}ms' for name, suffix, action in ACTIONS))
+
+
+if __name__ == "__main__":
+  main()
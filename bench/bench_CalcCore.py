@@ -0,0 +1,80 @@
+'''
+Benchmark the keystroke throughput of the headless CalcCore, without
+any GUI in the loop.
+
+Run from the repository root with:
+  python -m bench.bench_CalcCore
+'''
+import random
+import time
+
+from calc.CalcCore import CalcCore
+
+# Number of keystrokes to feed per run
+KEYSTROKES = 1000000
+# Expression lengths (in terms) to measure the preview latency at
+PREVIEW_TERMS = [10, 100, 1000, 10000, 100000]
+
+
+def make_session(count, seed=0, solve_every=20):
+  '''
+  Build a random sequence of button presses, solving every solve_every
+  keys, or never if solve_every is None
+  '''
+  rand = random.Random(seed)
+  buttons = list(range(10)) * 4 + ["+", "-", "*", "/", "%", ".", "+/-"]
+  keys = [rand.choice(buttons) for _ in range(count)]
+  # Solve and start again every so often, like a user would
+  if solve_every:
+    for i in range(0, count, solve_every):
+      keys[i] = rand.choice(["=", "AC"])
+  return keys
+
+
+def run(count=KEYSTROKES):
+  '''Run the benchmark, returning a list of result dicts'''
+  results = []
+  # Short expressions that are solved regularly, and a single expression
+  # that keeps growing, where each keystroke should cost the same
+  for name, solve_every in [("keystrokes", 20), ("keystrokes_unsolved", None)]:
+    keys = make_session(count, solve_every=solve_every)
+    core = CalcCore()
+    start = time.perf_counter()
+    core.feed(keys)
+    elapsed = time.perf_counter() - start
+    results.append({ "name": name, "size": count, "seconds": elapsed,
+                     "keys_per_second": count / elapsed })
+  results.extend(run_preview())
+  return results
+
+
+def run_preview(sizes=PREVIEW_TERMS, keys=10000):
+  '''
+  Measure the latency of a keystroke followed by reading the live preview,
+  for expressions that already have sizes terms in them
+  '''
+  results = []
+  for size in sizes:
+    core = CalcCore()
+    core.expression = "+".join(["1.5*2"] * size)
+    start = time.perf_counter()
+    for i in range(keys):
+      core.press("+" if i % 3 == 0 else 7)
+      core.preview
+    elapsed = time.perf_counter() - start
+    results.append({ "name": "preview", "size": size, "seconds": elapsed,
+                     "latency": elapsed / keys })
+  return results
+
+
+def main():
+  for result in run():
+    if result["name"] == "preview":
+      print(f'preview: {result["size"]} terms, {result["latency"] * 1e6:.2f}us per keystroke')
+    else:
+      print(f'{result["name"]}: {result["size"]} keystrokes in {result["seconds"]:.3f}s'
+            f' ({result["keys_per_second"]:,.0f} keys/s)')
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,48 @@
+'''
+Benchmark running an expression over the columns of CSV files of 10k to
+1M rows, from reading the file to writing the results.
+
+Run from the repository root with:
+  python -m bench.bench_ColumnCalc
+'''
+import os
+import random
+import tempfile
+
+from calc.ColumnCalc import run_file
+
+# Numbers of rows to benchmark
+SIZES = [10000, 100000, 1000000]
+EXPRESSION = "col3*1.05-col1"
+
+
+def write_data(path, size, seed=0):
+  '''Write a CSV file of size rows of an index, a float and an int'''
+  rand = random.Random(seed)
+  with open(path, "w") as outfile:
+    outfile.writelines(f'{i},{rand.random() * 100:.4f},{rand.randint(1, 1000)}\n'
+                       for i in range(size))
+
+
+def run(sizes=SIZES):
+  '''Run the benchmark, returning a list of result dicts'''
+  results = []
+  with tempfile.TemporaryDirectory() as directory:
+    output = os.path.join(directory, "out.csv")
+    for size in sizes:
+      path = os.path.join(directory, f'data{size}.csv')
+      write_data(path, size)
+      measured = run_file(EXPRESSION, path, output)
+      results.append({ "name": "columns", "size": size, "seconds": measured["seconds"],
+                       "rows_per_second": measured["rows_per_second"] })
+  return results
+
+
+def main():
+  for result in run():
+    print(f'{result["size"]:>8} rows in {result["seconds"] * 1e3:>8.1f}ms'
+          f' ({result["rows_per_second"]:,.0f} rows/s)')
+
+
+if __name__ == "__main__":
+  main()
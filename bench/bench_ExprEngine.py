@@ -0,0 +1,114 @@
+'''
+Benchmark the ExprEngine against the eval path it replaced in
+BasicCalc.solve_eqn, for expressions of 10 to 100k chars.
+
+Run from the repository root with:
+  python -m bench.bench_ExprEngine
+'''
+import random
+import timeit
+
+from calc.ExprEngine import ExprEngine, DECIMAL, FLOAT, FRACTION
+
+# Expression lengths (in chars) to benchmark
+SIZES = [10, 100, 1000, 10000, 100000]
+# Precision modes to benchmark, as (name, mode, precision)
+MODES = [("float", FLOAT, None), ("decimal28", DECIMAL, 28),
+         ("decimal100", DECIMAL, 100), ("fraction", FRACTION, None)]
+
+
+def make_expression(size, seed=0, ops="+-*/", decimals=False):
+  '''Build a random calculator expression that is roughly size chars long'''
+  rand = random.Random(seed)
+  number = lambda: str(rand.randint(1, 999)) + (f'.{rand.randint(1, 99)}' if decimals else "")
+  parts = [number()]
+  length = len(parts[0])
+  while length < size:
+    part = rand.choice(ops) + number()
+    parts.append(part)
+    length += len(part)
+  return "".join(parts)
+
+
+def time_call(func, repeat=5):
+  '''Return the best time of a single call to func, in seconds'''
+  # Scale the number of calls so each measurement takes a few milliseconds
+  number = 1
+  while True:
+    elapsed = timeit.timeit(func, number=number)
+    if elapsed > 0.005 or number >= 10000:
+      break
+    number *= 10
+  return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def run(sizes=SIZES):
+  '''Run the benchmark, returning a list of result dicts'''
+  results = []
+  for size in sizes:
+    expression = make_expression(size)
+    result = { "name": "solve", "size": size }
+    # The eval path compiles the expression on every solve, and fails
+    # outright on long chains that exceed the compiler's recursion limit
+    try:
+      result["eval"] = time_call(lambda: eval(expression))
+    except (RecursionError, MemoryError):
+      result["eval"] = None
+    # Cold engine, compiling the expression every call
+    engine = ExprEngine(cache_size=0)
+    result["engine_cold"] = time_call(lambda: engine.evaluate(expression))
+    # Warm engine, with the compiled program already cached but not the
+    # result, which is what an expression that was edited costs
+    engine = ExprEngine()
+    engine.results.maxsize = 0
+    engine.evaluate(expression)
+    result["engine_program"] = time_call(lambda: engine.evaluate(expression))
+    # Warm engine, with the result already cached
+    engine = ExprEngine()
+    engine.evaluate(expression)
+    result["engine_cached"] = time_call(lambda: engine.evaluate(expression))
+    results.append(result)
+  results.extend(run_modes())
+  return results
+
+
+def run_modes(size=1000):
+  '''
+  Time evaluation of a cached program in each precision mode, for an expression with
+  decimals and division, and for an int expression that takes the exact
+  native fast path
+  '''
+  results = []
+  expressions = [("decimals", make_expression(size, ops="+-*/", decimals=True)),
+                 ("ints", make_expression(size, ops="+-*"))]
+  for kind, expression in expressions:
+    result = { "name": "mode_" + kind, "size": size }
+    for name, mode, precision in MODES:
+      engine = ExprEngine(mode=mode, precision=precision)
+      engine.results.maxsize = 0
+      engine.evaluate(expression)
+      result[name] = time_call(lambda: engine.evaluate(expression))
+    results.append(result)
+  return results
+
+
+def main():
+  results = run()
+  print(f'{"size":>8} {"eval":>12} {"engine cold":>12} {"program cached":>15}'
+        f' {"result cached":>14}')
+  for result in results:
+    if result["name"] != "solve":
+      continue
+    evaled = "failed" if result["eval"] is None else f'{result["eval"] * 1e6:.1f}us'
+    print(f'{result["size"]:>8} {evaled:>12} {result["engine_cold"] * 1e6:>10.1f}us'
+          f' {result["engine_program"] * 1e6:>13.1f}us {result["engine_cached"] * 1e6:>12.1f}us')
+  print()
+  print(f'{"mode (1000 chars)":>18} ' + " ".join(f'{name:>11}' for name, mode, precision in MODES))
+  for result in results:
+    if result["name"].startswith("mode_"):
+      print(f'{result["name"][5:]:>18} '
+            + " ".join(f'{result[name] * 1e6:>9.1f}us' for name, mode, precision in MODES))
+
+
+if __name__ == "__main__":
+  main()
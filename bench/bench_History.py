@@ -0,0 +1,58 @@
+'''
+Benchmark the History for tapes of 1000 to 1M entries: adding entries,
+reading old entries from the data file, reopening, and searching for
+text that is found among the newest entries and for text that isn't found
+at all, which scans the whole tape.
+
+Run from the repository root with:
+  python -m bench.bench_History
+'''
+import os
+import tempfile
+import time
+
+from bench.bench_ExprEngine import make_expression, time_call
+from calc.History import History
+
+# Numbers of history entries to benchmark
+SIZES = [1000, 10000, 100000, 1000000]
+
+
+def run(sizes=SIZES):
+  '''Run the benchmark, returning a list of result dicts'''
+  results = []
+  with tempfile.TemporaryDirectory() as directory:
+    for size in sizes:
+      path = os.path.join(directory, f'history{size}')
+      history = History(path)
+      result = { "name": "history", "size": size }
+      # Adding is timed over every entry, as each one grows the files
+      start = time.perf_counter()
+      for i in range(size):
+        history.add(make_expression(20, seed=i), str(i))
+      result["add"] = (time.perf_counter() - start) / size
+      # The oldest entry is read from the data file
+      result["read_old"] = time_call(lambda: history[0])
+      result["search_miss"] = time_call(lambda: history.search("999+999+999"))
+      result["search"] = time_call(lambda: history.search("123"))
+      result["search_prefix"] = time_call(lambda: history.search("99", prefix=True))
+      history.close()
+      # Reopening only reads the newest entries into the ring buffer
+      start = time.perf_counter()
+      History(path).close()
+      result["reopen"] = time.perf_counter() - start
+      results.append(result)
+  return results
+
+
+def main():
+  print(f'{"entries":>8} {"add":>10} {"read old":>10} {"reopen":>10} {"miss":>10}'
+        f' {"search":>10} {"prefix":>10}')
+  for result in run():
+    print(f'{result["size"]:>8} {result["add"] * 1e6:>8.1f}us {result["read_old"] * 1e6:>8.1f}us'
+          f' {result["reopen"] * 1e3:>8.1f}ms {result["search_miss"] * 1e3:>8.1f}ms'
+          f' {result["search"] * 1e6:>8.1f}us {result["search_prefix"] * 1e6:>8.1f}us')
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,46 @@
+'''
+Benchmark the cold start of the app, from launching a new Python process
+to the first paint of the MainGUI window. This needs a display.
+
+Run from the repository root with:
+  python -m bench.bench_MainGUI
+'''
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# Number of times the app is started
+RUNS = 10
+# Root of the repository, where app.py is
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_app():
+  '''Start the app in a new process, returning its startup time in seconds'''
+  process = subprocess.run([sys.executable, os.path.join(ROOT, "app.py"), "--startup-time"],
+                           capture_output=True, text=True, check=True, cwd=ROOT)
+  match = re.search(r'Startup time: ([\d.]+)ms', process.stderr)
+  if match is None:
+    raise RuntimeError(f'No startup time reported: {process.stderr.strip()}')
+  return float(match[1]) / 1000
+
+
+def run(runs=RUNS):
+  '''Run the benchmark, returning a list of result dicts'''
+  # The first start warms the OS file cache, so it isn't counted
+  start_app()
+  times = [start_app() for i in range(runs)]
+  return [{ "name": "cold_start", "size": runs, "best": min(times),
+            "median": statistics.median(times) }]
+
+
+def main():
+  result = run()[0]
+  print(f'cold start over {result["size"]} runs: best {result["best"] * 1e3:.1f}ms,'
+        f' median {result["median"] * 1e3:.1f}ms')
+
+
+if __name__ == "__main__":
+  main()
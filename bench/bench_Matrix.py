@@ -0,0 +1,75 @@
+'''
+Benchmark factorizing and solving the nodal equations of square resistor
+grids of 100 to 2500 nodes, densely and sparsely, and solving again with
+a cached factorization.
+
+Run from the repository root with:
+  python -m bench.bench_Matrix
+'''
+import time
+
+from bench.bench_ExprEngine import time_call
+from calc.Matrix import LUCache, factorize
+
+# Numbers of nodes on a side of the grids to benchmark
+SIZES = [10, 20, 50]
+# Largest grid also factorized densely, which is cubic in the number of nodes
+DENSE_MAX_SIZE = 20
+
+
+def grid_laplacian(side):
+  '''Build the nodal matrix of a side x side grid of 1 ohm resistors, each node grounded through 1 ohm'''
+  rows = []
+  for node in range(side * side):
+    r, c = divmod(node, side)
+    row = { node: 5.0 }
+    for neighbour, inside in ((node - side, r > 0), (node + side, r < side - 1),
+                              (node - 1, c > 0), (node + 1, c < side - 1)):
+      if inside:
+        row[neighbour] = -1.0
+      else:
+        row[node] -= 1.0
+    rows.append(row)
+  return rows
+
+
+def run(sizes=SIZES):
+  '''Run the benchmark, returning a list of result dicts'''
+  results = []
+  for size in sizes:
+    rows = grid_laplacian(size)
+    b = [1.0] * len(rows)
+    result = { "name": "grid", "size": size }
+    start = time.perf_counter()
+    sparse = factorize(rows, sparse=True)
+    result["sparse_factorize"] = time.perf_counter() - start
+    result["sparse_solve"] = time_call(lambda: sparse.solve(b))
+    if size <= DENSE_MAX_SIZE:
+      start = time.perf_counter()
+      dense = factorize(rows, sparse=False)
+      result["dense_factorize"] = time.perf_counter() - start
+      result["dense_solve"] = time_call(lambda: dense.solve(b))
+    # A cached solve includes hashing the matrix to find its factorization
+    cache = LUCache()
+    cache.solve(rows, b)
+    result["cached_solve"] = time_call(lambda: cache.solve(rows, b))
+    results.append(result)
+  return results
+
+
+def main():
+  print(f'{"nodes":>6} {"sparse LU":>11} {"sparse solve":>13} {"dense LU":>11} {"dense solve":>12}'
+        f' {"cached solve":>13}')
+  for result in run():
+    dense = "-"
+    dense_solve = "-"
+    if "dense_factorize" in result:
+      dense = f'{result["dense_factorize"] * 1e3:.1f}ms'
+      dense_solve = f'{result["dense_solve"] * 1e3:.2f}ms'
+    print(f'{result["size"] ** 2:>6} {result["sparse_factorize"] * 1e3:>9.1f}ms'
+          f' {result["sparse_solve"] * 1e3:>11.2f}ms {dense:>11} {dense_solve:>12}'
+          f' {result["cached_solve"] * 1e3:>11.2f}ms')
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,54 @@
+'''
+Benchmark plotting on canvases 400 to 6400 pixels wide: the first draw,
+which samples the whole curve, then panning and zooming, which reuse the
+cached samples and only evaluate what comes into view.
+
+Run from the repository root with:
+  python -m bench.bench_Plot
+'''
+import time
+
+from calc.Plot import Function, View, decimate
+
+# Widths of the canvas to benchmark, in pixels
+SIZES = [400, 1600, 6400]
+EXPRESSION = "1/x + x*x*x/50 - 3*x"
+
+
+def draw(function, view):
+  '''Sample and decimate the curve in view, returning the seconds taken and the samples evaluated'''
+  evaluations = function.evaluations
+  start = time.perf_counter()
+  decimate(view.sample(function), view)
+  return time.perf_counter() - start, function.evaluations - evaluations
+
+
+def run(sizes=SIZES):
+  '''Run the benchmark, returning a list of result dicts'''
+  results = []
+  for size in sizes:
+    function = Function(EXPRESSION)
+    view = View(-10.0, 10.0, -10.0, 10.0, size, size * 3 // 4)
+    view.fit(view.sample(function))
+    function = Function(EXPRESSION)
+    result = { "name": "plot", "size": size }
+    result["first"], result["first_evaluated"] = draw(function, view)
+    # A drag moves a few pixels at a time
+    view.pan(5, 0)
+    result["pan"], result["pan_evaluated"] = draw(function, view)
+    view.zoom(1.25, size / 2, size * 3 / 8)
+    result["zoom"], result["zoom_evaluated"] = draw(function, view)
+    results.append(result)
+  return results
+
+
+def main():
+  print(f'{"width":>6} {"first draw":>12} {"pan":>12} {"zoom":>12}')
+  for result in run():
+    print(f'{result["size"]:>6}'
+          + "".join(f' {result[key] * 1e3:>5.1f}ms/{result[key + "_evaluated"]:<5}'
+                    for key in ("first", "pan", "zoom")))
+
+
+if __name__ == "__main__":
+  main()
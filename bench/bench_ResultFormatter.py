@@ -0,0 +1,54 @@
+'''
+Benchmark the ResultFormatter against the '%.15f' formatting that
+solve_eqn used before, for results across a range of magnitudes.
+
+Run from the repository root with:
+  python -m bench.bench_ResultFormatter
+'''
+from bench.bench_ExprEngine import time_call
+from calc.ResultFormatter import ResultFormatter, ENGINEERING, FIXED, SCIENTIFIC
+
+# Results to format, named by what they represent
+VALUES = [("small int", 42), ("int", 123456789), ("short float", 2.5),
+          ("long float", 2 / 3), ("1e-12", 1.234e-12), ("1e20", 1.234e20),
+          ("1e100", 1.234e100), ("1e300", 1.234e300), ("big int", 7 ** 300)]
+
+
+def old_format(value):
+  '''The formatting solve_eqn used before the ResultFormatter'''
+  return str(('%.15f' % value).rstrip('0').rstrip('.'))
+
+
+def run(values=VALUES):
+  '''Run the benchmark, returning a list of result dicts'''
+  formatters = { mode: ResultFormatter(mode) for mode in (FIXED, SCIENTIFIC, ENGINEERING) }
+  results = []
+  for name, value in values:
+    result = { "name": "format", "size": name }
+    # The old formatting can't convert ints past the float range
+    try:
+      result["old_length"] = len(old_format(value))
+      result["old"] = time_call(lambda: old_format(value))
+    except OverflowError:
+      result["old_length"] = result["old"] = None
+    for mode, formatter in formatters.items():
+      result[mode + "_length"] = len(formatter.format(value))
+      result[mode] = time_call(lambda: formatter.format(value))
+    results.append(result)
+  return results
+
+
+def main():
+  print(f'{"value":>12} {"%.15f":>16} {"fixed":>14} {"sci":>14} {"eng":>14}')
+  for result in run():
+    columns = []
+    for mode in ("old", FIXED, SCIENTIFIC, ENGINEERING):
+      if result[mode] is None:
+        columns.append(f'{"failed":>14}')
+      else:
+        columns.append(f'{result[mode] * 1e9:>7.0f}ns {result[mode + "_length"]:>3}ch')
+    print(f'{result["size"]:>12} ' + " ".join(columns))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,46 @@
+'''
+Benchmark finding the roots of a sawtooth with 10 to 1000 roots in its
+interval: solving it from cold, solving again after moving the interval a
+little (which reuses the earlier scan and brackets), and scanning alone.
+
+Run from the repository root with:
+  python -m bench.bench_Roots
+'''
+import time
+
+from bench.bench_ExprEngine import time_call
+from calc.Roots import Equation, RootSolver
+
+# Numbers of roots to benchmark
+SIZES = [10, 100, 1000]
+
+
+def run(sizes=SIZES):
+  '''Run the benchmark, returning a list of result dicts'''
+  results = []
+  for size in sizes:
+    text = "x % 1 - 0.3 + x * 0.001"
+    result = { "name": "roots", "size": size }
+    solver = RootSolver()
+    start = time.perf_counter()
+    solver.solve(text, 0.0, float(size), scan_points=100 * size)
+    result["cold"] = time.perf_counter() - start
+    start = time.perf_counter()
+    solver.solve(text, 0.01, float(size), scan_points=100 * size)
+    result["moved"] = time.perf_counter() - start
+    equation = Equation(text)
+    result["scan"] = time_call(lambda: equation.brackets(0.0, float(size), 100 * size),
+                               repeat=3)
+    results.append(result)
+  return results
+
+
+def main():
+  print(f'{"roots":>6} {"cold":>10} {"moved":>10} {"scan (cached)":>14}')
+  for result in run():
+    print(f'{result["size"]:>6} {result["cold"] * 1e3:>8.2f}ms {result["moved"] * 1e3:>8.2f}ms'
+          f' {result["scan"] * 1e3:>12.2f}ms')
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,59 @@
+'''
+Benchmark running scientific expressions of 10 to 1000 terms, each with
+constant parts like "sqrt(2)/2", for a new value of x each time, with and
+without their constants folded when they are compiled.
+
+Run from the repository root with:
+  python -m bench.bench_Scientific
+'''
+import random
+
+from bench.bench_ExprEngine import time_call
+from calc.ExprEngine import compile_expr, run as run_program
+from calc.Scientific import (FUNCTIONS, POSTFIX_OPS, SCIENTIFIC_OPS, compile_scientific,
+                             constant)
+
+# Numbers of terms to benchmark
+SIZES = [10, 100, 1000]
+# Terms of the expressions, each with a part that depends on x and one that doesn't
+TERMS = ["sqrt(2)/2*sin(x)", "5!/ln(10)*x^2", "exp(-1/4)*cos(x)", "(pi/180)^2*x", "log(2)^3*tanh(x)"]
+
+
+def make_expression(size, seed=0):
+  '''Build an expression of size terms'''
+  rand = random.Random(seed)
+  return " + ".join(rand.choice(TERMS) for i in range(size))
+
+
+def run(sizes=SIZES):
+  '''Run the benchmark, returning a list of result dicts'''
+  results = []
+  for size in sizes:
+    expression = make_expression(size)
+    result = { "name": "scientific", "size": size }
+    result["compile"] = time_call(lambda: compile_scientific(expression, float, ("x",)))
+    unfolded = compile_expr(expression, float, SCIENTIFIC_OPS, variables=("x",), constants=constant,
+                            functions=FUNCTIONS, postfix_ops=POSTFIX_OPS, right_assoc=("^",))
+    folded = compile_scientific(expression, float, ("x",))
+    result["unfolded_steps"] = len(unfolded)
+    result["folded_steps"] = len(folded)
+    xs = iter(range(1 << 62))
+    result["unfolded_run"] = time_call(lambda: run_program(unfolded, { "x": next(xs) * 1e-6 }))
+    result["folded_run"] = time_call(lambda: run_program(folded, { "x": next(xs) * 1e-6 }))
+    result["speedup"] = result["unfolded_run"] / result["folded_run"]
+    results.append(result)
+  return results
+
+
+def main():
+  print(f'{"terms":>6} {"compile":>11} {"steps":>13} {"unfolded run":>13} {"folded run":>11}'
+        f' {"speedup":>8}')
+  for result in run():
+    print(f'{result["size"]:>6} {result["compile"] * 1e6:>9.1f}us'
+          f' {result["unfolded_steps"]:>6}/{result["folded_steps"]:<6}'
+          f' {result["unfolded_run"] * 1e6:>11.1f}us {result["folded_run"] * 1e6:>9.1f}us'
+          f' {result["speedup"]:>7.2f}x')
+
+
+if __name__ == "__main__":
+  main()
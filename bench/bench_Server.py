@@ -0,0 +1,52 @@
+'''
+Benchmark the evaluation server's throughput over localhost TCP, with 1
+to 16 connections each pipelining up to 256 requests. The server and the
+load generator share one event loop, so the rates are a lower bound on
+what a server in its own process manages.
+
+Run from the repository root with:
+  python -m bench.bench_Server
+'''
+import asyncio
+
+from calc.Server import EvalServer, load_test
+
+# Numbers of connections to benchmark
+SIZES = [1, 4, 16]
+# Requests sent in each run, over all the connections
+REQUESTS = 50000
+EXPRESSIONS = ["3+4*2", "-12.5/4%3", "1/3", "2/0", "123456789*987654321", "7%4+-2"]
+
+
+async def measure(connections):
+  '''Start a server, and load test it with connections clients'''
+  server = EvalServer()
+  await server.start_tcp()
+  try:
+    return await load_test(server.address, EXPRESSIONS, REQUESTS, connections)
+  finally:
+    await server.close()
+
+
+def run(sizes=SIZES):
+  '''Run the benchmark, returning a list of result dicts'''
+  results = []
+  for size in sizes:
+    result = { "name": "server", "size": size }
+    measured = asyncio.run(measure(size))
+    result["requests_per_second"] = measured["requests_per_second"]
+    result["latency_p50"] = measured["latency_p50"]
+    result["latency_p99"] = measured["latency_p99"]
+    results.append(result)
+  return results
+
+
+def main():
+  print(f'{"connections":>11} {"requests/s":>12} {"p50":>9} {"p99":>9}')
+  for result in run():
+    print(f'{result["size"]:>11} {result["requests_per_second"]:>12,.0f}'
+          f' {result["latency_p50"] * 1e3:>7.2f}ms {result["latency_p99"] * 1e3:>7.2f}ms')
+
+
+if __name__ == "__main__":
+  main()
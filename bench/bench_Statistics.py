@@ -0,0 +1,59 @@
+'''
+Benchmark importing data files of 10k to 1M rows of "x,y" into the
+statistics, which parses them a memory-mapped chunk at a time, and adding
+values one at a time as the tab does for typed values.
+
+Run from the repository root with:
+  python -m bench.bench_Statistics
+'''
+import os
+import random
+import tempfile
+import time
+
+from bench.bench_ExprEngine import time_call
+from calc.Statistics import Statistics, read_file
+
+# Numbers of rows to benchmark
+SIZES = [10000, 100000, 1000000]
+
+
+def write_data(path, size, seed=0):
+  '''Write a CSV file of size rows of x and a noisy line in x, with a header'''
+  rand = random.Random(seed)
+  with open(path, "w") as outfile:
+    outfile.write("x,y\n")
+    outfile.writelines(f'{i},{3 * i + rand.gauss(0, 100):.6f}\n' for i in range(size))
+
+
+def run(sizes=SIZES):
+  '''Run the benchmark, returning a list of result dicts'''
+  results = []
+  with tempfile.TemporaryDirectory() as directory:
+    for size in sizes:
+      path = os.path.join(directory, f'data{size}.csv')
+      write_data(path, size)
+      result = { "name": "import", "size": size }
+      start = time.perf_counter()
+      read_file(path, Statistics())
+      result["import"] = time.perf_counter() - start
+      result["rows_per_second"] = size / result["import"]
+      results.append(result)
+  statistics = Statistics()
+  result = { "name": "add", "size": 1 }
+  result["add"] = time_call(lambda: statistics.add(1.5))
+  results.append(result)
+  return results
+
+
+def main():
+  for result in run():
+    if result["name"] == "import":
+      print(f'{result["size"]:>8} rows imported in {result["import"] * 1e3:>8.1f}ms'
+            f' ({result["rows_per_second"]:,.0f} rows/s)')
+    else:
+      print(f'Adding one value: {result["add"] * 1e6:.2f}us')
+
+
+if __name__ == "__main__":
+  main()
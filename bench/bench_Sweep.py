@@ -0,0 +1,44 @@
+'''
+Benchmark parameter sweeps of 1000 to 1M points, over one variable and
+over a grid of two, as lists and, if NumPy is installed, as arrays.
+
+Run from the repository root with:
+  python -m bench.bench_Sweep
+'''
+import math
+
+from calc import Sweep
+from calc.Sweep import parse_values, sweep
+
+# Numbers of points to benchmark
+SIZES = [1000, 10000, 100000, 1000000]
+EXPRESSION = "x*x*y-2*x+y/3"
+
+
+def run(sizes=SIZES):
+  '''Run the benchmark, returning a list of result dicts'''
+  methods = [("lists", False)] + ([("numpy", True)] if Sweep.numpy is not None else [])
+  results = []
+  for size in sizes:
+    side = math.isqrt(size)
+    shapes = [("sweep_1d", {"x": parse_values(f'-10:10:{size}'), "y": [2.0]}),
+              ("sweep_2d", {"x": parse_values(f'-10:10:{side}'), "y": parse_values(f'0:1:{side}')})]
+    for name, bindings in shapes:
+      result = { "name": name, "size": size }
+      for method, vectorized in methods:
+        summary = sweep(EXPRESSION, bindings, vectorized=vectorized)
+        result[method] = summary["seconds"]
+        result[method + "_points_per_second"] = summary["points"] / summary["seconds"]
+      results.append(result)
+  return results
+
+
+def main():
+  print(f'{"name":>9} {"points":>8} {"lists":>10} {"numpy":>10}')
+  for result in run():
+    numpy_time = f'{result["numpy"] * 1e3:>8.1f}ms' if "numpy" in result else f'{"-":>10}'
+    print(f'{result["name"]:>9} {result["size"]:>8} {result["lists"] * 1e3:>8.1f}ms {numpy_time}')
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,58 @@
+'''
+Benchmark evaluating expressions with units against the same expressions
+as plain numbers, for expressions of 10 to 1000 terms, both compiling
+them (which for units includes checking their dimensions) and running the
+compiled program.
+
+Run from the repository root with:
+  python -m bench.bench_Units
+'''
+import random
+
+from bench.bench_ExprEngine import time_call
+from calc.ExprEngine import compile_expr, run as run_program
+from calc.Units import compile_units
+
+# Numbers of terms to benchmark
+SIZES = [10, 100, 1000]
+# Terms of the expressions, as (with units, plain) pairs that are equal
+TERMS = [("4.7k ohm * 2 mA", "4.7e3 * 2e-3"), ("1.5 V", "1.5"), ("300 mA * 10 ohm", "0.3 * 10"),
+         ("2 W / 4 A", "2 / 4"), ("-12 mV", "-12e-3")]
+
+
+def make_expressions(size, seed=0):
+  '''Build an expression of size terms, returning it with units and as plain numbers'''
+  rand = random.Random(seed)
+  terms = [rand.choice(TERMS) for i in range(size)]
+  return " + ".join(term[0] for term in terms), " + ".join(term[1] for term in terms)
+
+
+def run(sizes=SIZES):
+  '''Run the benchmark, returning a list of result dicts'''
+  results = []
+  for size in sizes:
+    units, plain = make_expressions(size)
+    result = { "name": "units", "size": size }
+    result["plain_compile"] = time_call(lambda: compile_expr(plain, float))
+    result["units_compile"] = time_call(lambda: compile_units(units))
+    plain_program = compile_expr(plain, float)
+    units_program = compile_units(units)[0]
+    result["plain_run"] = time_call(lambda: run_program(plain_program))
+    result["units_run"] = time_call(lambda: run_program(units_program))
+    result["run_overhead"] = result["units_run"] / result["plain_run"]
+    results.append(result)
+  return results
+
+
+
+def main():
+  print(f'{"terms":>6} {"plain compile":>14} {"units compile":>14} {"plain run":>11} {"units run":>11}'
+        f' {"overhead":>9}')
+  for result in run():
+    print(f'{result["size"]:>6} {result["plain_compile"] * 1e6:>12.1f}us'
+          f' {result["units_compile"] * 1e6:>12.1f}us {result["plain_run"] * 1e6:>9.1f}us'
+          f' {result["units_run"] * 1e6:>9.1f}us {result["run_overhead"]:>8.2f}x')
+
+
+if __name__ == "__main__":
+  main()
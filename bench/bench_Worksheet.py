@@ -0,0 +1,59 @@
+'''
+Benchmark worksheets of 1000 to 50k cells, each referring to two of the
+100 cells before it: loading the sheet, then editing a cell near the end
+and one near the start, through the sheet's text as the tab does.
+
+Run from the repository root with:
+  python -m bench.bench_Worksheet
+'''
+import random
+import time
+
+from calc.Worksheet import SheetText
+
+# Numbers of cells to benchmark
+SIZES = [1000, 10000, 50000]
+
+
+def make_sheet(size, seed=0):
+  '''Build the lines of a sheet of size cells, each after the first 100 referring to two earlier ones'''
+  rand = random.Random(seed)
+  return [f'c{i} = {i}' if i < 100 else
+          f'c{i} = c{rand.randrange(i - 100, i)} + c{rand.randrange(i - 100, i)} * 0.5'
+          for i in range(size)]
+
+
+def edit(sheet, lines, index):
+  '''Change the cell on line index, returning the seconds taken and the cells recomputed'''
+  lines[index] = f'c{index} = {index} * 3'
+  start = time.perf_counter()
+  recomputed = sheet.update("\n".join(lines))[3]
+  return time.perf_counter() - start, len(recomputed)
+
+
+def run(sizes=SIZES):
+  '''Run the benchmark, returning a list of result dicts'''
+  results = []
+  for size in sizes:
+    lines = make_sheet(size)
+    sheet = SheetText()
+    result = { "name": "worksheet", "size": size }
+    start = time.perf_counter()
+    sheet.update("\n".join(lines))
+    result["load"] = time.perf_counter() - start
+    result["edit_end"], result["edit_end_recomputed"] = edit(sheet, lines, size - 10)
+    result["edit_start"], result["edit_start_recomputed"] = edit(sheet, lines, 100)
+    results.append(result)
+  return results
+
+
+def main():
+  print(f'{"cells":>6} {"load":>10} {"edit end":>18} {"edit start":>18}')
+  for result in run():
+    print(f'{result["size"]:>6} {result["load"] * 1e3:>8.1f}ms'
+          f' {result["edit_end"] * 1e3:>8.2f}ms/{result["edit_end_recomputed"]:<6}'
+          f' {result["edit_start"] * 1e3:>8.2f}ms/{result["edit_start_recomputed"]:<6}')
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,151 @@
+'''
+Run every benchmark and save the results as JSON, optionally comparing
+them against a baseline saved by an earlier run, so that a regression
+shows up as exact numbers.
+
+Run from the repository root with:
+  python -m bench.suite -o results.json
+  python -m bench.suite --baseline results.json
+
+The benchmarks that drive the GUI need a display, and are skipped without
+one. A run exits with status 1 if anything regressed past the threshold.
+'''
+import argparse
+import datetime
+import importlib
+import json
+import platform
+import subprocess
+import sys
+
+# Benchmarks to run, in order, as the module names under bench
+BENCHMARKS = ["bench_ExprEngine", "bench_CalcCore", "bench_ResultFormatter", "bench_History",
+              "bench_Sweep", "bench_Plot", "bench_Worksheet", "bench_Units", "bench_Matrix",
+              "bench_Server", "bench_Statistics", "bench_Roots",
+              "bench_ColumnCalc", "bench_Scientific", "bench_BasicCalc", "bench_MainGUI"]
+# Benchmarks that open a window
+GUI_BENCHMARKS = {"bench_BasicCalc", "bench_MainGUI"}
+# Result keys that aren't measurements, but identify the result
+ID_KEYS = ("name", "size")
+# Measurements that are better when they are higher, like throughputs, by
+# the end of their key. Every other measurement is better when lower.
+HIGHER_IS_BETTER = ("_per_second",)
+
+
+def has_display():
+  '''Whether Tk can open a window'''
+  import tkinter as tk
+  try:
+    tk.Tk().destroy()
+  except tk.TclError:
+    return False
+  return True
+
+
+def git_commit():
+  '''Return the commit being benchmarked, or None outside of a git checkout'''
+  try:
+    return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                          check=True).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+def run_suite(names=BENCHMARKS, progress=sys.stderr):
+  '''Run the named benchmarks, returning the results as a JSON-able dict'''
+  report = { "meta": { "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                       "commit": git_commit(), "python": platform.python_version(),
+                       "platform": platform.platform() },
+             "benchmarks": {}, "skipped": {} }
+  display = None
+  for name in names:
+    if name in GUI_BENCHMARKS:
+      if display is None:
+        display = has_display()
+      if not display:
+        report["skipped"][name] = "no display"
+        print(f'{name}: skipped, no display', file=progress)
+        continue
+    print(f'{name}: running', file=progress)
+    report["benchmarks"][name] = importlib.import_module("bench." + name).run()
+  return report
+
+
+def compare(baseline, report, threshold=0.1):
+  '''
+  Compare the measurements of report against baseline, returning a list
+  of changes as (benchmark, name, size, key, old, new, ratio, regressed)
+  tuples. ratio is new / old, and regressed is True if a measurement got
+  worse by more than threshold (as a fraction), False if it got better by
+  more than that, and None otherwise.
+  '''
+  changes = []
+  for benchmark, results in report["benchmarks"].items():
+    # Results of the same benchmark are matched by their name and size
+    old_results = { tuple(result[key] for key in ID_KEYS): result
+                    for result in baseline["benchmarks"].get(benchmark, []) }
+    for result in results:
+      old_result = old_results.get(tuple(result[key] for key in ID_KEYS))
+      if old_result is None:
+        continue
+      for key, new in result.items():
+        old = old_result.get(key)
+        # Only numbers that were measured both times can be compared
+        if (key in ID_KEYS or isinstance(new, bool) or not isinstance(new, (int, float))
+            or not isinstance(old, (int, float)) or old == 0):
+          continue
+        ratio = new / old
+        worse = ratio < 1 if key.endswith(HIGHER_IS_BETTER) else ratio > 1
+        regressed = None
+        if abs(ratio - 1) > threshold:
+          regressed = worse
+        changes.append((benchmark, result["name"], result["size"], key, old, new, ratio, regressed))
+  return changes
+
+
+def print_changes(changes, out=sys.stdout):
+  '''Print the changes past the threshold, regressions first'''
+  for label, regressed in (("Regressions", True), ("Improvements", False)):
+    rows = [change for change in changes if change[7] is regressed]
+    print(f'{label}: {len(rows)}', file=out)
+    for benchmark, name, size, key, old, new, ratio, flag in rows:
+      print(f'  {benchmark} {name} size={size} {key}: {old:.6g} -> {new:.6g}'
+            f' ({(ratio - 1) * 100:+.1f}%)', file=out)
+
+
+def parse_args(args=None):
+  '''Parse the command line arguments'''
+  parser = argparse.ArgumentParser(description="Run the benchmark suite")
+  parser.add_argument("-o", "--output", metavar="FILE",
+                      help="file to write the results to as JSON (default: stdout)")
+  parser.add_argument("--baseline", metavar="FILE",
+                      help="results of an earlier run to compare against")
+  parser.add_argument("--threshold", type=float, default=0.1,
+                      help="fraction a measurement has to change by to be reported (default: 0.1)")
+  parser.add_argument("--only", nargs="+", choices=BENCHMARKS, metavar="BENCHMARK",
+                      help="only run these benchmarks")
+  return parser.parse_args(args)
+
+
+def main(args=None):
+  args = parse_args(args)
+  report = run_suite(args.only or BENCHMARKS)
+  if args.output is None:
+    json.dump(report, sys.stdout, indent=2)
+    print()
+  else:
+    with open(args.output, "w") as outfile:
+      json.dump(report, outfile, indent=2)
+  if args.baseline is not None:
+    with open(args.baseline) as infile:
+      baseline = json.load(infile)
+    changes = compare(baseline, report, args.threshold)
+    # The JSON may be on stdout, so the comparison goes to stderr
+    print_changes(changes, sys.stderr)
+    if any(change[7] for change in changes):
+      return 1
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
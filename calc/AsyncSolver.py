@@ -0,0 +1,161 @@
+import multiprocessing
+import signal
+import time
+
+from calc.CalcCore import solve_expression
+from calc.ExprEngine import FLOAT, default_engine
+from calc.ResultFormatter import default_formatter
+
+# Statuses a finished solve can have
+DONE = "done"
+TIMEOUT = "timeout"
+
+
+class SolveTimeout(BaseException):
+  '''
+  Raised in the worker when a solve uses up its CPU time. It isn't an
+  Exception, so it isn't mistaken for an invalid expression.
+  '''
+
+
+def _cpu_time_exceeded(signum, frame):
+  '''Signal handler for when a solve has used up its CPU time'''
+  raise SolveTimeout
+
+
+def solve_worker(conn, time_limit):
+  '''
+  Worker process loop, solving each (expression, formatter, settings)
+  received on conn and sending back a (status, total) tuple, until None is
+  received. settings are the (mode, precision) of the engine to solve with.
+  '''
+  # Use the process CPU time timer to stop solves that run too long, where
+  # the platform has one
+  use_timer = hasattr(signal, "setitimer") and time_limit is not None
+  if use_timer:
+    signal.signal(signal.SIGPROF, _cpu_time_exceeded)
+  # The worker's shared engine, whose caches last as long as the worker
+  engine = default_engine
+  while True:
+    job = conn.recv()
+    if job is None:
+      break
+    expression, formatter, settings = job
+    if settings != engine.settings:
+      engine.set_mode(*settings)
+    try:
+      if use_timer:
+        signal.setitimer(signal.ITIMER_PROF, time_limit)
+      try:
+        result = (DONE, solve_expression(expression, engine, formatter))
+      finally:
+        if use_timer:
+          signal.setitimer(signal.ITIMER_PROF, 0)
+    except SolveTimeout:
+      result = (TIMEOUT, None)
+    conn.send(result)
+
+
+class AsyncSolver:
+  '''
+  Solves expressions in a worker process, so that a long solve can't block
+  the caller. Results are collected by calling poll, e.g. from Tk's after.
+  '''
+  def __init__(self, time_limit=5.0, kill_grace=1.0):
+    '''
+    Initialize the solver. Each solve may use up to time_limit seconds of
+    CPU time, and the worker is killed if no result arrives kill_grace
+    seconds after that (e.g. when stuck in a single huge multiplication).
+    '''
+    self.time_limit = time_limit
+    self.kill_grace = kill_grace
+    # Worker process and the parent's end of its pipe, started on first use
+    self.process = None
+    self.conn = None
+    # Time the current solve was submitted, None when idle
+    self.started = None
+
+
+  @property
+  def busy(self):
+    '''Whether a solve is in progress'''
+    return self.started is not None
+
+
+  def start(self):
+    '''Start the worker process if it isn't running'''
+    if self.process is not None and self.process.is_alive():
+      return
+    # Spawn rather than fork, so the worker doesn't inherit the GUI's state
+    context = multiprocessing.get_context("spawn")
+    self.conn, child_conn = context.Pipe()
+    self.process = context.Process(target=solve_worker, args=(child_conn, self.time_limit),
+                                   daemon=True)
+    self.process.start()
+    child_conn.close()
+
+
+  def submit(self, expression, formatter=default_formatter, settings=(FLOAT, 28)):
+    '''
+    Start solving an expression, cancelling any solve in progress. The
+    engine's (mode, precision) settings are given by settings.
+    '''
+    if self.busy:
+      self.cancel()
+    self.start()
+    self.conn.send((expression, formatter, settings))
+    self.started = time.monotonic()
+
+
+  def poll(self):
+    '''
+    Return the (status, total) result of the current solve, or None if it
+    is still running. total is None if the expression couldn't be solved.
+    '''
+    if not self.busy:
+      return None
+    if self.conn.poll():
+      self.started = None
+      return self.conn.recv()
+    # The worker is stuck past its time limit, so kill it
+    if (self.time_limit is not None
+        and time.monotonic() - self.started > self.time_limit + self.kill_grace):
+      self.stop()
+      return (TIMEOUT, None)
+    return None
+
+
+  def solve(self, expression, formatter=default_formatter, settings=(FLOAT, 28)):
+    '''Solve an expression and wait for the result'''
+    self.submit(expression, formatter, settings)
+    while True:
+      result = self.poll()
+      if result is not None:
+        return result
+      time.sleep(0.001)
+
+
+  def cancel(self):
+    '''Cancel the current solve, if any'''
+    if self.busy:
+      # A running solve can't be interrupted, so the worker is replaced
+      self.stop()
+
+
+  def stop(self):
+    '''Kill the worker process, it is restarted by the next submit'''
+    if self.process is not None:
+      self.process.terminate()
+      self.process.join()
+      self.conn.close()
+    self.process = None
+    self.conn = None
+    self.started = None
+
+
+  def close(self):
+    '''Shut down the worker process'''
+    if self.process is not None and not self.busy:
+      self.conn.send(None)
+      self.process.join(1)
+    self.stop()
@@ -0,0 +1,92 @@
+import collections
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from calc.CalcCore import solve_expression
+
+# Written for an expression that can't be solved, like the " NaN " the
+# calculator displays
+NAN = "NaN"
+
+
+def solve_line(line):
+  '''Solve one line of input, returning the line of output for it'''
+  expression = line.strip()
+  # A blank line is left blank, as solving an empty expression does nothing
+  if expression == "":
+    return ""
+  total = solve_expression(expression)
+  return NAN if total is None else total
+
+
+def solve_chunk(lines):
+  '''Solve a chunk of input lines, returning the output as a single string'''
+  return "".join(solve_line(line) + "\n" for line in lines)
+
+
+def read_chunks(infile, chunk_size):
+  '''Read an input file lazily, as lists of up to chunk_size lines'''
+  while True:
+    chunk = list(itertools.islice(infile, chunk_size))
+    if not chunk:
+      return
+    yield chunk
+
+
+def run_batch(infile, outfile, workers=None, chunk_size=10000):
+  '''
+  Solve every line of infile, writing each result as a line of outfile in
+  the same order, and return the number of lines solved.
+
+  Chunks of chunk_size lines are solved across a pool of worker processes
+  (or in this process if workers is 1). Only a couple of chunks per worker
+  are read ahead, so memory use is bounded regardless of the input size.
+  '''
+  count = 0
+  chunks = read_chunks(infile, chunk_size)
+  if workers == 1:
+    for chunk in chunks:
+      outfile.write(solve_chunk(chunk))
+      count += len(chunk)
+    return count
+
+  workers = workers or os.cpu_count() or 1
+  with ProcessPoolExecutor(workers) as executor:
+    # Chunks being solved, oldest first, along with their number of lines
+    pending = collections.deque()
+    window = 2 * workers
+    for chunk in chunks:
+      pending.append((executor.submit(solve_chunk, chunk), len(chunk)))
+      # Once the window is full, wait for the oldest chunk so the output
+      # stays in input order
+      if len(pending) >= window:
+        future, size = pending.popleft()
+        outfile.write(future.result())
+        count += size
+    while pending:
+      future, size = pending.popleft()
+      outfile.write(future.result())
+      count += size
+  return count
+
+
+def main(path=None, output=None, workers=None, chunk_size=10000):
+  '''Run a batch from a file (or stdin) to a file (or stdout), reporting the throughput'''
+  infile = sys.stdin if path in (None, "-") else open(path, buffering=1 << 20)
+  outfile = sys.stdout if output in (None, "-") else open(output, "w", buffering=1 << 20)
+  try:
+    start = time.perf_counter()
+    count = run_batch(infile, outfile, workers, chunk_size)
+    outfile.flush()
+    elapsed = time.perf_counter() - start
+  finally:
+    if infile is not sys.stdin:
+      infile.close()
+    if outfile is not sys.stdout:
+      outfile.close()
+  rate = count / elapsed if elapsed > 0 else 0
+  print(f'{count} expressions in {elapsed:.3f}s ({rate:,.0f} expressions/s)', file=sys.stderr)
+  return count
@@ -0,0 +1,351 @@
+from calc.ExprEngine import default_engine
+from calc.ResultFormatter import default_formatter
+
+# Chars that are treated as operators in an expression
+OPERATORS = "+-*/%"
+
+
+def format_total(value, formatter=default_formatter):
+  '''Format a total to a bounded number of significant digits'''
+  return formatter.format(value)
+
+
+def solve_expression(expression, engine=default_engine, formatter=default_formatter):
+  '''Solve an expression, returning the formatted total or None if it is invalid'''
+  try:
+    return format_total(engine.evaluate(expression), formatter)
+  except Exception:
+    return None
+
+
+class CalcCore:
+  '''
+  The expression state machine behind the basic calculator. It has no
+  dependency on tkinter, so it can be driven by the GUI, tests, or any
+  other front end one key at a time.
+
+  The expression is held as a token buffer rather than a string. Finished
+  numbers (with the operator and sign before them) are committed to a
+  list, and only the number currently being typed is tracked in detail:
+  its operator, its negative sign, its chars and whether it has a decimal
+  point. Every edit only touches that number, so each keystroke is O(1),
+  and the expression string is only rendered when it is asked for.
+
+  The committed parts are also evaluated as they are committed, keeping
+  the sum of the finished terms and the value of the term in progress
+  (e.g. 1+2*3 keeps 1 and 6). The live preview only has to combine these
+  with the current number, so it never re-evaluates the whole expression.
+  '''
+  def __init__(self, engine=None, formatter=None, history=None):
+    '''
+    Initialize an empty calculator, evaluating and formatting with the
+    given engine and formatter, and recording solves in history if given
+    '''
+    self.reset()
+    # Flag to indicate whether the total from a previous
+    # equation is being displayed
+    self.total_flag = False
+    # Flag to indicate whether the last solve failed, in which case
+    # " NaN " is displayed instead of the (empty) expression
+    self.nan_flag = False
+    # Engine used to evaluate the expression, the shared engine by default
+    # so that compiled expressions are cached once per process
+    self.engine = default_engine if engine is None else engine
+    # Formatter for totals and the preview
+    self.formatter = default_formatter if formatter is None else formatter
+    # History that each solved expression and its total is added to
+    self.history = history
+
+
+  def reset(self):
+    '''Empty the token buffer'''
+    # Committed parts of the expression, each one being a number along
+    # with the operator and negative sign in front of it
+    self.head = []
+    # Operator in front of the current number, "" at the start
+    self.op = ""
+    # Whether the current number has a negative sign in front of it
+    self.neg = False
+    # Chars of the current number, empty if it hasn't been started
+    self.digits = []
+    # Whether the current number contains a decimal point
+    self.dot = False
+    # Rendered expression, None when it needs to be rendered again
+    self.text = ""
+    # Rendered committed parts, and how many of them it covers
+    self.head_text = ""
+    self.head_count = 0
+    # Running evaluation of the committed parts. sum is the total of the
+    # finished terms (None if there aren't any), which is joined to the
+    # term in progress by the "+" or "-" in sum_op, and term is the value
+    # of the term in progress
+    self.sum = None
+    self.sum_op = None
+    self.term = None
+    # Whether the committed parts could be evaluated
+    self.valid = True
+    # Rendered preview, None when it needs to be rendered again
+    self.preview_text = ""
+
+
+  @property
+  def expression(self):
+    '''The current expression, rendered from the token buffer if it changed'''
+    if self.text is None:
+      # Only the parts committed since the last render need joining
+      if self.head_count < len(self.head):
+        self.head_text += "".join(self.head[self.head_count:])
+        self.head_count = len(self.head)
+      self.text = (self.head_text + self.op + ("-" if self.neg else "")
+                   + "".join(self.digits))
+    return self.text
+
+  @expression.setter
+  def expression(self, value):
+    '''Replace the expression, rebuilding the token buffer from a string'''
+    self.reset()
+    self.nan_flag = False
+    for char in str(value):
+      if char in OPERATORS:
+        # A sign after the "e" of a number is part of its exponent
+        if char in "+-" and self.digits and self.digits[-1] in "eE":
+          self.digits.append(char)
+        # An operator after a number commits the number
+        elif self.digits:
+          self.commit(char)
+        # A minus in front of a number is its negative sign
+        elif char == "-" and not self.neg:
+          self.neg = True
+        # Anything else isn't something the calculator would produce
+        # (e.g. a pasted "3+*4"), so keep it as it is
+        else:
+          self.head.append(self.op + ("-" if self.neg else ""))
+          self.op = char
+          self.neg = False
+          self.valid = False
+      else:
+        self.digits.append(char)
+        # A number with an exponent can't have a decimal point added
+        self.dot = self.dot or char in ".eE"
+    self.changed()
+
+
+  @property
+  def display(self):
+    '''The text the front end should display'''
+    return " NaN " if self.nan_flag else self.expression
+
+
+  @property
+  def preview(self):
+    '''The running result of the expression, or "" if there isn't one'''
+    if self.preview_text is None:
+      self.preview_text = self.render_preview()
+    return self.preview_text
+
+
+  def render_preview(self):
+    '''Combine the running evaluation with the current number into a preview'''
+    # A single number, or an expression that can't be evaluated, has no preview
+    if not self.head or not self.valid:
+      return ""
+    try:
+      # An expression ending in an operator previews the part before it
+      if self.digits:
+        total, total_op, term = self.fold(self.op, self.value())
+      else:
+        total, total_op, term = self.sum, self.sum_op, self.term
+      if total is not None:
+        term = self.engine.binary_ops[total_op][1](total, term)
+      return format_total(term, self.formatter)
+    except Exception:
+      return ""
+
+
+  def changed(self):
+    '''Mark the rendered expression and preview as out of date'''
+    self.text = None
+    self.preview_text = None
+
+
+  def value(self):
+    '''The value of the current number, including its negative sign'''
+    value = self.engine.literal("".join(self.digits))
+    return self.engine.unary_ops["-"](value) if self.neg else value
+
+
+  def fold(self, op, value):
+    '''
+    Return the (sum, sum_op, term) running evaluation after applying op
+    to the running evaluation and value, without changing it
+    '''
+    # Multiplication, division and modulus extend the term in progress
+    if op in ("*", "/", "%"):
+      return self.sum, self.sum_op, self.engine.binary_ops[op][1](self.term, value)
+    # The first number starts the first term
+    if not op:
+      return None, None, value
+    # Addition and subtraction finish the term in progress, and start a new one
+    if self.sum is None:
+      return self.term, op, value
+    return self.engine.binary_ops[self.sum_op][1](self.sum, self.term), op, value
+
+
+  def commit(self, operation):
+    '''Commit the current number, and start a new one after the operation'''
+    self.head.append(self.op + ("-" if self.neg else "") + "".join(self.digits))
+    if self.valid:
+      try:
+        self.sum, self.sum_op, self.term = self.fold(self.op, self.value())
+      except Exception:
+        # e.g. a division by zero, which makes the whole expression invalid
+        self.valid = False
+    self.op = operation
+    self.neg = False
+    self.digits = []
+    self.dot = False
+
+
+  def press(self, button):
+    '''Carry out the correct action when a calculator button is pressed'''
+    # Solve the input expression
+    if button == "=":
+      self.solve_eqn()
+    # Clear the input expression
+    elif button == "AC":
+      self.clear()
+    # Negate the current number
+    elif button == "+/-":
+      self.negate_num()
+    # Add the button's value to the expression string
+    else:
+      self.update_eqn(button)
+
+
+  def key(self, char):
+    '''Carry out the correct action when a keyboard char is typed'''
+    # Keys without a char (e.g. Shift) are ignored
+    if not char:
+      return
+    # If the key is a number, decimal, or operator, add it to the
+    # input expression
+    if char.isdigit() or char in "+-*/%.":
+      self.update_eqn(char)
+    # If the key is the equals key, solve the input expression
+    elif char == "=":
+      self.solve_eqn()
+    # If the key is something else, ignore it
+
+
+  def feed(self, keys):
+    '''Press each key in an iterable of keys, in order'''
+    press = self.press
+    for key in keys:
+      press(key)
+
+
+  def clear(self):
+    '''Clear the expression and the display'''
+    self.reset()
+    self.nan_flag = False
+
+
+  def change_operation(self, operation):
+    '''Change the operator at the end of the expression to the input operation'''
+    self.nan_flag = False
+    # If a number has been started, the operation comes after it
+    if self.digits:
+      self.commit(str(operation))
+    # A minus on an empty expression is a negative sign
+    elif not self.op and not self.neg and operation == "-":
+      self.neg = True
+    # Otherwise change the operator, keeping any negative sign after it
+    else:
+      self.op = str(operation)
+    self.changed()
+
+
+  def negate_num(self):
+    '''Add or remove the negative sign in front of the current number'''
+    self.nan_flag = False
+    self.neg = not self.neg
+    self.changed()
+
+
+  def update_eqn(self, char):
+    '''Add a character to the expression'''
+    char = str(char)
+    if not char:
+      return
+    self.nan_flag = False
+    # If the current expression is the result from the previous expression,
+    # and a number or decimal point is input, clear the expression first
+    if self.total_flag and (char.isdigit() or char == "."):
+      self.reset()
+    # Indicates the current expression is no long the result of the previous
+    # expression, as it was either just reset, or something is being added to it
+    self.total_flag=False
+
+    # If an operator was selected
+    if char in OPERATORS:
+      # If the expression is empty and the input char isn't a negative sign, or the
+      # expression only contains a decimal point or a negative sign, set the expression
+      # to contain only a zero, so that the operator can be added after that
+      if not self.head and not self.op:
+        if ((not self.digits and not self.neg and char != "-")
+            or (self.digits == ["."] and not self.neg) or (not self.digits and self.neg)):
+          self.neg = False
+          self.digits = ["0"]
+          self.dot = False
+      # If a number has been started, commit it and start a new one after
+      # the operator, otherwise the expression ends in an operator that
+      # should be changed to the new one
+      if self.digits:
+        self.commit(char)
+      else:
+        self.change_operation(char)
+    elif char == ".":
+      # If no number has been started, start it with a zero before the
+      # decimal, and ignore the decimal if the number already has one
+      if not self.digits:
+        self.digits = ["0", "."]
+        self.dot = True
+      elif not self.dot:
+        self.digits.append(".")
+        self.dot = True
+    else:
+      self.digits.append(char)
+      self.dot = self.dot or "." in char
+    self.changed()
+
+
+  def solve_eqn(self):
+    '''Try and solve the current equation'''
+    expression = self.expression
+    # If there isn't any expression, don't change anything
+    if expression == "":
+      return
+    self.set_total(solve_expression(expression, self.engine, self.formatter))
+
+
+  def set_mode(self, mode, precision=None):
+    '''
+    Change the engine's precision mode (see ExprEngine.set_mode), and
+    re-evaluate the running preview in the new mode
+    '''
+    self.engine.set_mode(mode, precision)
+    total_flag = self.total_flag
+    self.expression = self.expression
+    self.total_flag = total_flag
+
+
+  def set_total(self, total):
+    '''Replace the expression with a solved total, or show NaN if total is None'''
+    if self.history is not None:
+      self.history.add(self.expression, total)
+    if total is None:
+      self.expression = ""
+      self.nan_flag = True
+    else:
+      self.expression = total
+      self.total_flag=True
@@ -0,0 +1,180 @@
+import csv
+import itertools
+import os
+import re
+import sys
+import time
+
+from calc.BatchEval import NAN
+from calc.ExprEngine import ExprError, run
+from calc.ResultFormatter import default_formatter
+from calc.Scientific import compile_scientific, variable_names
+from calc.Sweep import map_program, numpy, run_lists
+
+# A column of the input, numbered from 1
+COLUMN_RE = re.compile(r'col([1-9]\d*)')
+# Rows evaluated at a time, which bounds the memory a run uses to a batch
+# of rows and their columns, whatever the size of the file
+BATCH_ROWS = 1 << 16
+# Bytes buffered when reading and writing files
+BUFFER_SIZE = 1 << 20
+# Name of the result column, when the input has a header
+RESULT_HEADER = "result"
+
+
+def columns(expression):
+  '''
+  Return the (name, index) of each column an expression uses, in order of
+  index, raising ExprError for a name that isn't a column like "col3"
+  '''
+  found = []
+  for name in variable_names(expression):
+    match = COLUMN_RE.fullmatch(name)
+    if match is None:
+      raise ExprError(f'Unknown name "{name}", columns are written col1, col2 and so on')
+    found.append((name, int(match[1]) - 1))
+  return sorted(found, key=lambda column: column[1])
+
+
+class ColumnExpression:
+  '''
+  An expression over the columns of a row, compiled once and evaluated a
+  batch of rows at a time: each column it uses is converted to a list (or
+  an array, with NumPy) of floats, and every operator is applied to whole
+  columns at once
+  '''
+  def __init__(self, expression, formatter=default_formatter):
+    '''Compile expression, raising ExprError if it is invalid'''
+    self.expression = expression
+    self.formatter = formatter
+    self.columns = columns(expression)
+    names = [name for name, index in self.columns]
+    # Numbers are floats, as the columns are, so results are the same with
+    # or without NumPy
+    self.program = compile_scientific(expression, literal=float, variables=names)
+    self.mapped = map_program(self.program)
+
+
+  def evaluate(self, rows):
+    '''
+    Evaluate the expression for a batch of rows (lists of fields), returning
+    the formatted result of each, or NaN for a row whose fields aren't
+    numbers or whose result isn't finite
+    '''
+    try:
+      variables = { name: [float(row[index]) for row in rows] for name, index in self.columns }
+    except (ValueError, IndexError):
+      return self.evaluate_rows(rows)
+    if numpy is not None:
+      with numpy.errstate(all="ignore"):
+        values = run(self.program, { name: numpy.asarray(column)
+                                     for name, column in variables.items() })
+      values = numpy.broadcast_to(numpy.asarray(values, dtype=float), (len(rows),)).tolist()
+    else:
+      values = run_lists(self.program, self.mapped, variables, len(rows))
+    return self.format_values(values)
+
+
+  def evaluate_rows(self, rows):
+    '''Evaluate the expression a row at a time, see evaluate'''
+    values = []
+    for row in rows:
+      try:
+        values.append(run(self.program, { name: float(row[index]) for name, index in self.columns }))
+      except (ValueError, IndexError, ArithmeticError):
+        values.append(None)
+    return self.format_values(values)
+
+
+  def format_values(self, values):
+    '''Format a list of results as the calculator would, with NaN for None or non-finite ones'''
+    format_value = self.formatter.format
+    texts = []
+    for value in values:
+      if value is None:
+        texts.append(NAN)
+        continue
+      try:
+        texts.append(format_value(value))
+      except ValueError:
+        texts.append(NAN)
+    return texts
+
+
+def run_columns(infile, outfile, expression, header=False, batch_rows=BATCH_ROWS, progress=None):
+  '''
+  Evaluate an expression (see ColumnExpression) for every row of a CSV
+  file, writing each row to outfile with its result as an extra column,
+  and return the number of rows. Rows are read, evaluated and written
+  batch_rows at a time, so memory use is bounded regardless of the input
+  size. If header, the first row is a header, which is written with a
+  "result" column added. progress is called with the number of rows done
+  after each batch, if it is given.
+  '''
+  calculation = ColumnExpression(expression)
+  reader = csv.reader(infile)
+  writer = csv.writer(outfile, lineterminator="\n")
+  if header:
+    names = next(reader, None)
+    if names is not None:
+      writer.writerow(names + [RESULT_HEADER])
+  count = 0
+  while True:
+    rows = list(itertools.islice(reader, batch_rows))
+    if not rows:
+      return count
+    results = calculation.evaluate(rows)
+    writer.writerows(row + [result] for row, result in zip(rows, results))
+    count += len(rows)
+    if progress is not None:
+      progress(count)
+
+
+def run_file(expression, path, output, header=False, batch_rows=BATCH_ROWS, progress=None):
+  '''
+  Run an expression over a CSV file at path (or stdin if "-"), writing to
+  output (or stdout if "-"), see run_columns. progress is called with
+  (rows done, bytes read, input size), where the size is None for stdin.
+  Returns a dict of the number of rows, the seconds taken and the rows per
+  second.
+  '''
+  # Compiled before the output is opened, so an invalid expression doesn't
+  # leave behind an empty output file
+  ColumnExpression(expression)
+  infile = sys.stdin if path == "-" else open(path, newline="", buffering=BUFFER_SIZE)
+  outfile = sys.stdout if output == "-" else open(output, "w", newline="", buffering=BUFFER_SIZE)
+  try:
+    size = None if infile is sys.stdin else os.fstat(infile.fileno()).st_size
+    report = None
+    if progress is not None:
+      # The text file's own position can't be asked for while it is being
+      # iterated, but its underlying binary file's can, which is ahead by
+      # at most the buffer
+      report = lambda count: progress(count, infile.buffer.tell(), size)
+    start = time.perf_counter()
+    count = run_columns(infile, outfile, expression, header, batch_rows, report)
+    outfile.flush()
+    elapsed = time.perf_counter() - start
+  finally:
+    if infile is not sys.stdin:
+      infile.close()
+    if outfile is not sys.stdout:
+      outfile.close()
+  return { "rows": count, "seconds": elapsed, "rows_per_second": count / elapsed if elapsed > 0 else 0.0 }
+
+
+def main(expression, path, output="-", header=False):
+  '''Run an expression over a CSV file from the command line, reporting progress and the throughput'''
+  def progress(count, done, size):
+    percent = f' ({done / size:.0%})' if size else ""
+    print(f'\r{count:,} rows{percent}', end="", file=sys.stderr)
+
+  try:
+    result = run_file(expression, path, output, header,
+                      progress=progress if sys.stderr.isatty() else None)
+  except (ExprError, OSError, ValueError, csv.Error) as error:
+    print(f'Error: {error}', file=sys.stderr)
+    return 1
+  print(f'\r{result["rows"]} rows in {result["seconds"]:.3f}s'
+        f' ({result["rows_per_second"]:,.0f} rows/s)', file=sys.stderr)
+  return 0
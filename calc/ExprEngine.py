@@ -0,0 +1,406 @@
+import decimal
+import fractions
+import operator
+import re
+
+from calc.LRUCache import LRUCache
+
+# Instruction codes for a compiled program. Each instruction is a
+# (code, argument) tuple, where the argument is the number to push
+# or the function to apply to the top of the stack.
+PUSH = 0
+UNARY = 1
+BINARY = 2
+# Pushes the value bound to the variable named by the argument
+VAR = 3
+
+# Binary operators, with their precedence and implementation
+BINARY_OPS = { "+": (1, operator.add), "-": (1, operator.sub),
+               "*": (2, operator.mul), "/": (2, operator.truediv),
+               "%": (2, operator.mod) }
+# Precision modes. Float evaluates with native ints and floats, decimal
+# with decimal.Decimal at a chosen precision, and fraction with exact
+# fractions.Fraction arithmetic.
+FLOAT = "float"
+DECIMAL = "decimal"
+FRACTION = "fraction"
+PRECISION_MODES = (FLOAT, DECIMAL, FRACTION)
+
+
+def decimal_ops(context):
+  '''
+  Return the (binary_ops, unary_ops) for decimal mode, which round every
+  result to the precision of context. Modulus is changed to match Python's
+  ints and floats, as Decimal's own remainder takes the sign of the dividend.
+  '''
+  def mod(left, right):
+    result = context.remainder(left, right)
+    if result and (result < 0) != (right < 0):
+      result = context.add(result, right)
+    return result
+
+  binary_ops = { "+": (1, context.add), "-": (1, context.subtract),
+                 "*": (2, context.multiply), "/": (2, context.divide),
+                 "%": (2, mod) }
+  unary_ops = { "+": context.plus, "-": context.minus }
+  return binary_ops, unary_ops
+
+
+# Unary operators, which bind tighter than any binary operator
+UNARY_OPS = { "+": operator.pos, "-": operator.neg }
+UNARY_PREC = 3
+# Precedence of the multiplication implied by a constant written right
+# after an operand, like the unit in "2 mA", which binds tighter than any
+# operator so that "1/2 ms" is 1/(2 ms)
+IMPLIED_PREC = 4
+# Precedence of a function call like "sin(x)", which binds tighter than any
+# operator once its parenthesized argument is closed, so "sin(x)^2" is
+# (sin(x))^2
+FUNC_PREC = 6
+
+# A token is either a number (with an optional integer or decimal part,
+# and an optional exponent), a name, or any other single non-whitespace
+# char, which is checked by the parser
+TOKEN_RE = re.compile(r'(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|[A-Za-z_]\w*|\S')
+
+
+# Patterns used to put an expression in canonical form. Leading zeros are
+# zeros that start a number and come before another digit. Sign runs are
+# runs of unary signs after an operator or "(" (but not after an exponent's
+# sign), a run at the start of the expression is folded separately. Both start with a char rather than a
+# lookbehind, so the regex engine can skip quickly to where they match.
+LEADING_ZEROS_RE = re.compile(r'0(?<![\w.]0)0*(?=\d)')
+SIGN_RUN_RE = re.compile(r'[-+](?<=[-+*/%(][-+])(?<![eE][-+][-+])[-+]*')
+# Chars that are part of a number or word, which mustn't be joined together
+# when the whitespace between them is dropped
+WORD_CHARS = frozenset("0123456789.abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_")
+
+
+def fold_signs(signs):
+  '''Replace a run of unary signs with a single minus sign, or nothing'''
+  return "-" if signs.count("-") % 2 else ""
+
+
+def canonicalize(expression, signs=True):
+  '''
+  Rewrite an expression in a canonical form that evaluates to the same
+  result, so that different spellings of it share cache entries. Spaces and
+  leading zeros are dropped, and if signs is true, runs of unary signs are
+  folded into one minus sign or none (e.g. "--5" and "+5" become "5").
+  '''
+  parts = expression.split()
+  if len(parts) == 1:
+    expression = parts[0]
+  else:
+    # Whitespace is dropped, except between two parts of a number or word
+    # (e.g. "1 2") where it is kept as a space, so the expression stays invalid
+    joined = parts[:1]
+    for part in parts[1:]:
+      if joined[-1][-1] in WORD_CHARS and part[0] in WORD_CHARS:
+        joined.append(" ")
+      joined.append(part)
+    expression = "".join(joined)
+  expression = LEADING_ZEROS_RE.sub("", expression)
+  if signs:
+    unsigned = expression.lstrip("+-")
+    if len(unsigned) < len(expression):
+      expression = fold_signs(expression[:len(expression) - len(unsigned)]) + unsigned
+    expression = SIGN_RUN_RE.sub(lambda match: fold_signs(match[0]), expression)
+  return expression
+
+
+class ExprError(ValueError):
+  '''Raised when an expression can't be tokenized or parsed'''
+
+
+def tokenize(expression):
+  '''Split an expression into a list of number and operator strings'''
+  return TOKEN_RE.findall(expression)
+
+
+def references(expression):
+  '''Return the set of names an expression refers to'''
+  return { token for token in tokenize(expression) if token[0].isalpha() or token[0] == "_" }
+
+
+def parse_number(token):
+  '''Convert a number token to an int, or a float if it has a decimal point or exponent'''
+  if token.isdigit():
+    return int(token)
+  return float(token)
+
+
+def compile_expr(expression, literal=parse_number, binary_ops=BINARY_OPS, unary_ops=UNARY_OPS,
+                 variables=(), constants=None, token_re=TOKEN_RE, functions=None,
+                 postfix_ops=None, right_assoc=()):
+  '''
+  Compile an expression into a postfix program, using the shunting-yard
+  algorithm so that arbitrarily long expressions never hit a recursion limit.
+  Numbers are converted by literal, and operators implemented by binary_ops
+  and unary_ops. Only the names in variables can be used as variables,
+  their values are given when the program is run. Any other name is
+  converted by constants, which raises ExprError for an unknown name, and
+  a constant right after an operand multiplies it. Tokens are matched by
+  token_re.
+
+  functions maps the names of one argument functions, called like
+  "sin(x)", to their implementation, and postfix_ops maps operators
+  written after their operand, like "!", to theirs. Binary operators are
+  left associative, except those in right_assoc.
+  '''
+  program = []
+  # Pending operators, as (precedence, code, function) tuples, with None
+  # marking an open parenthesis
+  ops = []
+  # Whether the parser is waiting for a number (or unary operator), as
+  # opposed to a binary operator
+  expect_operand = True
+  # Name of a function whose "(" should come next
+  call = None
+
+  for token in token_re.findall(expression):
+    if call is not None:
+      if token != "(":
+        raise ExprError(f'Expected "(" after {call}')
+      call = None
+    if expect_operand:
+      if token[0].isdigit() or token[0] == ".":
+        program.append((PUSH, literal(token)))
+        expect_operand = False
+      elif token[0].isalpha() or token[0] == "_":
+        if token in variables:
+          program.append((VAR, token))
+        elif functions is not None and token in functions:
+          # The call is applied once its argument is complete, like a unary
+          # operator that binds tighter than any other
+          ops.append((FUNC_PREC, UNARY, functions[token]))
+          call = token
+          continue
+        elif constants is not None:
+          program.append((PUSH, constants(token)))
+        else:
+          raise ExprError(f'Unknown variable "{token}"')
+        expect_operand = False
+      elif token in unary_ops:
+        # Unary operators are prefix and right associative, so nothing
+        # needs to be popped before pushing them
+        ops.append((UNARY_PREC, UNARY, unary_ops[token]))
+      elif token == "(":
+        ops.append(None)
+      else:
+        raise ExprError(f'Expected a number, found "{token}"')
+    else:
+      if token in binary_ops:
+        prec, func = binary_ops[token]
+        # A left associative operator pops any pending operator with the
+        # same or higher precedence first, a right associative one only
+        # those with higher precedence
+        if token in right_assoc:
+          while ops and ops[-1] is not None and ops[-1][0] > prec:
+            program.append(ops.pop()[1:])
+        else:
+          while ops and ops[-1] is not None and ops[-1][0] >= prec:
+            program.append(ops.pop()[1:])
+        ops.append((prec, BINARY, func))
+        expect_operand = True
+      elif token == ")":
+        while ops and ops[-1] is not None:
+          program.append(ops.pop()[1:])
+        if not ops:
+          raise ExprError('Unbalanced ")"')
+        ops.pop()
+      elif postfix_ops is not None and token in postfix_ops:
+        # A postfix operator binds tighter than anything but a call whose
+        # argument is complete, so it applies to the operand just parsed
+        while ops and ops[-1] is not None and ops[-1][0] >= FUNC_PREC:
+          program.append(ops.pop()[1:])
+        program.append((UNARY, postfix_ops[token]))
+      elif (constants is not None and (token[0].isalpha() or token[0] == "_")
+            and token not in variables and (functions is None or token not in functions)):
+        while ops and ops[-1] is not None and ops[-1][0] >= IMPLIED_PREC:
+          program.append(ops.pop()[1:])
+        ops.append((IMPLIED_PREC, BINARY, binary_ops["*"][1]))
+        program.append((PUSH, constants(token)))
+      else:
+        raise ExprError(f'Expected an operator, found "{token}"')
+
+  # The expression can't end with an operator, or be empty
+  if expect_operand:
+    raise ExprError('Incomplete expression')
+  while ops:
+    op = ops.pop()
+    if op is None:
+      raise ExprError('Unbalanced "("')
+    program.append(op[1:])
+  return tuple(program)
+
+
+def run(program, variables=None):
+  '''
+  Run a compiled program and return the resulting number, with variables
+  mapping the name of each variable to its value
+  '''
+  stack = []
+  push = stack.append
+  pop = stack.pop
+  for code, arg in program:
+    if code == PUSH:
+      push(arg)
+    elif code == BINARY:
+      right = pop()
+      stack[-1] = arg(stack[-1], right)
+    elif code == UNARY:
+      stack[-1] = arg(stack[-1])
+    else:
+      push(variables[arg])
+  return stack[0]
+
+
+def is_exact(program):
+  '''
+  Whether a native program is exact in binary, i.e. it only has int
+  numbers and no division, so every step is exact int arithmetic
+  '''
+  for code, arg in program:
+    if code == PUSH:
+      if type(arg) is not int:
+        return False
+    elif code == VAR or arg is operator.truediv:
+      return False
+  return True
+
+
+def fold_constants(program):
+  '''
+  Return a program with every operation on constants done once, ahead of
+  time, so running it only does the operations on variables. In postfix,
+  an operation's operands are constant exactly when the instructions just
+  before it push them, as a folded constant is a single push. An operation
+  that raises, like 1/0, is left in the program to raise when it is run.
+  '''
+  folded = []
+  for code, arg in program:
+    try:
+      if code == BINARY and len(folded) >= 2 and folded[-1][0] == PUSH and folded[-2][0] == PUSH:
+        folded[-2:] = [(PUSH, arg(folded[-2][1], folded[-1][1]))]
+        continue
+      if code == UNARY and folded and folded[-1][0] == PUSH:
+        folded[-1] = (PUSH, arg(folded[-1][1]))
+        continue
+    except (ArithmeticError, ValueError):
+      pass
+    folded.append((code, arg))
+  return tuple(folded)
+
+
+# Marks a result that isn't in the result cache, as None could be cached
+MISSING = object()
+
+
+class ExprEngine:
+  '''
+  Evaluates calculator expressions (+, -, *, /, %, unary minus, decimals and
+  parentheses) without eval, caching each compiled program
+  '''
+  def __init__(self, cache_size=256, mode=FLOAT, precision=28):
+    '''
+    Initialize the engine with program and result caches of cache_size
+    entries each, evaluating in the given precision mode
+    '''
+    # Compiled programs and their results, keyed by the canonical
+    # expression (see canonicalize)
+    self.programs = LRUCache(cache_size)
+    self.results = LRUCache(cache_size)
+    self.set_mode(mode, 28 if precision is None else precision)
+
+
+  def set_mode(self, mode, precision=None):
+    '''
+    Change the precision mode, and for decimal mode the number of
+    significant digits to evaluate with (unchanged if None)
+    '''
+    if mode not in PRECISION_MODES:
+      raise ValueError(f'Unknown precision mode "{mode}"')
+    self.mode = mode
+    if precision is not None:
+      self.precision = precision
+      self.context = decimal.Context(prec=precision)
+    # How numbers are converted and operators implemented in this mode
+    self.binary_ops, self.unary_ops = BINARY_OPS, UNARY_OPS
+    if mode == DECIMAL:
+      self.literal = decimal.Decimal
+      self.binary_ops, self.unary_ops = decimal_ops(self.context)
+    elif mode == FRACTION:
+      self.literal = fractions.Fraction
+    else:
+      self.literal = parse_number
+    # Programs compiled and results evaluated in the old mode can't be reused
+    self.programs.clear()
+    self.results.clear()
+
+
+  @property
+  def settings(self):
+    '''The (mode, precision) the engine evaluates with'''
+    return self.mode, self.precision
+
+
+  def canonical(self, expression):
+    '''
+    Return the canonical form of an expression, used as its cache key. In
+    decimal mode every unary sign rounds its operand to the precision, so
+    runs of them aren't folded.
+    '''
+    return canonicalize(expression, self.mode != DECIMAL)
+
+
+  def compile(self, expression):
+    '''
+    Return a (program, native) tuple for an expression, compiling it if
+    needed. native is True if the program uses native ints and floats,
+    either because the engine is in float mode or because the expression
+    is exact in binary, which gives the same result as any other mode.
+    '''
+    return self.compile_key(self.canonical(expression))
+
+
+  def compile_key(self, key):
+    '''Return the (program, native) tuple for an expression already in canonical form'''
+    compiled = self.programs.get(key)
+    if compiled is None:
+      program = compile_expr(key)
+      native = self.mode == FLOAT or is_exact(program)
+      if not native:
+        program = compile_expr(key, self.literal, self.binary_ops, self.unary_ops)
+      compiled = (program, native)
+      self.programs.put(key, compiled)
+    return compiled
+
+
+  def evaluate(self, expression):
+    '''
+    Evaluate an expression, raising an exception if it is invalid. Results
+    are cached, so an expression that was evaluated recently (in any of its
+    spellings) isn't evaluated again.
+    '''
+    key = self.canonical(expression)
+    result = self.results.get(key, MISSING)
+    if result is not MISSING:
+      return result
+    program, native = self.compile_key(key)
+    result = run(program)
+    # An exact int result is only rounded to the precision at the end
+    if native and self.mode == DECIMAL:
+      result = self.context.create_decimal(result)
+    self.results.put(key, result)
+    return result
+
+
+  @property
+  def stats(self):
+    '''The counters of the result and program caches, as a dict of dicts'''
+    return { "results": self.results.stats, "programs": self.programs.stats }
+
+
+# Engine shared by every calculator in the process
+default_engine = ExprEngine()
@@ -0,0 +1,204 @@
+import collections
+import mmap
+import os
+import struct
+import tempfile
+
+# Each entry is stored as a line of "expression\tresult\n" in the data file,
+# with an empty result for an expression that couldn't be solved. The index
+# file holds the offset of each line in the data file, as fixed size records,
+# so an entry can be found without reading the lines before it.
+OFFSET = struct.Struct("<Q")
+
+
+class History:
+  '''
+  Tape of every solved expression and its result, oldest first.
+
+  The most recent entries are kept in memory in a fixed size ring buffer,
+  and every entry is appended to a data file that is memory mapped to read
+  older entries, so the history can grow far larger than memory. Searches
+  scan the mapped data file backwards, newest entries first.
+  '''
+  def __init__(self, path=None, capacity=1000):
+    '''
+    Open the history stored at path (and path + ".idx"), creating it if it
+    doesn't exist, keeping up to capacity recent entries in memory. Without
+    a path, the history is kept in temporary files for this session only.
+    '''
+    if path is None:
+      self.data = tempfile.TemporaryFile()
+      self.index = tempfile.TemporaryFile()
+    else:
+      # Opened for appending, so every write goes to the end of the file
+      self.data = open(path, "a+b")
+      self.index = open(path + ".idx", "a+b")
+    # Memory maps of the data and index files, remapped when they are
+    # too small to read an entry that was added after they were mapped
+    self.data_map = None
+    self.index_map = None
+    self.size, self.count = self.recover()
+    # Most recent entries, as (expression, result) tuples
+    self.ring = collections.deque(maxlen=capacity)
+    for number in range(max(0, self.count - capacity), self.count):
+      self.ring.append(self.read(number))
+
+
+  def recover(self):
+    '''
+    Return the size of the data file and the number of entries, fixing up
+    files that weren't fully written (e.g. when the app was killed mid
+    write) so that they agree with each other
+    '''
+    size = os.fstat(self.data.fileno()).st_size
+    count = os.fstat(self.index.fileno()).st_size // OFFSET.size
+    # Drop a partly written offset, and offsets past the end of the data
+    while count and self.offset(count - 1) >= size:
+      count -= 1
+    self.index.truncate(count * OFFSET.size)
+    # Index any complete lines after the last indexed one, and drop a
+    # partly written line at the end
+    start = self.line_end(count - 1) if count else 0
+    data = self.mapped_data(size)
+    while start < size:
+      end = data.find(b"\n", start)
+      if end == -1:
+        break
+      self.index.write(OFFSET.pack(start))
+      count += 1
+      start = end + 1
+    self.index.flush()
+    self.data.truncate(start)
+    # The maps could cover data that was just truncated, which can't be read
+    self.unmap()
+    return start, count
+
+
+  def unmap(self):
+    '''Close the memory maps, they are mapped again when next needed'''
+    for mapped in (self.data_map, self.index_map):
+      if isinstance(mapped, mmap.mmap):
+        mapped.close()
+    self.data_map = None
+    self.index_map = None
+
+
+  def mapped_data(self, size):
+    '''Return a memory map of the data file that covers at least size bytes'''
+    if self.data_map is None or len(self.data_map) < size:
+      if isinstance(self.data_map, mmap.mmap):
+        self.data_map.close()
+      self.data_map = mmap.mmap(self.data.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+    return self.data_map
+
+
+  def offset(self, number):
+    '''Return the offset in the data file of an entry's line'''
+    end = (number + 1) * OFFSET.size
+    if self.index_map is None or len(self.index_map) < end:
+      if self.index_map is not None:
+        self.index_map.close()
+      self.index_map = mmap.mmap(self.index.fileno(), 0, access=mmap.ACCESS_READ)
+    return OFFSET.unpack_from(self.index_map, number * OFFSET.size)[0]
+
+
+  def line_end(self, number):
+    '''Return the offset just past the end of an entry's line'''
+    start = self.offset(number)
+    data = self.mapped_data(start + 1)
+    return data.find(b"\n", start) + 1
+
+
+  def read(self, number):
+    '''Read an entry from the data file, as an (expression, result) tuple'''
+    start = self.offset(number)
+    data = self.mapped_data(start + 1)
+    expression, result = data[start:data.find(b"\n", start)].decode().split("\t")
+    return expression, result or None
+
+
+  def __len__(self):
+    return self.count
+
+
+  def __getitem__(self, number):
+    '''Return entry number (negative numbers count from the newest entry) as (expression, result)'''
+    if number < 0:
+      number += self.count
+    if not 0 <= number < self.count:
+      raise IndexError("history entry out of range")
+    # Recent entries are in the ring buffer, older ones are in the data file
+    ring_start = self.count - len(self.ring)
+    if number >= ring_start:
+      return self.ring[number - ring_start]
+    return self.read(number)
+
+
+  def add(self, expression, result):
+    '''Record a solved expression and its result, None if it couldn't be solved'''
+    # Tabs and newlines would break up the entry's line, and are never in a
+    # calculator expression anyway
+    expression = " ".join(expression.split())
+    line = f'{expression}\t{"" if result is None else result}\n'.encode()
+    # The data is written before its offset, so a partly written entry is
+    # always dropped by recover
+    self.data.write(line)
+    self.data.flush()
+    self.index.write(OFFSET.pack(self.size))
+    self.index.flush()
+    self.size += len(line)
+    self.ring.append((expression, result))
+    self.count += 1
+
+
+  def number_at(self, position):
+    '''Return the number of the entry whose line contains a position in the data file'''
+    # Binary search of the offsets in the index file
+    low, high = 0, self.count - 1
+    while low < high:
+      middle = (low + high + 1) // 2
+      if self.offset(middle) <= position:
+        low = middle
+      else:
+        high = middle - 1
+    return low
+
+
+  def search(self, text, limit=100, prefix=False):
+    '''
+    Return the numbers of the newest entries (up to limit, newest first)
+    whose expression or result contains text, or starts with it if prefix
+    is true
+    '''
+    if text == "":
+      return list(range(self.count - 1, max(-1, self.count - 1 - limit), -1))
+    # Entries are lines of the data file, so text can't match across them
+    if "\t" in text or "\n" in text or self.count == 0:
+      return []
+    # The data file is searched backwards from the end, so the newest
+    # matches are found first and the search stops as soon as it has enough
+    data = self.mapped_data(self.size)
+    query = text.encode()
+    found = []
+    end = self.size
+    while len(found) < limit:
+      position = data.rfind(query, 0, end)
+      if position == -1:
+        break
+      line_start = data.rfind(b"\n", 0, position) + 1
+      # A prefix match has to be at the start of the expression or result,
+      # otherwise look for an earlier match in the same line
+      if prefix and position != line_start and data[position - 1] != ord("\t"):
+        end = position + len(query) - 1
+        continue
+      found.append(self.number_at(line_start))
+      end = line_start
+    return found
+
+
+  def close(self):
+    '''Close the history's files'''
+    self.unmap()
+    self.data.close()
+    self.index.close()
+
@@ -0,0 +1,63 @@
+from collections import OrderedDict
+
+class LRUCache:
+  '''
+  A bounded mapping that evicts the least recently used entry once full,
+  counting its hits, misses and evictions
+  '''
+  def __init__(self, maxsize=256):
+    '''Initialize an empty cache that holds at most maxsize entries'''
+    # Entries are kept in access order, the oldest entry is first
+    self.data = OrderedDict()
+    self.maxsize = maxsize
+    # Lookups that found an entry, lookups that didn't, and entries that
+    # were dropped to make room. clear doesn't count as evicting.
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+
+  def __len__(self):
+    return len(self.data)
+
+
+  def __contains__(self, key):
+    return key in self.data
+
+
+  def get(self, key, default=None):
+    '''Return the cached value for key and mark it as recently used'''
+    try:
+      value = self.data[key]
+    except KeyError:
+      self.misses += 1
+      return default
+    self.hits += 1
+    self.data.move_to_end(key)
+    return value
+
+
+  def put(self, key, value):
+    '''Store value for key, evicting the oldest entry if the cache is full'''
+    # A cache with no room doesn't store anything
+    if self.maxsize <= 0:
+      return
+    self.data[key] = value
+    self.data.move_to_end(key)
+    if len(self.data) > self.maxsize:
+      self.data.popitem(last=False)
+      self.evictions += 1
+
+
+  def clear(self):
+    '''Remove every entry from the cache'''
+    self.data.clear()
+
+
+  @property
+  def stats(self):
+    '''The cache's counters and size, as a dict'''
+    lookups = self.hits + self.misses
+    return { "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+             "hit_rate": self.hits / lookups if lookups else 0.0,
+             "size": len(self.data), "maxsize": self.maxsize }
@@ -0,0 +1,150 @@
+import functools
+import json
+import os
+import sys
+import time
+from array import array
+
+# Environment variable that turns instrumentation on. Any value other than
+# "" or "0" turns it on, and a value other than "1" is also the file the
+# metrics are dumped to when the app exits.
+ENV_VAR = "ENG_CALC_METRICS"
+# Number of histogram buckets. Bucket i counts values of i bits, i.e. from
+# 2 ** (i - 1) up to 2 ** i, so 64 buckets cover any time in nanoseconds.
+BUCKETS = 64
+
+
+class Histogram:
+  '''
+  Counts of recorded values in fixed power of two buckets, so recording a
+  value takes constant time and memory no matter how many are recorded
+  '''
+  def __init__(self, name, unit="ns"):
+    '''Initialize an empty histogram, of values measured in unit'''
+    self.name = name
+    self.unit = unit
+    self.buckets = array("Q", bytes(8 * BUCKETS))
+    self.count = 0
+    self.total = 0
+    self.max = 0
+
+
+  def record(self, value):
+    '''Record a non-negative int value'''
+    self.buckets[min(BUCKETS - 1, value.bit_length())] += 1
+    self.count += 1
+    self.total += value
+    if value > self.max:
+      self.max = value
+
+
+  def percentile(self, fraction):
+    '''
+    Return an upper bound on the given fraction (e.g. 0.99) of recorded
+    values, which is the upper end of the bucket it falls in
+    '''
+    if self.count == 0:
+      return 0
+    target = fraction * self.count
+    seen = 0
+    for bits, count in enumerate(self.buckets):
+      seen += count
+      if seen >= target:
+        # The maximum is a tighter bound for the top bucket
+        return min(2 ** bits - 1, self.max)
+    return self.max
+
+
+  def summary(self):
+    '''The histogram's count, mean, percentiles and maximum, as a dict'''
+    return { "unit": self.unit, "count": self.count,
+             "mean": self.total / self.count if self.count else 0,
+             "p50": self.percentile(0.5), "p90": self.percentile(0.9),
+             "p99": self.percentile(0.99), "max": self.max,
+             # Bucket counts by upper bound, leaving out empty buckets
+             "buckets": { 2 ** bits - 1: count for bits, count in enumerate(self.buckets) if count } }
+
+
+class Metrics:
+  '''
+  Registry of named histograms. When disabled, timed returns functions
+  unchanged, so instrumented code runs exactly as it would without it.
+  '''
+  def __init__(self, enabled=False, path=None):
+    '''Initialize the registry, dumping to path on exit if it is given'''
+    self.enabled = enabled
+    self.path = path
+    self.histograms = {}
+
+
+  def histogram(self, name, unit="ns"):
+    '''Return the histogram called name, creating it if needed'''
+    histogram = self.histograms.get(name)
+    if histogram is None:
+      histogram = self.histograms[name] = Histogram(name, unit)
+    return histogram
+
+
+  def record(self, name, value, unit="ns"):
+    '''Record a value in the histogram called name, if enabled'''
+    if self.enabled:
+      self.histogram(name, unit).record(value)
+
+
+  def timed(self, name, blocks=False):
+    '''
+    Decorator that records the latency of each call of a function in the
+    histogram called name. If blocks is true, the growth in the number of
+    memory blocks the interpreter has allocated is recorded too, in
+    name + ".blocks". Calls that free more blocks than they allocate are
+    recorded as 0.
+    '''
+    def decorator(func):
+      if not self.enabled:
+        return func
+      latency = self.histogram(name)
+      allocated = self.histogram(name + ".blocks", "blocks") if blocks else None
+      clock = time.perf_counter_ns
+      allocated_blocks = sys.getallocatedblocks
+
+      @functools.wraps(func)
+      def wrapper(*args, **kwargs):
+        if allocated is not None:
+          start_blocks = allocated_blocks()
+        start = clock()
+        try:
+          return func(*args, **kwargs)
+        finally:
+          latency.record(clock() - start)
+          if allocated is not None:
+            allocated.record(max(0, allocated_blocks() - start_blocks))
+      return wrapper
+    return decorator
+
+
+  def snapshot(self):
+    '''The summary of every histogram, keyed by name'''
+    return { name: histogram.summary() for name, histogram in sorted(self.histograms.items()) }
+
+
+  def dump(self, path=None, extra=None):
+    '''Write the snapshot (and any extra data) as JSON to path, or the path given at startup'''
+    path = self.path if path is None else path
+    if path is None:
+      return
+    data = { "histograms": self.snapshot() }
+    if extra is not None:
+      data.update(extra)
+    with open(path, "w") as outfile:
+      json.dump(data, outfile, indent=2)
+
+
+def from_environment(environ=os.environ):
+  '''Create the Metrics registry configured by the ENV_VAR environment variable'''
+  value = environ.get(ENV_VAR, "")
+  enabled = value not in ("", "0")
+  return Metrics(enabled, value if enabled and value != "1" else None)
+
+
+# Registry used by the app, configured when it starts
+metrics = from_environment()
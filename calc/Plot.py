@@ -0,0 +1,219 @@
+import math
+
+from calc.ExprEngine import run
+from calc.LRUCache import LRUCache
+from calc.Scientific import compile_scientific
+
+# Most samples of a function that are cached
+CACHE_SIZE = 1 << 18
+# Samples are first taken about this many pixels apart, then refined down to
+# MIN_SAMPLE_PIXELS apart where the curve bends
+BASE_SAMPLE_PIXELS = 8
+MIN_SAMPLE_PIXELS = 0.25
+# How far, in pixels, the curve can stray from a straight line between two
+# samples before the interval between them is sampled again
+TOLERANCE_PIXELS = 0.5
+
+MISSING = object()
+
+
+class Function:
+  '''
+  A function of x compiled from an expression, which caches its samples so
+  that they are only ever evaluated once while the plot is panned and zoomed
+  '''
+  def __init__(self, expression, cache_size=CACHE_SIZE):
+    '''Compile expression, which can use the variable x and the scientific functions'''
+    self.expression = expression
+    self.program = compile_scientific(expression, literal=float, variables=("x",))
+    self.samples = LRUCache(cache_size)
+    # Number of times the program has been run
+    self.evaluations = 0
+
+
+  def __call__(self, x):
+    '''Return the function at x, or None where it isn't defined or finite'''
+    y = self.samples.get(x, MISSING)
+    if y is MISSING:
+      self.evaluations += 1
+      try:
+        y = run(self.program, {"x": x})
+      except ArithmeticError:
+        y = None
+      if y is not None and not math.isfinite(y):
+        y = None
+      self.samples.put(x, y)
+    return y
+
+
+def power_of_two_step(step):
+  '''
+  Return the largest power of two no larger than step. Samples are taken
+  at multiples of these, so they land on the same x values (and hit the
+  cache) however the plot has been panned, and after zooming in or out.
+  '''
+  return 2.0 ** math.floor(math.log2(step))
+
+
+def sample(function, start, stop, base_step, min_step, tolerance):
+  '''
+  Sample function from start to stop, returning a list of (x, y) points in
+  order of x. Samples are taken base_step apart, then intervals where the
+  curve strays from a straight line by more than tolerance, or crosses the
+  edge of where the function is defined, are halved until they are
+  min_step wide. base_step and min_step should be powers of two.
+  '''
+  first = math.floor(start / base_step)
+  last = math.ceil(stop / base_step)
+  previous = first * base_step
+  previous_y = function(previous)
+  points = [(previous, previous_y)]
+  for k in range(first + 1, last + 1):
+    x = k * base_step
+    y = function(x)
+    # Intervals are refined depth first, left half first, so points are
+    # added in order without recursion. The left end of each interval
+    # popped has already been added, and its right end is added once it
+    # needs no more refining.
+    stack = [(previous, previous_y, x, y)]
+    while stack:
+      a, ya, b, yb = stack.pop()
+      if b - a > min_step and (ya is not None or yb is not None):
+        middle = (a + b) / 2
+        ym = function(middle)
+        if ya is None or yb is None or ym is None or abs(ym - (ya + yb) / 2) > tolerance:
+          stack.append((middle, ym, b, yb))
+          stack.append((a, ya, middle, ym))
+          continue
+        # Straight enough, but the middle sample is kept as it was taken
+        points.append((middle, ym))
+      points.append((b, yb))
+    previous, previous_y = x, y
+  return points
+
+
+class View:
+  '''
+  The part of the plane shown on a canvas of width by height pixels, which
+  converts between plane coordinates and pixels
+  '''
+  def __init__(self, x_min, x_max, y_min, y_max, width, height):
+    '''Initialize a view of x_min to x_max across, and y_min to y_max up'''
+    self.x_min, self.x_max = x_min, x_max
+    self.y_min, self.y_max = y_min, y_max
+    self.width, self.height = width, height
+
+
+  def to_pixel(self, x, y):
+    '''Return the pixel a point is drawn at, from the canvas's top left'''
+    return ((x - self.x_min) * self.width / (self.x_max - self.x_min),
+            (self.y_max - y) * self.height / (self.y_max - self.y_min))
+
+
+  def from_pixel(self, px, py):
+    '''Return the point drawn at a pixel'''
+    return (self.x_min + px * (self.x_max - self.x_min) / self.width,
+            self.y_max - py * (self.y_max - self.y_min) / self.height)
+
+
+  def resize(self, width, height):
+    '''Change the size of the canvas, keeping the range shown'''
+    self.width, self.height = max(1, width), max(1, height)
+
+
+  def pan(self, dx, dy):
+    '''Move the view so the plane moves by dx, dy pixels'''
+    x_shift = dx * (self.x_max - self.x_min) / self.width
+    y_shift = dy * (self.y_max - self.y_min) / self.height
+    self.x_min, self.x_max = self.x_min - x_shift, self.x_max - x_shift
+    self.y_min, self.y_max = self.y_min + y_shift, self.y_max + y_shift
+
+
+  def zoom(self, factor, px, py):
+    '''Zoom in by factor (out if less than 1), keeping the point at px, py in place'''
+    x, y = self.from_pixel(px, py)
+    self.x_min, self.x_max = x - (x - self.x_min) / factor, x + (self.x_max - x) / factor
+    self.y_min, self.y_max = y - (y - self.y_min) / factor, y + (self.y_max - y) / factor
+
+
+  def fit(self, points, margin=0.1):
+    '''
+    Fit the y range to the points, leaving out the top and bottom 2% so
+    that a pole (like 1/x at 0) doesn't flatten the rest of the curve
+    '''
+    ys = sorted(y for x, y in points if y is not None)
+    if not ys:
+      return
+    low, high = ys[len(ys) // 50], ys[-1 - len(ys) // 50]
+    if high - low < 1e-12 * max(1.0, abs(high)):
+      low, high = low - 1, high + 1
+    padding = (high - low) * margin
+    self.y_min, self.y_max = low - padding, high + padding
+
+
+  def steps(self):
+    '''Return (base_step, min_step, tolerance) for sampling what is in view'''
+    x_per_pixel = (self.x_max - self.x_min) / self.width
+    return (power_of_two_step(BASE_SAMPLE_PIXELS * x_per_pixel),
+            power_of_two_step(MIN_SAMPLE_PIXELS * x_per_pixel),
+            TOLERANCE_PIXELS * (self.y_max - self.y_min) / self.height)
+
+
+  def sample(self, function):
+    '''Sample function across the view, see sample'''
+    return sample(function, self.x_min, self.x_max, *self.steps())
+
+
+def decimate(points, view):
+  '''
+  Convert points to the pixel coordinates of the lines to draw, as a list
+  of flat [px, py, px, py, ...] lists, with a break wherever the function
+  isn't defined. A pixel column gets a single vertex, or two (its lowest
+  and highest, in the order they were sampled) if its samples span more
+  than a pixel, so a spike within a column is still drawn.
+  '''
+  lines = []
+  line = []
+  # Column being collected, with its first pixel and its lowest and
+  # highest pixel rows
+  column = None
+  # Rows are clamped to a band around the canvas, as Tk draws huge
+  # coordinates badly
+  top, bottom = -view.height, 2 * view.height
+  for x, y in points:
+    if y is None:
+      if column is not None:
+        add_column(line, column, first, low, high, low_first)
+        column = None
+      if len(line) >= 4:
+        lines.append(line)
+      line = []
+      continue
+    px, py = view.to_pixel(x, y)
+    py = min(bottom, max(top, py))
+    if math.floor(px) != column:
+      if column is not None:
+        add_column(line, column, first, low, high, low_first)
+      column = math.floor(px)
+      first = low = high = py
+      low_first = True
+    elif py < low:
+      low, low_first = py, False
+    elif py > high:
+      high, low_first = py, True
+  if column is not None:
+    add_column(line, column, first, low, high, low_first)
+  if len(line) >= 4:
+    lines.append(line)
+  return lines
+
+
+def add_column(line, column, first, low, high, low_first):
+  '''Add the vertices of a pixel column to line'''
+  if high - low <= 1:
+    line += (column, first)
+  elif low_first:
+    # Pixel rows grow downwards, so low is the top of the column
+    line += (column, low, column, high)
+  else:
+    line += (column, high, column, low)
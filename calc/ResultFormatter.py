@@ -0,0 +1,113 @@
+import decimal
+import fractions
+import math
+
+# Formatting modes. Fixed shows plain numbers unless they are too big or
+# small for the digit budget, scientific shows any number that isn't
+# between 1 and 10 with an exponent, and engineering does the same with
+# exponents that are a multiple of 3.
+FIXED = "fixed"
+SCIENTIFIC = "sci"
+ENGINEERING = "eng"
+MODES = (FIXED, SCIENTIFIC, ENGINEERING)
+
+# Smallest exponent that fixed mode shows without an exponent, so 0.00001
+# is shown as it is but 0.000001 is shown as 1e-6
+MIN_FIXED_EXPONENT = -5
+
+
+class ResultFormatter:
+  '''
+  Formats calculator results to a bounded number of significant digits, so
+  the length of a result doesn't depend on its magnitude
+  '''
+  def __init__(self, mode=FIXED, digits=15):
+    '''Initialize the formatter with a mode and a significant digit budget'''
+    if mode not in MODES:
+      raise ValueError(f'Unknown format mode "{mode}"')
+    if digits < 1:
+      raise ValueError('At least one significant digit is needed')
+    self.mode = mode
+    self.digits = digits
+    # Largest int that can be shown exactly within the digit budget
+    self.max_exact_int = 10 ** digits
+
+
+  def format(self, value):
+    '''Format a number, raising ValueError if it is infinite or NaN'''
+    if self.mode == FIXED:
+      # Fast path for ints that fit in the digit budget
+      if type(value) is int:
+        if -self.max_exact_int < value < self.max_exact_int:
+          return str(value)
+      # Fast path for floats whose shortest round trip representation
+      # fits in the digit budget
+      elif type(value) is float:
+        text = repr(value)
+        if "e" not in text and "n" not in text:
+          if text.endswith(".0"):
+            text = text[:-2]
+          significant = text.lstrip("-").replace(".", "").lstrip("0")
+          if len(significant) <= self.digits and text != "-0":
+            return text
+    return self.render(*self.decompose(value))
+
+
+  def decompose(self, value):
+    '''
+    Round a number to the digit budget, returning its sign, its significant
+    digits (without trailing zeros) and the exponent of its first digit
+    '''
+    if isinstance(value, float):
+      if not math.isfinite(value):
+        raise ValueError(f'Can\'t format {value}')
+      text = '%.*e' % (self.digits - 1, value)
+    else:
+      # Ints (which could be too big for a float) and Decimals are rounded
+      # by Decimal, and anything else is converted to a Decimal first.
+      # Fractions are divided out with a couple of guard digits.
+      if isinstance(value, fractions.Fraction):
+        context = decimal.Context(prec=self.digits + 2)
+        value = context.divide(decimal.Decimal(value.numerator), value.denominator)
+      elif not isinstance(value, decimal.Decimal):
+        value = decimal.Decimal(value)
+      if not value.is_finite():
+        raise ValueError(f'Can\'t format {value}')
+      text = format(value, f'.{self.digits - 1}e')
+    mantissa, exponent = text.split("e")
+    negative = mantissa.startswith("-")
+    digits = mantissa.lstrip("-").replace(".", "").rstrip("0")
+    # Zero has no significant digits
+    if not digits:
+      return False, "0", 0
+    return negative, digits, int(exponent)
+
+
+  def render(self, negative, digits, exponent):
+    '''Render the sign, significant digits and exponent from decompose as a string'''
+    sign = "-" if negative else ""
+    if self.mode == FIXED:
+      if MIN_FIXED_EXPONENT <= exponent < self.digits:
+        return sign + self.place_point(digits, exponent)
+      shift = exponent
+    elif self.mode == SCIENTIFIC:
+      shift = exponent
+    else:
+      shift = exponent - exponent % 3
+    # Numbers that don't need an exponent are shown without one
+    if shift == 0:
+      return sign + self.place_point(digits, exponent)
+    return f'{sign}{self.place_point(digits, exponent - shift)}e{shift}'
+
+
+  def place_point(self, digits, exponent):
+    '''Place the decimal point in a string of digits, where exponent is that of the first digit'''
+    if exponent < 0:
+      return "0." + "0" * (-exponent - 1) + digits
+    if exponent + 1 >= len(digits):
+      return digits + "0" * (exponent + 1 - len(digits))
+    return digits[:exponent + 1] + "." + digits[exponent + 1:]
+
+
+# Formatter used for calculator results, unless another one is given
+default_formatter = ResultFormatter()
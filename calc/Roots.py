@@ -0,0 +1,307 @@
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from calc.ExprEngine import ExprError, run
+from calc.LRUCache import LRUCache
+from calc.Plot import power_of_two_step
+from calc.Scientific import compile_scientific, variable_names
+from calc.Sweep import map_program, numpy, run_lists
+
+# An interval is scanned at about this many evenly spaced points for sign changes
+SCAN_POINTS = 1000
+# Scan points are evaluated and cached in blocks of this many
+BLOCK_SIZE = 256
+# Most blocks of scan points, and refined brackets, of an equation that are cached
+CACHE_SIZE = 1 << 12
+# Most iterations of Brent's method for one root, which converges in far
+# fewer for any bracket that holds a root
+MAX_ITERATIONS = 200
+# A refined root is only kept if the function there is at most this
+# fraction of its size at the ends of the bracket. At a true root it falls
+# to rounding error, while at a pole or jump it stays as large or grows.
+ROOT_TOLERANCE = 1e-6
+# Brackets are refined in parallel, when asked to, if there are at least this many
+PARALLEL_MIN_BRACKETS = 64
+
+MISSING = object()
+
+
+def parse_equation(text):
+  '''
+  Return the expression whose roots solve an equation, which is either an
+  expression equal to zero or "left = right"
+  '''
+  left, equals, right = text.partition("=")
+  if not equals:
+    return text
+  if "=" in right:
+    raise ExprError("An equation can only have one \"=\"")
+  if not left.strip() or not right.strip():
+    raise ExprError("Both sides of an equation need an expression")
+  return f'({left})-({right})'
+
+
+def unknown(expression):
+  '''Return the name of the one unknown an expression has, raising ExprError if it has none or several'''
+  names = variable_names(expression)
+  if len(names) != 1:
+    raise ExprError("The equation should have exactly one unknown, like x" if not names
+                    else f'The equation has more than one unknown: {", ".join(sorted(names))}')
+  return names.pop()
+
+
+def brent(f, a, b, fa, fb, tolerance=0.0):
+  '''
+  Find a root of f between a and b, where fa and fb have opposite signs,
+  by Brent's method, which takes inverse quadratic interpolation or secant
+  steps while they converge, and falls back to bisection when they don't.
+  Returns (root, iterations).
+  '''
+  if abs(fa) < abs(fb):
+    a, b, fa, fb = b, a, fb, fa
+  c, fc = a, fa
+  d = e = b - a
+  for iteration in range(1, MAX_ITERATIONS + 1):
+    if fb == 0:
+      return b, iteration
+    if (fb > 0) == (fc > 0):
+      # The root is between a and b, so c starts again from a
+      c, fc = a, fa
+      d = e = b - a
+    if abs(fc) < abs(fb):
+      a, b, c = b, c, b
+      fa, fb, fc = fb, fc, fb
+    tol = 2 * 2.220446049250313e-16 * abs(b) + 0.5 * tolerance
+    middle = 0.5 * (c - b)
+    if abs(middle) <= tol:
+      return b, iteration
+    if abs(e) >= tol and abs(fa) > abs(fb):
+      s = fb / fa
+      if a == c:
+        # Secant step
+        p = 2 * middle * s
+        q = 1 - s
+      else:
+        # Inverse quadratic interpolation step
+        q = fa / fc
+        r = fb / fc
+        p = s * (2 * middle * q * (q - r) - (b - a) * (r - 1))
+        q = (q - 1) * (r - 1) * (s - 1)
+      if p > 0:
+        q = -q
+      p = abs(p)
+      if 2 * p < min(3 * middle * q - abs(tol * q), abs(e * q)):
+        e, d = d, p / q
+      else:
+        d = e = middle
+    else:
+      d = e = middle
+    a, fa = b, fb
+    b += d if abs(d) > tol else math.copysign(tol, middle)
+    fb = f(b)
+  return b, MAX_ITERATIONS
+
+
+class Equation:
+  '''
+  An expression in one unknown whose roots are found by scanning for sign
+  changes and refining each bracket, caching its samples and refined
+  brackets. Samples are taken on a grid of power of two steps, which
+  stays the same when the interval is moved or resized a little, so
+  solving again after a small edit of the interval reuses most of them.
+  '''
+  def __init__(self, text):
+    '''Compile an equation, raising ExprError if it is invalid'''
+    self.text = text
+    self.expression = parse_equation(text)
+    self.name = unknown(self.expression)
+    self.program = compile_scientific(self.expression, literal=float, variables=(self.name,))
+    self.mapped = map_program(self.program)
+    # Values of blocks of scan points (None where it isn't defined or
+    # finite) by (step, block number), and the root refined in each bracket
+    # (None if it was a pole) by its ends
+    self.blocks = LRUCache(CACHE_SIZE)
+    self.roots = LRUCache(CACHE_SIZE)
+    # Number of times the function has been evaluated
+    self.evaluations = 0
+
+
+  def __call__(self, x):
+    '''Return the function at x, or NaN where it isn't defined'''
+    self.evaluations += 1
+    try:
+      return float(run(self.program, { self.name: x }))
+    except ArithmeticError:
+      return math.nan
+
+
+  def evaluate_many(self, xs):
+    '''Return the function at each of xs, evaluated in one vectorized batch, or None where it isn't finite'''
+    self.evaluations += len(xs)
+    values = evaluate_many(self.program, self.mapped, self.name, xs)
+    return [None if y is None or not math.isfinite(y) else y for y in values]
+
+
+  def scan(self, step, first, last):
+    '''
+    Return the function at the multiples first to last of step. They are
+    evaluated and cached BLOCK_SIZE at a time, so scanning an interval
+    again after moving it a little only evaluates the new blocks.
+    '''
+    ys = []
+    for block in range(first // BLOCK_SIZE, last // BLOCK_SIZE + 1):
+      values = self.blocks.get((step, block))
+      if values is None:
+        values = self.evaluate_many([k * step for k in range(block * BLOCK_SIZE,
+                                                             (block + 1) * BLOCK_SIZE)])
+        self.blocks.put((step, block), values)
+      ys += values
+    offset = first - first // BLOCK_SIZE * BLOCK_SIZE
+    return ys[offset:offset + last - first + 1]
+
+
+  def brackets(self, start, stop, scan_points=SCAN_POINTS):
+    '''
+    Scan from start to stop for sign changes, returning (roots, brackets),
+    where roots are the xs scanned that are exact roots, and brackets are
+    (a, fa, b, fb) intervals with a sign change inside
+    '''
+    step = power_of_two_step((stop - start) / scan_points)
+    first = math.floor(start / step) + 1
+    last = math.ceil(stop / step) - 1
+    xs = [start] + [k * step for k in range(first, last + 1)] + [stop]
+    ys = self.evaluate_many([start]) + self.scan(step, first, last) + self.evaluate_many([stop])
+    roots = [x for x, y in zip(xs, ys) if y == 0]
+    brackets = [(a, fa, b, fb) for a, fa, b, fb in zip(xs, ys, xs[1:], ys[1:])
+                if fa is not None and fb is not None and (fa < 0 < fb or fb < 0 < fa)]
+    return roots, brackets
+
+
+  def refine(self, bracket):
+    '''Return the root in a bracket, or None if the sign change was a pole'''
+    return refine_bracket(self, bracket)
+
+
+def evaluate_many(program, mapped, name, xs):
+  '''Evaluate a program at each of xs at once, as an array or list, returning a list of floats or None'''
+  if numpy is not None:
+    with numpy.errstate(all="ignore"):
+      values = run(program, { name: numpy.asarray(xs, dtype=float) })
+    return numpy.broadcast_to(numpy.asarray(values, dtype=float), (len(xs),)).tolist()
+  return run_lists(program, mapped, { name: xs }, len(xs))
+
+
+def refine_bracket(function, bracket):
+  '''
+  Refine a bracket (a, fa, b, fb) of function with Brent's method,
+  returning its root, or None if the sign change is at a pole or a jump
+  (like 1/x at 0, or x%1 at 1), where the function doesn't get any
+  closer to zero as the bracket narrows
+  '''
+  a, fa, b, fb = bracket
+  root, iterations = brent(function, a, b, fa, fb)
+  if not abs(function(root)) <= ROOT_TOLERANCE * max(abs(fa), abs(fb)):
+    return None
+  return root
+
+
+# Equations compiled in a worker process, by text
+_worker_equations = LRUCache(64)
+
+
+def refine_in_worker(text, brackets):
+  '''Refine a list of brackets of an equation in a worker process, returning their roots'''
+  equation = _worker_equations.get(text)
+  if equation is None:
+    equation = Equation(text)
+    _worker_equations.put(text, equation)
+  return [refine_bracket(equation, bracket) for bracket in brackets]
+
+
+class RootSolver:
+  '''
+  Finds every real root of equations in an interval, caching the equations
+  (with their samples and refined brackets) and the results of each
+  interval solved
+  '''
+  def __init__(self, cache_size=32, workers=None):
+    '''
+    Initialize the solver, caching up to cache_size equations and results.
+    Parallel refinement uses a pool of workers processes (one per CPU if
+    None), started on first use.
+    '''
+    self.equations = LRUCache(cache_size)
+    self.results = LRUCache(cache_size)
+    self.workers = workers
+    self.executor = None
+
+
+  def equation(self, text):
+    '''Return the compiled equation for text, compiling it if needed'''
+    equation = self.equations.get(text)
+    if equation is None:
+      equation = Equation(text)
+      self.equations.put(text, equation)
+    return equation
+
+
+  def solve(self, text, start, stop, parallel=False, scan_points=SCAN_POINTS):
+    '''
+    Find the real roots of an equation between start and stop, raising
+    ExprError if it is invalid. Brackets are refined across the worker
+    processes if parallel and there are enough of them. Returns a dict of
+    the sorted roots, the unknown's name, the number of brackets (and how
+    many were cached), the number of evaluations, whether the whole
+    result was cached and the seconds taken.
+
+    Roots where the function touches zero without changing sign (like x*x
+    at 0) are only found if a scan point lands on them, and an even number
+    of roots closer together than the scan step can be missed.
+    '''
+    if not start < stop:
+      raise ValueError("The start of the interval should be less than its end")
+    key = (text, start, stop, scan_points)
+    result = self.results.get(key)
+    if result is not None:
+      return dict(result, cached=True, seconds=0.0)
+    begin = time.perf_counter()
+    equation = self.equation(text)
+    evaluations = equation.evaluations
+    roots, brackets = equation.brackets(start, stop, scan_points)
+    found = [equation.roots.get(bracket[0::2], MISSING) for bracket in brackets]
+    todo = [bracket for bracket, root in zip(brackets, found) if root is MISSING]
+    if parallel and len(todo) >= PARALLEL_MIN_BRACKETS:
+      refined = self.refine_parallel(text, todo)
+    else:
+      refined = [equation.refine(bracket) for bracket in todo]
+    for bracket, root in zip(todo, refined):
+      equation.roots.put(bracket[0::2], root)
+    refined = iter(refined)
+    found = [next(refined) if root is MISSING else root for root in found]
+    roots = sorted(roots + [root for root in found if root is not None])
+    result = { "roots": roots, "name": equation.name, "brackets": len(brackets),
+               "cached_brackets": len(brackets) - len(todo),
+               "evaluations": equation.evaluations - evaluations, "cached": False,
+               "seconds": time.perf_counter() - begin }
+    self.results.put(key, result)
+    return result
+
+
+  def refine_parallel(self, text, brackets):
+    '''Refine brackets across the worker processes, in a chunk per worker'''
+    workers = self.workers or os.cpu_count() or 1
+    if self.executor is None:
+      self.executor = ProcessPoolExecutor(workers)
+    size = math.ceil(len(brackets) / workers)
+    chunks = [brackets[i:i + size] for i in range(0, len(brackets), size)]
+    return [root for roots in self.executor.map(refine_in_worker, [text] * len(chunks), chunks)
+            for root in roots]
+
+
+  def close(self):
+    '''Shut down the worker processes'''
+    if self.executor is not None:
+      self.executor.shutdown()
+      self.executor = None
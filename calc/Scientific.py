@@ -0,0 +1,193 @@
+import math
+
+from calc.ExprEngine import (BINARY_OPS, ExprError, canonicalize, compile_expr, fold_constants,
+                             parse_number, references, run)
+from calc.LRUCache import LRUCache
+from calc.ResultFormatter import default_formatter
+
+# NumPy is optional. With it, a function applied to an array (as in a
+# vectorized sweep) uses NumPy's version on the whole array at once.
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+# Precedence of "^", which binds tighter than unary minus and implied
+# multiplication, so "-2^2" is -(2^2) and "2pi^2" is 2(pi^2)
+POWER_PREC = 5
+# Largest result of an int power, in bits, and largest int factorial, past
+# which the exact result would take too long to compute
+MAX_POWER_BITS = 1 << 20
+MAX_FACTORIAL = 10000
+# Factorials and gamma values computed, which are cached as they are the
+# slow functions, by (argument, type)
+FACTORIAL_CACHE_SIZE = 1024
+
+CONSTANTS = { "pi": math.pi, "e": math.e }
+
+
+class DomainError(ArithmeticError):
+  '''
+  Raised when a function is applied outside its domain, like sqrt(-1).
+  It is an ArithmeticError, so sweeps and plots treat it like a division
+  by zero.
+  '''
+
+
+def power(base, exponent):
+  '''Raise base to exponent, raising DomainError rather than returning a complex number'''
+  if (type(base) is int and type(exponent) is int and abs(base) > 1
+      and exponent * base.bit_length() > MAX_POWER_BITS):
+    raise OverflowError("Result is too large")
+  result = base ** exponent
+  if type(result) is complex:
+    raise DomainError("A negative number to a fractional power is not a real number")
+  return result
+
+
+_factorials = LRUCache(FACTORIAL_CACHE_SIZE)
+
+
+def factorial(n):
+  '''
+  Return n!, exactly for an int, and for a float through the gamma
+  function, so 0.5! is gamma(1.5). Results are cached.
+  '''
+  key = (n, type(n))
+  result = _factorials.get(key)
+  if result is None:
+    if type(n) is int:
+      if n < 0:
+        raise ValueError("Factorial of a negative int")
+      if n > MAX_FACTORIAL:
+        raise OverflowError("Result is too large")
+      result = math.factorial(n)
+    elif n.is_integer() and n >= 0:
+      # Whole floats use the exact factorial, which gamma only matches up to
+      # about 23!, and past 170! the result overflows a float anyway
+      if n > 170:
+        raise OverflowError("Result is too large")
+      result = float(math.factorial(int(n)))
+    else:
+      result = math.gamma(n + 1)
+    _factorials.put(key, result)
+  return result
+
+
+def gamma(x):
+  '''Return the gamma function at x, which is (x-1)!'''
+  return factorial(x - 1)
+
+
+def array_function(scalar):
+  '''Return a function that applies scalar to each element of an array, giving NaN where it raises'''
+  def safe(x):
+    try:
+      return scalar(float(x))
+    except (ArithmeticError, ValueError):
+      return math.nan
+  each = numpy.frompyfunc(safe, 1, 1)
+  return lambda x: each(x).astype(float)
+
+
+def vectorized(name, scalar, array=None):
+  '''
+  Return a function named name that applies scalar to a number, raising
+  DomainError outside its domain, or array (a NumPy function, or scalar
+  applied to each element if None) to an array
+  '''
+  if numpy is not None:
+    array = array_function(scalar) if array is None else getattr(numpy, array)
+  def apply(x):
+    if numpy is not None and type(x) is numpy.ndarray:
+      return array(x)
+    try:
+      return scalar(x)
+    except ValueError:
+      raise DomainError(f'{name} is undefined at {x:.10g}') from None
+  apply.__name__ = name
+  return apply
+
+
+# Functions, by name, with their NumPy versions. Angles are in radians.
+FUNCTIONS = { name: vectorized(name, scalar, array) for name, scalar, array in [
+  ("sin", math.sin, "sin"), ("cos", math.cos, "cos"), ("tan", math.tan, "tan"),
+  ("asin", math.asin, "arcsin"), ("acos", math.acos, "arccos"), ("atan", math.atan, "arctan"),
+  ("sinh", math.sinh, "sinh"), ("cosh", math.cosh, "cosh"), ("tanh", math.tanh, "tanh"),
+  ("exp", math.exp, "exp"), ("ln", math.log, "log"), ("log", math.log10, "log10"),
+  ("log2", math.log2, "log2"), ("sqrt", math.sqrt, "sqrt"), ("abs", abs, "abs"),
+  ("gamma", gamma, None), ("fact", factorial, None)] }
+SCIENTIFIC_OPS = dict(BINARY_OPS, **{ "^": (POWER_PREC, power) })
+POSTFIX_OPS = { "!": FUNCTIONS["fact"] }
+
+
+def constant(name):
+  '''Return the value of a named constant, raising ExprError if there is none'''
+  value = CONSTANTS.get(name)
+  if value is None:
+    raise ExprError(f'Unknown name "{name}"')
+  return value
+
+
+def variable_names(expression):
+  '''Return the set of names an expression refers to that aren't functions or constants'''
+  return { name for name in references(expression) if name not in FUNCTIONS and name not in CONSTANTS }
+
+
+def compile_scientific(expression, literal=parse_number, variables=()):
+  '''
+  Compile an expression with functions, powers, factorials and constants
+  into a program, raising ExprError if it is invalid. Every operation on
+  constants, like "sqrt(2)/2" in "sqrt(2)/2*sin(x)", is folded into one
+  number as it is compiled, so running the program again for other values
+  of the variables only does the operations that depend on them.
+  '''
+  return fold_constants(compile_expr(expression, literal, SCIENTIFIC_OPS, variables=variables,
+                                     constants=constant, functions=FUNCTIONS,
+                                     postfix_ops=POSTFIX_OPS, right_assoc=("^",)))
+
+
+class ScientificEngine:
+  '''
+  Evaluates scientific expressions, caching each compiled program by its
+  canonical form and the names of its variables
+  '''
+  def __init__(self, cache_size=256):
+    '''Initialize the engine with a program cache of cache_size entries'''
+    self.programs = LRUCache(cache_size)
+
+
+  def compile(self, expression, variables=()):
+    '''Return the program for an expression in variables, compiling it if needed'''
+    key = (canonicalize(expression), tuple(variables))
+    program = self.programs.get(key)
+    if program is None:
+      program = compile_scientific(key[0], variables=key[1])
+      self.programs.put(key, program)
+    return program
+
+
+  def evaluate(self, expression, variables=None):
+    '''
+    Evaluate an expression, with variables mapping the name of each
+    variable to its value, which can be a NumPy array to evaluate it at
+    many values at once
+    '''
+    variables = variables or {}
+    return run(self.compile(expression, variables), variables)
+
+
+  @property
+  def stats(self):
+    '''The counters of the program cache'''
+    return self.programs.stats
+
+
+def solve_scientific(expression, engine, formatter=default_formatter):
+  '''Solve a scientific expression, returning the formatted result, or the error that stopped it'''
+  try:
+    return formatter.format(engine.evaluate(expression))
+  except ZeroDivisionError:
+    return "Error: Division by zero"
+  except (ExprError, ArithmeticError, ValueError) as error:
+    return f'Error: {error}'
@@ -0,0 +1,364 @@
+import asyncio
+import json
+import os
+import stat
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from calc.BatchEval import solve_line
+from calc.Metrics import metrics
+
+# Lines at least this long are solved in a worker process rather than on
+# the event loop, since a long expression (or one with huge numbers) can
+# take long enough to stall every other connection
+HEAVY_LENGTH = 1000
+# Most requests a connection can have read but not yet answered. Once
+# this many are waiting, the connection isn't read until some are answered,
+# so a client that doesn't read its answers can't grow the queue forever.
+MAX_PENDING = 4096
+# Longest line that is read, longer lines are answered with NaN
+MAX_LINE_LENGTH = 1 << 20
+# Bytes read from a connection at a time
+READ_SIZE = 1 << 16
+# A line starting with this is a command rather than an expression
+COMMAND_PREFIX = "#"
+
+
+class ConnectionStats:
+  '''Counters of one connection, for its throughput and queue depth'''
+  def __init__(self, peer):
+    '''Initialize the counters of a connection from peer'''
+    self.peer = peer
+    self.started = time.perf_counter()
+    self.requests = 0
+    # Requests solved in a worker process
+    self.offloaded = 0
+    # Requests read but not yet answered, and the most there have been
+    self.pending = 0
+    self.max_pending = 0
+
+
+  def summary(self):
+    '''The connection's counters and its rate of requests, as a dict'''
+    elapsed = time.perf_counter() - self.started
+    return { "peer": self.peer, "requests": self.requests, "offloaded": self.offloaded,
+             "pending": self.pending, "max_pending": self.max_pending,
+             "seconds": elapsed, "requests_per_second": self.requests / elapsed if elapsed else 0.0 }
+
+
+class EvalServer:
+  '''
+  Serves the calculator's solve over a Unix socket or localhost TCP. Each
+  line a client sends is an expression, and each is answered with a line
+  holding its total as the calculator would display it, or NaN, in the
+  order they were sent. Clients can send many lines without waiting for
+  the answers, and lines that arrive together are solved together.
+
+  A line starting with "#" is a command: "#stats" is answered with the
+  server's and the connection's counters as a line of JSON.
+  '''
+  def __init__(self, workers=None, heavy_length=HEAVY_LENGTH, log=None):
+    '''
+    Initialize the server, solving lines of at least heavy_length chars in
+    a pool of workers processes (one per CPU if None), started on first
+    use. Connections closing are reported by calling log with a line of
+    text, if it is given.
+    '''
+    self.workers = workers
+    self.heavy_length = heavy_length
+    self.log = log
+    self.executor = None
+    self.server = None
+    # Stats of the open connections, and totals of the closed ones
+    self.connections = set()
+    self.closed = 0
+    self.closed_requests = 0
+
+
+  async def start_unix(self, path):
+    '''
+    Start serving on a Unix socket at path, replacing any stale socket file
+    there. Anything else at path is left alone, and FileExistsError raised.
+    '''
+    try:
+      mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+      pass
+    else:
+      if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f'{path} already exists and isn\'t a socket')
+      os.unlink(path)
+    self.server = await asyncio.start_unix_server(self.handle, path, limit=READ_SIZE)
+    return self.server
+
+
+  async def start_tcp(self, host="127.0.0.1", port=0):
+    '''Start serving on host and port, where port 0 picks a free one, see address'''
+    self.server = await asyncio.start_server(self.handle, host, port, limit=READ_SIZE)
+    return self.server
+
+
+  @property
+  def address(self):
+    '''The address the server is listening on, a path or a (host, port) tuple'''
+    return self.server.sockets[0].getsockname()
+
+
+  async def close(self):
+    '''Stop serving and shut down the worker processes'''
+    if self.server is not None:
+      self.server.close()
+      await self.server.wait_closed()
+    if self.executor is not None:
+      self.executor.shutdown(cancel_futures=True)
+      self.executor = None
+
+
+  def stats(self, connection=None):
+    '''The server's counters, and those of connection if it is given, as a dict'''
+    requests = self.closed_requests + sum(stats.requests for stats in self.connections)
+    result = { "connections": len(self.connections), "closed": self.closed, "requests": requests,
+               "pending": sum(stats.pending for stats in self.connections) }
+    if connection is not None:
+      result["connection"] = connection.summary()
+    return result
+
+
+  def offload(self, line):
+    '''Start solving a line in a worker process, returning an asyncio future of its answer'''
+    if self.executor is None:
+      self.executor = ProcessPoolExecutor(self.workers or os.cpu_count() or 1)
+    return asyncio.get_running_loop().run_in_executor(self.executor, solve_line, line)
+
+
+  def answer(self, line, stats):
+    '''
+    Return the answer to a line, as a string for one solved here or a
+    future for one solved in a worker process
+    '''
+    if line.startswith(COMMAND_PREFIX):
+      if line.strip() == "#stats":
+        return json.dumps(self.stats(stats))
+      return "Error: Unknown command"
+    if len(line) >= self.heavy_length:
+      stats.offloaded += 1
+      return self.offload(line)
+    return solve_line(line)
+
+
+  async def handle(self, reader, writer):
+    '''Serve one connection until the client closes it'''
+    stats = ConnectionStats(writer.get_extra_info("peername") or "unix")
+    self.connections.add(stats)
+    # Answers in the order the lines came in, as (text, count) for lines
+    # solved here, where text has the answers to count lines, or as
+    # (future, 1) for a line solved in a worker process
+    answers = asyncio.Queue()
+    # Set whenever there is room for more pending requests
+    room = asyncio.Event()
+    room.set()
+    sender = asyncio.create_task(self.send(writer, answers, stats, room))
+    try:
+      await self.receive(reader, answers, stats, room)
+    except (ConnectionError, asyncio.CancelledError):
+      pass
+    finally:
+      await answers.put(None)
+      try:
+        await sender
+      except (ConnectionError, asyncio.CancelledError):
+        # Cancelled along with this task when the server is shut down
+        pass
+      writer.close()
+      self.connections.discard(stats)
+      self.closed += 1
+      self.closed_requests += stats.requests
+      if self.log is not None:
+        summary = stats.summary()
+        self.log(f'{stats.peer}: {summary["requests"]} requests in {summary["seconds"]:.3f}s'
+                 f' ({summary["requests_per_second"]:,.0f} requests/s),'
+                 f' at most {summary["max_pending"]} pending')
+
+
+  async def receive(self, reader, answers, stats, room):
+    '''Read lines from a connection until it closes, queueing their answers'''
+    buffer = b""
+    # Whether the rest of a line that was too long is being skipped
+    skipping = False
+    while True:
+      await room.wait()
+      data = await reader.read(READ_SIZE)
+      if not data:
+        break
+      lines = (buffer + data).split(b"\n")
+      buffer = lines.pop()
+      if skipping:
+        if not lines:
+          buffer = b""
+          continue
+        # The first line is the end of the one that was too long
+        del lines[0]
+        skipping = False
+      if len(buffer) > MAX_LINE_LENGTH:
+        buffer = b""
+        lines.append(None)
+        skipping = True
+      if lines:
+        self.queue_answers(lines, answers, stats, room)
+    # A last line without a newline is still answered
+    if buffer and not skipping:
+      self.queue_answers([buffer], answers, stats, room)
+
+
+  def queue_answers(self, lines, answers, stats, room):
+    '''Answer a batch of lines (None for a line that was too long), queueing the answers in order'''
+    start = time.perf_counter_ns()
+    stats.requests += len(lines)
+    stats.pending += len(lines)
+    stats.max_pending = max(stats.max_pending, stats.pending)
+    texts = []
+    for line in lines:
+      if line is None:
+        answer = "NaN"
+      else:
+        answer = self.answer(line.decode("utf-8", "replace"), stats)
+      if isinstance(answer, str):
+        texts.append(answer)
+        continue
+      if texts:
+        answers.put_nowait(("\n".join(texts) + "\n", len(texts)))
+        texts = []
+      answers.put_nowait((answer, 1))
+    if texts:
+      answers.put_nowait(("\n".join(texts) + "\n", len(texts)))
+    if stats.pending >= MAX_PENDING:
+      room.clear()
+    metrics.record("server.batch", time.perf_counter_ns() - start)
+    metrics.record("server.pending", stats.pending, "requests")
+
+
+  async def send(self, writer, answers, stats, room):
+    '''Write the queued answers to a connection in order, until None is queued'''
+    while True:
+      item = await answers.get()
+      if item is None:
+        break
+      answer, count = item
+      if not isinstance(answer, str):
+        try:
+          answer = await answer + "\n"
+        except Exception:
+          # e.g. a worker process that died
+          answer = "NaN\n"
+      writer.write(answer.encode())
+      stats.pending -= count
+      if stats.pending < MAX_PENDING:
+        room.set()
+      # Answers are flushed once the queue runs dry, rather than after each
+      # one, so a burst of answers goes out in a few large writes
+      if answers.empty():
+        await writer.drain()
+
+
+async def open_connection(address):
+  '''Open a connection to a server at address, a Unix socket path or a (host, port) tuple'''
+  if isinstance(address, str):
+    return await asyncio.open_unix_connection(address, limit=MAX_LINE_LENGTH)
+  return await asyncio.open_connection(*address, limit=MAX_LINE_LENGTH)
+
+
+async def load_connection(address, expressions, requests, window):
+  '''
+  Send requests expressions over one connection, cycling through them,
+  with up to window unanswered at a time. Returns the answers' latencies
+  in seconds.
+  '''
+  reader, writer = await open_connection(address)
+  sent = []
+  latencies = []
+  room = asyncio.Semaphore(window)
+
+  async def send():
+    for i in range(requests):
+      await room.acquire()
+      sent.append(time.perf_counter())
+      writer.write(expressions[i % len(expressions)].encode() + b"\n")
+      if i % 64 == 63:
+        await writer.drain()
+    await writer.drain()
+
+  sender = asyncio.create_task(send())
+  for i in range(requests):
+    line = await reader.readline()
+    if not line:
+      raise ConnectionError("The server closed the connection")
+    latencies.append(time.perf_counter() - sent[i])
+    room.release()
+  await sender
+  writer.close()
+  return latencies
+
+
+async def load_test(address, expressions, requests=100000, connections=4, window=256):
+  '''
+  Measure a server's throughput with requests spread over connections
+  clients, each with up to window requests unanswered. Returns a dict of
+  the number of requests, the seconds taken, the requests per second and
+  the median and 99th percentile latencies in seconds.
+  '''
+  per_connection = requests // connections
+  start = time.perf_counter()
+  results = await asyncio.gather(*(load_connection(address, expressions, per_connection, window)
+                                   for i in range(connections)))
+  elapsed = time.perf_counter() - start
+  latencies = sorted(latency for result in results for latency in result)
+  count = len(latencies)
+  return { "requests": count, "seconds": elapsed,
+           "requests_per_second": count / elapsed if elapsed else 0.0,
+           "latency_p50": latencies[count // 2] if count else 0.0,
+           "latency_p99": latencies[min(count - 1, count * 99 // 100)] if count else 0.0 }
+
+
+def parse_address(socket_path=None, port=None, host="127.0.0.1"):
+  '''Return the address to serve on or connect to, a Unix socket path or a (host, port) tuple'''
+  if socket_path is not None:
+    return socket_path
+  return (host, port)
+
+
+async def serve(address, workers=None):
+  '''Serve on address until cancelled, reporting each closed connection on stderr'''
+  server = EvalServer(workers, log=lambda line: print(line, file=sys.stderr))
+  if isinstance(address, str):
+    await server.start_unix(address)
+  else:
+    await server.start_tcp(*address)
+  print(f'Serving on {server.address}', file=sys.stderr)
+  try:
+    await asyncio.Event().wait()
+  finally:
+    await server.close()
+
+
+def main_serve(address, workers=None):
+  '''Run the server until interrupted'''
+  try:
+    asyncio.run(serve(address, workers))
+  except KeyboardInterrupt:
+    pass
+  except OSError as error:
+    print(f'Error: {error}', file=sys.stderr)
+    return 1
+  return 0
+
+
+def main_load(address, requests, connections, window):
+  '''Run a load test against a running server, and print its results'''
+  expressions = ["3+4*2", "-12.5/4%3", "1/3", "2/0", "123456789*987654321", "7%4+-2"]
+  result = asyncio.run(load_test(address, expressions, requests, connections, window))
+  print(f'{result["requests"]} requests in {result["seconds"]:.3f}s'
+        f' ({result["requests_per_second"]:,.0f} requests/s), latency p50'
+        f' {result["latency_p50"] * 1000:.2f}ms, p99 {result["latency_p99"] * 1000:.2f}ms',
+        file=sys.stderr)
+  return 0
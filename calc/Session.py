@@ -0,0 +1,285 @@
+import io
+import os
+import random
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from calc.CalcCore import CalcCore, solve_expression
+
+# A session log starts with a header of the magic bytes, the format version
+# and the time the session started (in seconds since the epoch). Each event
+# is then a record of its kind, the microseconds since the previous event
+# and its text (up to 255 bytes of UTF-8), and the log ends with a trailer
+# holding the calculator's display after the last event.
+MAGIC = b"ECSN"
+VERSION = 1
+HEADER = struct.Struct("<4sBd")
+RECORD = struct.Struct("<BIB")
+TRAILER = struct.Struct("<BII")
+# Kinds of record. A button is an argument of BasicCalc.but_press, and a
+# key is the char of a BasicCalc.key_press event.
+BUTTON = 0
+KEY = 1
+END = 255
+# Longest delay a record can hold, in microseconds (about 71 minutes)
+MAX_DELAY = 2 ** 32 - 1
+
+# Buttons and keys that random sessions are made of, with digits and
+# operators more likely than the rest
+RANDOM_BUTTONS = list(range(10)) * 3 + ["+", "-", "*", "/", "%", ".", "+/-", "=", "AC"]
+RANDOM_KEYS = list("0123456789") * 3 + list("+-*/%.=") + ["x", ""]
+
+
+class SessionError(ValueError):
+  '''Raised when a session log is invalid or truncated'''
+
+
+class SessionRecorder:
+  '''Writes the button presses and key presses of a session to a binary log'''
+  def __init__(self, outfile, clock=time.monotonic):
+    '''Start recording to outfile, a path or a binary file object'''
+    if isinstance(outfile, (str, os.PathLike)):
+      outfile = open(outfile, "wb")
+    self.outfile = outfile
+    self.clock = clock
+    self.last = clock()
+    self.outfile.write(HEADER.pack(MAGIC, VERSION, time.time()))
+
+
+  def record(self, kind, text, delay=None):
+    '''
+    Record an event of kind, with the time since the last one, or the given
+    delay in seconds
+    '''
+    now = self.clock()
+    if delay is None:
+      delay = now - self.last
+    self.last = now
+    delay = min(MAX_DELAY, max(0, round(delay * 1e6)))
+    data = str(text).encode()
+    if len(data) > 255:
+      raise SessionError(f'Event text is too long to record: "{text}"')
+    self.outfile.write(RECORD.pack(kind, delay, len(data)) + data)
+
+
+  def button(self, button):
+    '''Record a calculator button press'''
+    self.record(BUTTON, button)
+
+
+  def key(self, char):
+    '''Record a keyboard key press'''
+    self.record(KEY, char)
+
+
+  def finish(self, display=""):
+    '''Write the trailer with the calculator's final display, ending the log'''
+    data = display.encode()
+    self.outfile.write(TRAILER.pack(END, 0, len(data)) + data)
+    self.outfile.flush()
+
+
+  def close(self, display=""):
+    '''Finish the log with the calculator's final display, and close it'''
+    self.finish(display)
+    self.outfile.close()
+
+
+def read_text(data, position, length):
+  '''Return the text of length bytes at position of a log, raising SessionError if it is cut short or invalid'''
+  if position + length > len(data):
+    raise SessionError("Truncated session log")
+  try:
+    return data[position:position + length].decode()
+  except UnicodeDecodeError:
+    raise SessionError("Session log has text that isn't UTF-8") from None
+
+
+def read_session(infile):
+  '''
+  Read a session log from infile, a path or a binary file object. Returns
+  (events, display), where events is a list of (delay in seconds, kind,
+  value) tuples, and display is the final display, or None if the log has
+  no trailer (e.g. the app was killed while recording).
+  '''
+  if isinstance(infile, (str, os.PathLike)):
+    with open(infile, "rb") as opened:
+      return read_session(opened)
+  data = infile.read()
+  if len(data) < HEADER.size or HEADER.unpack_from(data)[:2] != (MAGIC, VERSION):
+    raise SessionError("Not a session log")
+  events = []
+  position = HEADER.size
+  while position < len(data):
+    if position + RECORD.size > len(data):
+      raise SessionError("Truncated session log")
+    kind, delay, length = RECORD.unpack_from(data, position)
+    if kind == END:
+      if position + TRAILER.size > len(data):
+        raise SessionError("Truncated session log")
+      kind, delay, length = TRAILER.unpack_from(data, position)
+      position += TRAILER.size
+      return events, read_text(data, position, length)
+    position += RECORD.size
+    text = read_text(data, position, length)
+    position += length
+    # Digit buttons are ints, as the GUI passes them to but_press
+    value = int(text) if kind == BUTTON and text.isdigit() else text
+    events.append((delay / 1e6, kind, value))
+  return events, None
+
+
+def apply_event(core, kind, value):
+  '''Apply a recorded event to a CalcCore, the same way BasicCalc does'''
+  if kind == BUTTON:
+    core.press(value)
+  else:
+    core.key(value)
+
+
+def replay(events, core=None, realtime=False, check=None, sleep=time.sleep, clock=time.monotonic):
+  '''
+  Feed events from read_session through a calculator core (a new one if
+  None), and return the core. With realtime, events are spaced out by
+  their recorded delays, otherwise they are fed as fast as possible. check
+  is called with the core and the event's index after each event.
+  '''
+  core = CalcCore() if core is None else core
+  due = clock()
+  for index, (delay, kind, value) in enumerate(events):
+    if realtime:
+      due += delay
+      wait = due - clock()
+      if wait > 0:
+        sleep(wait)
+    apply_event(core, kind, value)
+    if check is not None:
+      check(core, index)
+  return core
+
+
+def random_session(seed, length):
+  '''Build a random session of length events, as read_session returns them'''
+  rand = random.Random(seed)
+  events = []
+  for i in range(length):
+    delay = rand.randint(0, 300000) / 1e6
+    if rand.random() < 0.5:
+      events.append((delay, BUTTON, rand.choice(RANDOM_BUTTONS)))
+    else:
+      events.append((delay, KEY, rand.choice(RANDOM_KEYS)))
+  return events
+
+
+def encode_session(events, display):
+  '''Record events (with their delays) and a final display as a session log, returned as bytes'''
+  outfile = io.BytesIO()
+  recorder = SessionRecorder(outfile)
+  for delay, kind, value in events:
+    recorder.record(kind, value, delay)
+  recorder.finish(display)
+  return outfile.getvalue()
+
+
+def find_divergence(core, index):
+  '''
+  Raise AssertionError if the core's state has diverged, i.e. its running
+  preview doesn't match solving its expression, or parsing its expression
+  from scratch gives a different expression or preview
+  '''
+  expression = core.expression
+  # An expression ending in an operator previews the part before it
+  expected = (solve_expression(expression.rstrip("+-*/%"), core.engine, core.formatter)
+              if core.head else None)
+  if core.preview != (expected or ""):
+    raise AssertionError(f'event {index}: preview "{core.preview}" of "{expression}"'
+                         f' should be "{expected or ""}"')
+  parsed = CalcCore(core.engine, core.formatter)
+  parsed.expression = expression
+  if parsed.expression != expression or parsed.preview != core.preview:
+    raise AssertionError(f'event {index}: "{expression}" parses as "{parsed.expression}"'
+                         f' with preview "{parsed.preview}"')
+
+
+def check_sessions(seeds, length):
+  '''
+  Generate, record, read back and replay a random session for each seed,
+  checking for divergence after every event. Returns (events replayed,
+  seconds spent replaying without checks, divergences), where divergences
+  is a list of (seed, description) tuples.
+  '''
+  count = 0
+  replay_time = 0.0
+  divergences = []
+  for seed in seeds:
+    events = random_session(seed, length)
+    try:
+      # The session is replayed as fast as possible, and timed, then
+      # recorded with its final display and replayed again with checks
+      start = time.perf_counter()
+      display = replay(events).display
+      replay_time += time.perf_counter() - start
+      count += len(events)
+      read_events, read_display = read_session(io.BytesIO(encode_session(events, display)))
+      if read_events != [(round(delay * 1e6) / 1e6, kind, value) for delay, kind, value in events]:
+        raise AssertionError("events changed by recording them")
+      core = replay(read_events, check=find_divergence)
+      if core.display != read_display:
+        raise AssertionError(f'final display "{core.display}" should be "{read_display}"')
+    except Exception as error:
+      divergences.append((seed, f'{type(error).__name__}: {error}'))
+  return count, replay_time, divergences
+
+
+def run_sessions(count, length=50, workers=None, seed=0, chunk_size=100):
+  '''
+  Check count random sessions of length events (see check_sessions) across
+  a pool of worker processes, or in this process if workers is 1. Returns
+  (events replayed, seconds spent replaying, divergences).
+  '''
+  chunks = [range(start, min(start + chunk_size, seed + count))
+            for start in range(seed, seed + count, chunk_size)]
+  if workers == 1:
+    results = [check_sessions(chunk, length) for chunk in chunks]
+  else:
+    with ProcessPoolExecutor(workers) as executor:
+      results = list(executor.map(check_sessions, chunks, [length] * len(chunks)))
+  events = sum(result[0] for result in results)
+  replay_time = sum(result[1] for result in results)
+  divergences = [divergence for result in results for divergence in result[2]]
+  return events, replay_time, divergences
+
+
+def main_replay(path, realtime=False):
+  '''Replay a session log, printing the final display and whether it matches the recording'''
+  try:
+    events, recorded = read_session(path)
+  except (OSError, SessionError) as error:
+    print(f'Error: {error}', file=sys.stderr)
+    return 1
+  start = time.perf_counter()
+  display = replay(events, realtime=realtime).display
+  elapsed = time.perf_counter() - start
+  print(display)
+  rate = len(events) / elapsed if elapsed > 0 else 0
+  print(f'{len(events)} events in {elapsed:.3f}s ({rate:,.0f} events/s)', file=sys.stderr)
+  if recorded is not None and display != recorded:
+    print(f'Diverged: the recorded display was "{recorded}"', file=sys.stderr)
+    return 1
+  return 0
+
+
+def main_fuzz(count, length=50, workers=None, seed=0):
+  '''Check random sessions in parallel, reporting the throughput and any divergence'''
+  start = time.perf_counter()
+  events, replay_time, divergences = run_sessions(count, length, workers, seed)
+  elapsed = time.perf_counter() - start
+  rate = events / replay_time if replay_time > 0 else 0
+  print(f'{count} sessions, {events} events checked in {elapsed:.3f}s, replayed at'
+        f' {rate:,.0f} events/s per worker', file=sys.stderr)
+  for session_seed, description in divergences:
+    print(f'seed {session_seed}: {description}', file=sys.stderr)
+  print(f'{len(divergences)} diverged', file=sys.stderr)
+  return 1 if divergences else 0
@@ -0,0 +1,436 @@
+import math
+import mmap
+import os
+import re
+from collections import Counter
+
+# Bytes of a file parsed at a time, which bounds the memory an import uses
+# to one chunk and the lists of its values, whatever the file's size
+CHUNK_SIZE = 1 << 20
+# Percentiles are within this fraction of the true value
+RELATIVE_ACCURACY = 0.01
+# Most buckets each sign of a sketch keeps. With 1% accuracy, 2048 buckets
+# cover values over 18 orders of magnitude before any are collapsed.
+MAX_BUCKETS = 2048
+# Values closer to zero than this are counted as zero by a sketch
+MIN_MAGNITUDE = 1e-300
+# Percentiles shown in summaries
+PERCENTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+
+# Fields of a line, separated by commas and/or whitespace
+SEPARATOR_RE = re.compile(r'[,\s]+')
+
+
+class Accumulator:
+  '''
+  Count, mean, variance, min and max of a series, updated one value (or
+  one chunk of values) at a time in constant memory. The variance uses
+  Welford's method, keeping the sum of squared deviations from the running
+  mean, so it doesn't lose precision to cancellation the way a running sum
+  of squares does when the mean is large next to the spread.
+  '''
+  def __init__(self):
+    '''Initialize an empty accumulator'''
+    self.count = 0
+    self.mean = 0.0
+    # Sum of squared deviations from the mean
+    self.m2 = 0.0
+    self.min = math.inf
+    self.max = -math.inf
+
+
+  def add(self, value):
+    '''Add a value'''
+    self.count += 1
+    delta = value - self.mean
+    self.mean += delta / self.count
+    self.m2 += delta * (value - self.mean)
+    if value < self.min:
+      self.min = value
+    if value > self.max:
+      self.max = value
+
+
+  def add_many(self, values):
+    '''
+    Add a list of values. The chunk's own mean and squared deviations are
+    found first and then merged in (see merge), which gives the same
+    result as adding them one at a time, several times faster.
+    '''
+    count = len(values)
+    if count == 0:
+      return
+    mean = math.fsum(values) / count
+    m2 = math.fsum([(value - mean) * (value - mean) for value in values])
+    self.merge(count, mean, m2, min(values), max(values))
+
+
+  def merge(self, count, mean, m2, low, high):
+    '''Merge in the accumulated values of another series, by Chan et al.'s pairwise update'''
+    if count == 0:
+      return
+    total = self.count + count
+    delta = mean - self.mean
+    self.m2 += m2 + delta * delta * self.count * count / total
+    self.mean += delta * count / total
+    self.count = total
+    self.min = min(self.min, low)
+    self.max = max(self.max, high)
+
+
+  @property
+  def variance(self):
+    '''The sample variance, or 0 with fewer than two values'''
+    return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+
+  @property
+  def stdev(self):
+    '''The sample standard deviation'''
+    return math.sqrt(self.variance)
+
+
+class Regression:
+  '''
+  Least squares line through (x, y) pairs, updated one pair (or one chunk
+  of pairs) at a time in constant memory, with the same one-pass updates
+  as Accumulator extended to the covariance
+  '''
+  def __init__(self):
+    '''Initialize an empty regression'''
+    self.count = 0
+    self.mean_x = 0.0
+    self.mean_y = 0.0
+    # Sums of squared deviations of x and y, and of the products of their deviations
+    self.m2_x = 0.0
+    self.m2_y = 0.0
+    self.co_m2 = 0.0
+
+
+  def add(self, x, y):
+    '''Add a pair'''
+    self.count += 1
+    dx = x - self.mean_x
+    dy = y - self.mean_y
+    self.mean_x += dx / self.count
+    self.mean_y += dy / self.count
+    self.m2_x += dx * (x - self.mean_x)
+    self.m2_y += dy * (y - self.mean_y)
+    self.co_m2 += dx * (y - self.mean_y)
+
+
+  def add_many(self, xs, ys):
+    '''Add lists of the x and y of pairs, merging them in as a chunk (see Accumulator.add_many)'''
+    count = len(xs)
+    if count == 0:
+      return
+    mean_x = math.fsum(xs) / count
+    mean_y = math.fsum(ys) / count
+    dxs = [x - mean_x for x in xs]
+    dys = [y - mean_y for y in ys]
+    m2_x = math.fsum([dx * dx for dx in dxs])
+    m2_y = math.fsum([dy * dy for dy in dys])
+    co_m2 = math.fsum([dx * dy for dx, dy in zip(dxs, dys)])
+    total = self.count + count
+    dx = mean_x - self.mean_x
+    dy = mean_y - self.mean_y
+    weight = self.count * count / total
+    self.m2_x += m2_x + dx * dx * weight
+    self.m2_y += m2_y + dy * dy * weight
+    self.co_m2 += co_m2 + dx * dy * weight
+    self.mean_x += dx * count / total
+    self.mean_y += dy * count / total
+    self.count = total
+
+
+  @property
+  def slope(self):
+    '''The slope of the line, or NaN if every x is the same'''
+    return self.co_m2 / self.m2_x if self.m2_x else math.nan
+
+
+  @property
+  def intercept(self):
+    '''Where the line crosses x = 0, or NaN if every x is the same'''
+    return self.mean_y - self.slope * self.mean_x
+
+
+  @property
+  def r(self):
+    '''The correlation coefficient, or NaN if every x or every y is the same'''
+    if not (self.m2_x and self.m2_y):
+      return math.nan
+    return self.co_m2 / math.sqrt(self.m2_x * self.m2_y)
+
+
+class QuantileSketch:
+  '''
+  Bounded memory percentiles, after DDSketch. Values are counted in
+  buckets whose bounds grow geometrically, so every percentile is within
+  relative_accuracy of the true value, and the number of buckets only
+  depends on the range of magnitudes, not the number of values. If a sign
+  has more than max_buckets buckets, its smallest magnitudes are collapsed
+  into one bucket, which only loses accuracy for the percentiles nearest
+  zero.
+  '''
+  def __init__(self, relative_accuracy=RELATIVE_ACCURACY, max_buckets=MAX_BUCKETS):
+    '''Initialize an empty sketch'''
+    self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+    self.inverse_log_gamma = 1 / math.log(self.gamma)
+    self.max_buckets = max_buckets
+    # Counts by bucket key, for positive values and for the magnitudes of negative ones
+    self.positive = Counter()
+    self.negative = Counter()
+    self.zeros = 0
+    self.count = 0
+    self.min = math.inf
+    self.max = -math.inf
+
+
+  def bucket_value(self, key):
+    '''Return the magnitude a bucket stands for, which is within the relative accuracy of all of it'''
+    return 2 * self.gamma ** key / (self.gamma + 1)
+
+
+  def add(self, value):
+    '''Add a value'''
+    self.add_many([value])
+
+
+  def add_many(self, values):
+    '''Add a list of values'''
+    if not values:
+      return
+    log = math.log
+    ceil = math.ceil
+    scale = self.inverse_log_gamma
+    positive = [value for value in values if value >= MIN_MAGNITUDE]
+    negative = [-value for value in values if value <= -MIN_MAGNITUDE]
+    # A magnitude's bucket key is ceil(log_gamma(magnitude)), and counting
+    # the keys with Counter.update counts them in C
+    self.positive.update([ceil(log(value) * scale) for value in positive])
+    self.negative.update([ceil(log(value) * scale) for value in negative])
+    self.zeros += len(values) - len(positive) - len(negative)
+    self.count += len(values)
+    self.min = min(self.min, min(values))
+    self.max = max(self.max, max(values))
+    self.collapse(self.positive)
+    self.collapse(self.negative)
+
+
+  def collapse(self, buckets):
+    '''Merge the smallest magnitude buckets of a sign until it has at most max_buckets'''
+    excess = len(buckets) - self.max_buckets
+    if excess <= 0:
+      return
+    keys = sorted(buckets)
+    merged = sum(buckets.pop(key) for key in keys[:excess])
+    buckets[keys[excess]] += merged
+
+
+  def quantile(self, fraction):
+    '''Return the value the given fraction (0 to 1) of values are below, or NaN if there are none'''
+    if self.count == 0:
+      return math.nan
+    if fraction <= 0:
+      return self.min
+    if fraction >= 1:
+      return self.max
+    rank = fraction * (self.count - 1)
+    seen = 0
+    # From the most negative value up to the most positive
+    for key in sorted(self.negative, reverse=True):
+      seen += self.negative[key]
+      if seen > rank:
+        return max(self.min, -self.bucket_value(key))
+    seen += self.zeros
+    if seen > rank:
+      return 0.0
+    for key in sorted(self.positive):
+      seen += self.positive[key]
+      if seen > rank:
+        return min(self.max, self.bucket_value(key))
+    return self.max
+
+
+class Statistics:
+  '''
+  Summary statistics of a data series, updated as values are added in
+  constant memory: a Welford accumulator, a percentile sketch, and a
+  regression of the values against their x (their index if none is
+  given). Values that aren't finite are skipped and counted.
+  '''
+  def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+    '''Initialize empty statistics'''
+    self.values = Accumulator()
+    self.sketch = QuantileSketch(relative_accuracy)
+    self.regression = Regression()
+    self.skipped = 0
+
+
+  def add(self, y, x=None):
+    '''Add a value y, at x (or the next index if None)'''
+    if x is None:
+      x = float(self.values.count)
+    if not (math.isfinite(x) and math.isfinite(y)):
+      self.skipped += 1
+      return
+    self.values.add(y)
+    self.sketch.add(y)
+    self.regression.add(x, y)
+
+
+  def add_many(self, ys, xs=None):
+    '''Add a list of values ys, at the list xs (or the next indexes if None)'''
+    if xs is None:
+      xs = [float(x) for x in range(self.values.count, self.values.count + len(ys))]
+    isfinite = math.isfinite
+    if not (all(map(isfinite, ys)) and all(map(isfinite, xs))):
+      pairs = [(x, y) for x, y in zip(xs, ys) if isfinite(x) and isfinite(y)]
+      self.skipped += len(ys) - len(pairs)
+      xs = [x for x, y in pairs]
+      ys = [y for x, y in pairs]
+    self.values.add_many(ys)
+    self.sketch.add_many(ys)
+    self.regression.add_many(xs, ys)
+
+
+  def __len__(self):
+    return self.values.count
+
+
+  def summary(self):
+    '''The statistics as a dict, see PERCENTILES for the percentiles included'''
+    values = self.values
+    regression = self.regression
+    return { "count": values.count, "skipped": self.skipped, "mean": values.mean,
+             "variance": values.variance, "stdev": values.stdev,
+             "min": values.min, "max": values.max,
+             "percentiles": { fraction: self.sketch.quantile(fraction) for fraction in PERCENTILES },
+             "slope": regression.slope, "intercept": regression.intercept, "r": regression.r }
+
+
+def parse_fields(line):
+  '''Parse a line of one value, or of x and y, into (x, y) with x None if it isn't given'''
+  fields = [field for field in SEPARATOR_RE.split(line.strip()) if field]
+  if len(fields) == 1:
+    return None, float(fields[0])
+  if len(fields) == 2:
+    return float(fields[0]), float(fields[1])
+  raise ValueError("A line should have one value, or an x and a y")
+
+
+def add_text(text, statistics):
+  '''
+  Add the data typed in text to statistics, one value (or x and y) per
+  line, raising ValueError for a line that isn't one. Blank lines are
+  skipped.
+  '''
+  for number, line in enumerate(text.splitlines(), 1):
+    if line.strip():
+      try:
+        x, y = parse_fields(line)
+      except ValueError:
+        raise ValueError(f'Line {number} isn\'t a value, or an x and a y') from None
+      statistics.add(y, x)
+
+
+def add_chunk(chunk, statistics, columns):
+  '''
+  Add a chunk of whole lines of a data file to statistics, where lines
+  have columns fields, the first of which is the value if there is one,
+  or else the first two are its x and y. Returns the number of lines that
+  couldn't be parsed and were skipped.
+  '''
+  text = chunk.replace(b",", b" ")
+  lines = text.splitlines()
+  # The fast path parses the whole chunk in one go, which works when every
+  # line has exactly columns fields (so none is blank or ragged, which
+  # would shift the fields of the lines after it) and they are all numbers
+  if set(map(len, map(bytes.split, lines))) == {columns}:
+    try:
+      values = list(map(float, text.split()))
+    except ValueError:
+      pass
+    else:
+      if columns == 1:
+        statistics.add_many(values)
+      else:
+        statistics.add_many(values[1::columns], values[::columns])
+      return 0
+  # Otherwise the chunk is parsed line by line, skipping blank lines, and
+  # the lines that aren't numbers, like headers
+  xs = []
+  ys = []
+  skipped = 0
+  for line in lines:
+    fields = line.split()
+    if not fields:
+      continue
+    try:
+      if columns == 1:
+        ys.append(float(fields[0]))
+      else:
+        xs.append(float(fields[0]))
+        ys.append(float(fields[1]))
+    except (ValueError, IndexError):
+      skipped += 1
+      del xs[len(ys):]
+  statistics.add_many(ys, xs if columns > 1 else None)
+  return skipped
+
+
+def count_columns(data, limit=1000):
+  '''
+  Return the number of fields on the first line of data (bytes or a
+  memory map) with a number in it, looking at up to limit lines (1 if
+  none of them has one)
+  '''
+  start = 0
+  for i in range(limit):
+    stop = data.find(b"\n", start)
+    if stop == -1:
+      stop = len(data)
+    fields = data[start:stop].replace(b",", b" ").split()
+    try:
+      float(fields[0])
+      return len(fields)
+    except (ValueError, IndexError):
+      pass
+    if stop == len(data):
+      break
+    start = stop + 1
+  return 1
+
+
+def read_file(path, statistics, chunk_size=CHUNK_SIZE, progress=None):
+  '''
+  Add the data in a CSV or text file to statistics: one value per line,
+  or x and y as its first two fields. The file is memory mapped and parsed
+  a chunk of whole lines at a time, so a file of any size is read in
+  constant memory. Lines that aren't numbers, like headers, are skipped.
+  progress is called with (bytes read, file size) after each chunk, if it
+  is given. Returns the number of lines skipped.
+  '''
+  skipped = 0
+  with open(path, "rb") as infile:
+    size = os.fstat(infile.fileno()).st_size
+    # A zero length file can't be mapped
+    if size == 0:
+      return 0
+    with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+      columns = count_columns(data)
+      start = 0
+      while start < size:
+        stop = min(size, start + chunk_size)
+        # Chunks end after a newline, so no line is split between two
+        if stop < size:
+          newline = data.rfind(b"\n", start, stop)
+          if newline == -1:
+            newline = data.find(b"\n", stop)
+          stop = size if newline == -1 else newline + 1
+        skipped += add_chunk(data[start:stop], statistics, columns)
+        start = stop
+        if progress is not None:
+          progress(start, size)
+  return skipped
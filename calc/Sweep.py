@@ -0,0 +1,272 @@
+import itertools
+import math
+import re
+import time
+
+from calc.ExprEngine import BINARY, UNARY, run
+from calc.Scientific import compile_scientific
+
+# NumPy is optional. With it, a chunk of points is evaluated as arrays, and
+# without it as lists, which is slower but still avoids running the whole
+# program once per point.
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+# A variable binding, written as "name = values"
+BINDING_RE = re.compile(r'\s*([A-Za-z_]\w*)\s*=(.*)')
+# Most points evaluated at once, which bounds the memory a sweep uses to a
+# few arrays of this many floats per variable
+CHUNK_SIZE = 1 << 18
+
+
+def parse_values(text):
+  '''
+  Parse the values of a variable, written as "start:stop:count" for count
+  evenly spaced values from start to stop (inclusive), or as a comma
+  separated list of values
+  '''
+  text = text.strip()
+  if ":" in text:
+    parts = text.split(":")
+    if len(parts) != 3:
+      raise ValueError(f'A range is written as start:stop:count, not "{text}"')
+    start, stop, count = float(parts[0]), float(parts[1]), int(parts[2])
+    if count < 1:
+      raise ValueError(f'A range needs at least one value, not {count}')
+    if count == 1:
+      return [start]
+    # Each value is computed from the ends, so errors don't accumulate
+    return [start + (stop - start) * i / (count - 1) for i in range(count - 1)] + [stop]
+  values = [float(value) for value in text.split(",")]
+  return values
+
+
+def parse_bindings(text):
+  '''
+  Parse variable bindings, one "name = values" per line (see parse_values),
+  into a dict of name to list of values. Blank lines are ignored.
+  '''
+  bindings = {}
+  for line in text.splitlines():
+    if not line.strip():
+      continue
+    match = BINDING_RE.fullmatch(line)
+    if match is None:
+      raise ValueError(f'A variable is written as "name = values", not "{line.strip()}"')
+    bindings[match[1]] = parse_values(match[2])
+  return bindings
+
+
+class Summary:
+  '''
+  Running summary of a sweep's results: how many were finite, and the
+  minimum, maximum and sum of those, with the flat index of the point each
+  extreme was found at
+  '''
+  def __init__(self):
+    self.count = 0
+    self.finite = 0
+    self.total = 0.0
+    self.minimum = self.maximum = None
+    self.min_index = self.max_index = None
+
+
+  def add(self, index, value):
+    '''Add the result at flat index, which is None if it couldn't be evaluated'''
+    self.count += 1
+    if value is None or not math.isfinite(value):
+      return
+    self.finite += 1
+    self.total += value
+    if self.minimum is None or value < self.minimum:
+      self.minimum, self.min_index = value, index
+    if self.maximum is None or value > self.maximum:
+      self.maximum, self.max_index = value, index
+
+
+  def add_list(self, start, values):
+    '''Add a list of results, the first of which is at flat index start, with None for those that raised'''
+    if None in values or not all(map(math.isfinite, values)):
+      for index, value in enumerate(values, start):
+        self.add(index, value)
+      return
+    self.count += len(values)
+    self.finite += len(values)
+    self.total += math.fsum(values)
+    low = min(values)
+    high = max(values)
+    if self.minimum is None or low < self.minimum:
+      self.minimum, self.min_index = low, start + values.index(low)
+    if self.maximum is None or high > self.maximum:
+      self.maximum, self.max_index = high, start + values.index(high)
+
+
+  def add_array(self, start, values):
+    '''Add an array of results, the first of which is at flat index start'''
+    self.count += len(values)
+    finite = numpy.isfinite(values)
+    finite_count = int(finite.sum())
+    if finite_count == 0:
+      return
+    if finite_count < len(values):
+      # Non-finite results are left out of the sum, minimum and maximum
+      self.total += float(numpy.where(finite, values, 0.0).sum())
+      low = int(numpy.where(finite, values, numpy.inf).argmin())
+      high = int(numpy.where(finite, values, -numpy.inf).argmax())
+    else:
+      self.total += float(values.sum())
+      low = int(values.argmin())
+      high = int(values.argmax())
+    self.finite += finite_count
+    if self.minimum is None or values[low] < self.minimum:
+      self.minimum, self.min_index = float(values[low]), start + low
+    if self.maximum is None or values[high] > self.maximum:
+      self.maximum, self.max_index = float(values[high]), start + high
+
+
+def map_binary(func):
+  '''
+  Return a binary operator that applies func to each pair of elements of
+  two lists, where either may be a single float used for every element
+  '''
+  repeat = itertools.repeat
+  def apply(left, right):
+    if type(left) is float:
+      if type(right) is float:
+        return func(left, right)
+      return list(map(func, repeat(left), right))
+    if type(right) is float:
+      return list(map(func, left, repeat(right)))
+    return list(map(func, left, right))
+  return apply
+
+
+def map_unary(func):
+  '''Return a unary operator that applies func to each element of a list, or to a float'''
+  def apply(operand):
+    if type(operand) is float:
+      return func(operand)
+    return list(map(func, operand))
+  return apply
+
+
+def map_program(program):
+  '''Convert a program on floats into one on lists of floats'''
+  mapped = []
+  for code, arg in program:
+    if code == BINARY:
+      arg = map_binary(arg)
+    elif code == UNARY:
+      arg = map_unary(arg)
+    mapped.append((code, arg))
+  return tuple(mapped)
+
+
+def run_lists(program, mapped, variables, count):
+  '''
+  Run a program on lists of count values of each of its variables, with
+  mapped its version from map_program, returning a list of the count
+  results. A division by zero stops the whole mapped run, so then the
+  program is run again a point at a time, with None for the points that
+  raise.
+  '''
+  try:
+    values = run(mapped, variables)
+  except ArithmeticError:
+    values = []
+    for index in range(count):
+      try:
+        values.append(run(program, { name: column[index] for name, column in variables.items() }))
+      except ArithmeticError:
+        values.append(None)
+    return values
+  if type(values) is float:
+    # An expression without variables gives a single value
+    values = [values] * count
+  return values
+
+
+def point(axes, names, index):
+  '''Return the variable values at a flat index of the sweep's grid, as a dict'''
+  values = {}
+  for name, axis in zip(reversed(names), reversed(axes)):
+    index, position = divmod(index, len(axis))
+    values[name] = float(axis[position])
+  return { name: values[name] for name in names }
+
+
+def sweep(expression, bindings, chunk_size=CHUNK_SIZE, vectorized=None):
+  '''
+  Evaluate an expression at every point of the grid made by the variable
+  bindings (a dict of name to values), i.e. every combination of the
+  variables' values, and return a summary dict of the results. Points are
+  evaluated chunk_size at a time, as NumPy arrays if vectorized (by default,
+  whenever NumPy is installed), or as lists if not.
+
+  The summary has the number of points and finite results, the minimum,
+  maximum and mean of the finite results, the variable values each extreme
+  was found at, whether the sweep was vectorized and the seconds it took.
+  '''
+  if vectorized is None:
+    vectorized = numpy is not None
+  if vectorized and numpy is None:
+    raise RuntimeError("Vectorized sweeps need NumPy")
+  names = list(bindings)
+  # Numbers are floats, as the variables are, so results are the same with
+  # or without NumPy and a huge int can't overflow NumPy's ints. Functions
+  # like sin(x) are applied to a whole chunk at once with NumPy.
+  program = compile_scientific(expression, literal=float, variables=names)
+  axes = [bindings[name] for name in names]
+  if not all(len(axis) for axis in axes):
+    raise ValueError("Every variable needs at least one value")
+  start_time = time.perf_counter()
+  summary = Summary()
+  if vectorized:
+    sweep_arrays(program, names, axes, chunk_size, summary)
+  else:
+    sweep_lists(program, names, axes, chunk_size, summary)
+  return { "points": summary.count, "finite": summary.finite,
+           "min": summary.minimum, "max": summary.maximum,
+           "mean": summary.total / summary.finite if summary.finite else None,
+           "min_at": None if summary.min_index is None else point(axes, names, summary.min_index),
+           "max_at": None if summary.max_index is None else point(axes, names, summary.max_index),
+           "vectorized": vectorized, "seconds": time.perf_counter() - start_time }
+
+
+def grid_strides(axes):
+  '''
+  Return the number of points in the grid of axes, and the number of flat
+  indices between consecutive values of each axis, the last changing fastest
+  '''
+  return (math.prod(len(axis) for axis in axes),
+          [math.prod(len(axis) for axis in axes[i + 1:]) for i in range(len(axes))])
+
+
+def sweep_lists(program, names, axes, chunk_size, summary):
+  '''Evaluate program over the grid of axes chunk_size points at a time as lists, adding the results to summary'''
+  mapped = map_program(program)
+  total, strides = grid_strides(axes)
+  for start in range(0, total, chunk_size):
+    stop = min(total, start + chunk_size)
+    variables = { name: [axis[(index // stride) % len(axis)] for index in range(start, stop)]
+                  for name, axis, stride in zip(names, axes, strides) }
+    summary.add_list(start, run_lists(program, mapped, variables, stop - start))
+
+
+def sweep_arrays(program, names, axes, chunk_size, summary):
+  '''Evaluate program over the grid of axes chunk_size points at a time as arrays, adding the results to summary'''
+  axes = [numpy.asarray(axis, dtype=float) for axis in axes]
+  total, strides = grid_strides(axes)
+  # Division or modulus by zero gives inf or nan, which are counted as
+  # non-finite results rather than raising
+  with numpy.errstate(all="ignore"):
+    for start in range(0, total, chunk_size):
+      indices = numpy.arange(start, min(total, start + chunk_size))
+      variables = { name: axis[(indices // stride) % len(axis)]
+                    for name, axis, stride in zip(names, axes, strides) }
+      values = run(program, variables)
+      # An expression without variables gives a single value
+      values = numpy.broadcast_to(numpy.asarray(values, dtype=float), indices.shape)
+      summary.add_array(start, values)
@@ -0,0 +1,279 @@
+import math
+import operator
+import re
+
+from calc.ExprEngine import BINARY, PUSH, ExprError, compile_expr, run
+from calc.LRUCache import LRUCache
+from calc.ResultFormatter import ResultFormatter
+
+# Base dimensions, in SI order. A dimension is a vector of the exponent of
+# each base dimension, packed into one int with 8 bits per exponent, so
+# multiplying quantities adds their dimensions with a single int addition
+# and dimensions are compared with a single int comparison. Exponents can
+# be negative, the packing is linear so sums still unpack correctly.
+BASE_UNITS = ("m", "kg", "s", "A", "K", "mol", "cd")
+DIMENSION_BITS = 8
+
+
+def dimension(*exponents):
+  '''Pack the exponents of the base dimensions, in BASE_UNITS order, into a dimension'''
+  return sum(exponent << (DIMENSION_BITS * i) for i, exponent in enumerate(exponents))
+
+
+def exponents(dim):
+  '''Unpack a dimension into the list of exponents of the base dimensions'''
+  half = 1 << (DIMENSION_BITS - 1)
+  result = []
+  for symbol in BASE_UNITS:
+    exponent = (dim + half) % (2 * half) - half
+    result.append(exponent)
+    dim = (dim - exponent) >> DIMENSION_BITS
+  return result
+
+
+# Units, as symbol: (scale to SI base units, dimension)
+UNITS = {
+  "m": (1.0, dimension(1)),
+  "g": (1e-3, dimension(0, 1)),
+  "s": (1.0, dimension(0, 0, 1)),
+  "A": (1.0, dimension(0, 0, 0, 1)),
+  "K": (1.0, dimension(0, 0, 0, 0, 1)),
+  "mol": (1.0, dimension(0, 0, 0, 0, 0, 1)),
+  "cd": (1.0, dimension(0, 0, 0, 0, 0, 0, 1)),
+  "Hz": (1.0, dimension(0, 0, -1)),
+  "N": (1.0, dimension(1, 1, -2)),
+  "Pa": (1.0, dimension(-1, 1, -2)),
+  "J": (1.0, dimension(2, 1, -2)),
+  "W": (1.0, dimension(2, 1, -3)),
+  "C": (1.0, dimension(0, 0, 1, 1)),
+  "V": (1.0, dimension(2, 1, -3, -1)),
+  "F": (1.0, dimension(-2, -1, 4, 2)),
+  "ohm": (1.0, dimension(2, 1, -3, -2)),
+  "S": (1.0, dimension(-2, -1, 3, 2)),
+  "Wb": (1.0, dimension(2, 1, -2, -1)),
+  "T": (1.0, dimension(0, 1, -2, -1)),
+  "H": (1.0, dimension(2, 1, -2, -2)),
+  "L": (1e-3, dimension(3)),
+  "min": (60.0, dimension(0, 0, 1)),
+  "h": (3600.0, dimension(0, 0, 1)),
+}
+UNITS["Ω"] = UNITS["ohm"]
+# SI prefixes, as symbol: power of ten
+PREFIXES = { "Y": 24, "Z": 21, "E": 18, "P": 15, "T": 12, "G": 9, "M": 6, "k": 3, "c": -2,
+             "m": -3, "u": -6, "µ": -6, "n": -9, "p": -12, "f": -15, "a": -18, "z": -21,
+             "y": -24 }
+# Units that aren't prefixed
+UNPREFIXED = {"min", "h", "L"}
+
+# Every name a unit can be written as, prefixed or not, resolved ahead of
+# time to (scale, dimension). A unit's own symbol wins over a prefixed
+# reading of it, so "m" is a metre and "T" a tesla, and a prefix on its
+# own scales a number, like the k in "4.7k".
+UNIT_TABLE = dict(UNITS)
+for prefix, power in PREFIXES.items():
+  for symbol, (scale, dim) in UNITS.items():
+    if symbol not in UNPREFIXED:
+      UNIT_TABLE.setdefault(prefix + symbol, (scale * 10.0 ** power, dim))
+  UNIT_TABLE.setdefault(prefix, (10.0 ** power, 0))
+
+# Units results are shown in, by dimension, with the first listed winning
+# where several share one (Hz over Bq, J over N m)
+RESULT_UNITS = {}
+for symbol in ("m", "g", "s", "A", "K", "mol", "cd", "Hz", "N", "Pa", "J", "W", "C", "V", "F",
+               "ohm", "S", "Wb", "T", "H"):
+  RESULT_UNITS.setdefault(UNITS[symbol][1], symbol)
+
+# Tokens of a unit expression, which are those of a plain expression,
+# except that names can be non-ASCII (like µ or Ω) and have a power, as
+# in "m^2" or "s^-1"
+UNIT_TOKEN_RE = re.compile(r'(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|[^\W\d]\w*(?:\^[-+]?\d+)?|\S')
+
+
+class UnitError(ExprError):
+  '''Raised when a unit is unknown, or quantities of different dimensions are added or subtracted'''
+
+
+class Quantity:
+  '''A number with a dimension, in SI base units'''
+  __slots__ = ("value", "dim")
+
+  def __init__(self, value, dim):
+    self.value = value
+    self.dim = dim
+
+
+  def __eq__(self, other):
+    return type(other) is Quantity and self.value == other.value and self.dim == other.dim
+
+
+  def __repr__(self):
+    return f'Quantity({self.value!r}, {exponents(self.dim)})'
+
+
+def quantity(value, dim):
+  '''Return value with dimension dim, as a plain float if it is dimensionless'''
+  return Quantity(value, dim) if dim else value
+
+
+def lookup(name):
+  '''
+  Return the quantity a unit name stands for, raising UnitError if it is
+  unknown. A bare prefix is a dimensionless quantity.
+  '''
+  symbol, caret, power = name.partition("^")
+  unit = UNIT_TABLE.get(symbol)
+  if unit is None:
+    raise UnitError(f'Unknown unit "{symbol}"')
+  scale, dim = unit
+  if caret:
+    power = int(power)
+    scale, dim = scale ** power, dim * power
+  return Quantity(scale, dim)
+
+
+def split(operand):
+  '''Return the (value, dimension) of a quantity or plain number'''
+  if type(operand) is Quantity:
+    return operand.value, operand.dim
+  return operand, 0
+
+
+# Operators whose operands must have the same dimension, with how an error
+# describes them
+SAME_DIMENSION = { operator.add: "add", operator.sub: "subtract",
+                   operator.mod: "take the modulus of" }
+
+
+def check_dimensions(program):
+  '''
+  Work out the dimension of every step of a program whose units are
+  quantities, raising UnitError where an operator's operands don't match.
+  Returns (program, dim), where program is the same program on plain
+  numbers in SI base units, and dim the dimension of its result. A number
+  times a unit, like "2 mA", is folded into a single number, so the
+  program is the same as for the number written in base units.
+  '''
+  dims = []
+  plain = []
+  # Whether the last step of plain pushes a unit
+  unit_pushed = False
+  for code, arg in program:
+    if code == PUSH:
+      unit_pushed = type(arg) is Quantity
+      arg, dim = split(arg)
+      dims.append(dim)
+      plain.append((code, arg))
+      continue
+    if code == BINARY:
+      right = dims.pop()
+      left = dims[-1]
+      if arg is operator.mul:
+        dims[-1] = left + right
+        if unit_pushed and plain[-2][0] == PUSH:
+          plain[-2:] = [(PUSH, plain[-2][1] * plain[-1][1])]
+          unit_pushed = False
+          continue
+      elif arg is operator.truediv:
+        dims[-1] = left - right
+      elif left != right:
+        raise UnitError(f'Can\'t {SAME_DIMENSION[arg]} {unit_name(left)} and {unit_name(right)}')
+    unit_pushed = False
+    plain.append((code, arg))
+  return tuple(plain), dims[0]
+
+
+def compile_units(expression):
+  '''
+  Compile an expression with units into (program, dim). Every unit is
+  resolved as it is parsed, and every dimension checked, so the program
+  runs on plain floats as fast as one without units, and its result has
+  dimension dim.
+  '''
+  return check_dimensions(compile_expr(expression, float, constants=lookup, token_re=UNIT_TOKEN_RE))
+
+
+def format_dimension(dim):
+  '''Format a dimension in base units, like "m^2 kg s^-3", or "1" if it is dimensionless'''
+  parts = []
+  for symbol, exponent in zip(BASE_UNITS, exponents(dim)):
+    if exponent == 1:
+      parts.append(symbol)
+    elif exponent:
+      parts.append(f'{symbol}^{exponent}')
+  return " ".join(parts) or "1"
+
+
+def unit_name(dim):
+  '''Return the symbol of the SI unit of a dimension, or its base units if it has none'''
+  symbol = RESULT_UNITS.get(dim)
+  if symbol is None:
+    return format_dimension(dim)
+  return "kg" if symbol == "g" else symbol
+
+
+class UnitFormatter:
+  '''
+  Formats quantities in the unit named for their dimension (or in base
+  units if there is none), scaled to the SI prefix that puts the number
+  between 1 and 1000
+  '''
+  def __init__(self, digits=10):
+    '''Initialize the formatter, showing numbers to digits significant digits'''
+    self.numbers = ResultFormatter(digits=digits)
+
+
+  def format(self, value):
+    '''Format a quantity or plain number, raising ValueError if it is infinite or NaN'''
+    value, dim = split(value)
+    symbol = RESULT_UNITS.get(dim)
+    if symbol is None:
+      if not dim:
+        return self.numbers.format(value)
+      return f'{self.numbers.format(value)} {format_dimension(dim)}'
+    # Masses are prefixed in grams
+    if symbol == "g":
+      value *= 1000
+    if not math.isfinite(value):
+      raise ValueError("Result is not finite")
+    power = 0
+    if value:
+      power = min(24, max(-24, 3 * math.floor(math.log10(abs(value)) / 3)))
+    # Scaling by a positive power of ten is exact where the power is
+    prefix = next((prefix for prefix, prefix_power in PREFIXES.items() if prefix_power == power), "")
+    scaled = value / 10.0 ** power if power >= 0 else value * 10.0 ** -power
+    return f'{self.numbers.format(scaled)} {prefix}{symbol}'
+
+
+class UnitEngine:
+  '''Evaluates expressions with units, caching their compiled programs'''
+  def __init__(self, cache_size=256):
+    '''Initialize the engine, caching up to cache_size programs'''
+    self.programs = LRUCache(cache_size)
+
+
+  def compile(self, expression):
+    '''Return the (program, dim) of an expression, compiling it if needed'''
+    compiled = self.programs.get(expression)
+    if compiled is None:
+      compiled = compile_units(expression)
+      self.programs.put(expression, compiled)
+    return compiled
+
+
+  def evaluate(self, expression):
+    '''
+    Evaluate an expression with units, returning a Quantity, or a plain
+    number if it is dimensionless. Raises an exception if it is invalid.
+    '''
+    program, dim = self.compile(expression)
+    return quantity(run(program), dim)
+
+
+def solve_units(expression, engine, formatter):
+  '''Solve an expression with units, returning the formatted result, or the error that stopped it'''
+  try:
+    return formatter.format(engine.evaluate(expression))
+  except ZeroDivisionError:
+    return "Error: Division by zero"
+  except (ExprError, ArithmeticError, ValueError) as error:
+    return f'Error: {error}'
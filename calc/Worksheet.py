@@ -0,0 +1,312 @@
+import math
+import re
+
+from calc.ExprEngine import ExprError, compile_expr, references, run
+
+# A cell, written as "name = expression"
+CELL_RE = re.compile(r'\s*([A-Za-z_]\w*)\s*=(.*)')
+
+
+def parse_sheet(text):
+  '''
+  Parse a sheet, one "name = expression" per line. Returns (cells,
+  line_names), where cells maps each name to its expression (the last
+  line wins if a name is defined twice), and line_names has the name
+  defined on each line, or None for a blank line or one that isn't a cell.
+  '''
+  return parse_lines(text.split("\n"))
+
+
+def parse_lines(lines):
+  '''Parse a sheet's list of lines, see parse_sheet'''
+  cells = {}
+  line_names = []
+  for line in lines:
+    match = CELL_RE.match(line)
+    if match is None:
+      line_names.append(None)
+    else:
+      cells[match[1]] = match[2]
+      line_names.append(match[1])
+  return cells, line_names
+
+
+def diff_lines(old, new):
+  '''
+  Return (start, old_stop, new_stop), such that replacing old[start:old_stop]
+  with new[start:new_stop] turns old into new, by skipping the lines they
+  start and end with in common
+  '''
+  start = 0
+  limit = min(len(old), len(new))
+  while start < limit and old[start] == new[start]:
+    start += 1
+  old_stop, new_stop = len(old), len(new)
+  while old_stop > start and new_stop > start and old[old_stop - 1] == new[new_stop - 1]:
+    old_stop -= 1
+    new_stop -= 1
+  return start, old_stop, new_stop
+
+
+class Cell:
+  '''A named expression in a worksheet, with its value or the error that stopped it'''
+  __slots__ = ("expression", "program", "references", "invalid", "value", "error")
+
+  def __init__(self, expression, value=None, error=None):
+    '''
+    Compile the cell's expression, keeping the error if it is invalid. The
+    cell starts with the given result, i.e. that of the cell it replaces,
+    until it is evaluated.
+    '''
+    self.expression = expression
+    self.references = references(expression)
+    self.value = value
+    self.error = error
+    try:
+      self.program = compile_expr(expression, variables=self.references)
+      self.invalid = None
+    except ExprError as error:
+      self.program = None
+      self.invalid = str(error)
+
+
+class Worksheet:
+  '''
+  Named cells whose expressions can refer to each other. The graph of which
+  cells refer to which is kept up to date, so changing a cell only
+  recomputes the cells that depend on it, in dependency order.
+  '''
+  def __init__(self):
+    '''Initialize an empty worksheet'''
+    self.cells = {}
+    # Names of the cells that refer to each name, including names that
+    # aren't defined (yet), so defining one recomputes its dependents
+    self.dependents = {}
+    # Number of cells evaluated, over the life of the worksheet
+    self.evaluations = 0
+
+
+  def __contains__(self, name):
+    return name in self.cells
+
+
+  def __len__(self):
+    return len(self.cells)
+
+
+  def value(self, name):
+    '''Return the value of a cell, or None if it has an error'''
+    return self.cells[name].value
+
+
+  def error(self, name):
+    '''Return the error of a cell, or None if it has a value'''
+    return self.cells[name].error
+
+
+  def set(self, name, expression):
+    '''Set the expression of a cell, and return the names of the cells recomputed'''
+    return self.update({name: expression}, ())
+
+
+  def remove(self, name):
+    '''Remove a cell, and return the names of the cells recomputed'''
+    return self.update({}, (name,))
+
+
+  def load(self, cells):
+    '''
+    Make the worksheet hold exactly cells, a dict of name to expression,
+    changing only the cells that differ. Returns the names of the cells
+    recomputed.
+    '''
+    changed = { name: expression for name, expression in cells.items()
+                if name not in self.cells or self.cells[name].expression != expression }
+    return self.update(changed, [name for name in self.cells if name not in cells])
+
+
+  def update(self, changed, removed):
+    '''
+    Set the expressions of the cells in changed, a dict of name to
+    expression, and remove the cells named in removed, then recompute
+    them and their dependents. Returns the names of the cells recomputed
+    (see recompute), in the order they were recomputed.
+    '''
+    for name in removed:
+      cell = self.cells.pop(name, None)
+      if cell is not None:
+        self.unlink(name, cell)
+    for name, expression in changed.items():
+      cell = self.cells.get(name)
+      if cell is None:
+        cell = self.cells[name] = Cell(expression)
+      else:
+        self.unlink(name, cell)
+        cell = self.cells[name] = Cell(expression, cell.value, cell.error)
+      for reference in cell.references:
+        self.dependents.setdefault(reference, set()).add(name)
+    return self.recompute(set(changed) | set(removed))
+
+
+  def unlink(self, name, cell):
+    '''Remove a cell's references from the dependency graph'''
+    for reference in cell.references:
+      dependents = self.dependents[reference]
+      dependents.discard(name)
+      if not dependents:
+        del self.dependents[reference]
+
+
+  def dirty(self, names):
+    '''Return the set of names and every cell that depends on them, directly or not'''
+    dirty = set(names)
+    stack = list(names)
+    while stack:
+      for dependent in self.dependents.get(stack.pop(), ()):
+        if dependent not in dirty:
+          dirty.add(dependent)
+          stack.append(dependent)
+    return dirty
+
+
+  def recompute(self, names):
+    '''
+    Recompute the cells named (which may have been removed) and their
+    dependents, in topological order, so each cell is evaluated once, after
+    the cells it refers to. A cell is only evaluated if it was changed or
+    a cell it refers to changed value, so an edit that leaves a value as it
+    was stops there. Returns the names of the cells evaluated.
+    '''
+    dirty = self.dirty(names)
+    cells = self.cells
+    dirty.intersection_update(cells)
+    # Number of dirty cells each dirty cell refers to, which must all be
+    # recomputed before it
+    waiting = { name: len(cells[name].references & dirty) for name in dirty }
+    ready = [name for name, count in waiting.items() if count == 0]
+    # Cells whose value (or error) changed, which their dependents need,
+    # starting with the cells removed
+    changed = set(names) - cells.keys()
+    order = []
+    while ready:
+      name = ready.pop()
+      del waiting[name]
+      cell = cells[name]
+      if name in names or not changed.isdisjoint(cell.references):
+        order.append(name)
+        if self.evaluate(name, cell):
+          changed.add(name)
+      for dependent in self.dependents.get(name, ()):
+        if dependent in waiting:
+          waiting[dependent] -= 1
+          if waiting[dependent] == 0:
+            ready.append(dependent)
+    if waiting:
+      self.mark_cycles(waiting)
+      order += waiting
+    return order
+
+
+  def evaluate(self, name, cell):
+    '''Evaluate a cell from the values of the cells it refers to, returning whether its result changed'''
+    old = (cell.value, cell.error)
+    self.evaluations += 1
+    cell.value = None
+    cell.error = cell.invalid
+    if cell.program is None:
+      return old != (cell.value, cell.error)
+    values = {}
+    for reference in cell.references:
+      referred = self.cells.get(reference)
+      if referred is None:
+        cell.error = f'Unknown name "{reference}"'
+      elif referred.error is not None:
+        cell.error = f'Refers to "{reference}", which has an error'
+      else:
+        values[reference] = referred.value
+        continue
+      return old != (cell.value, cell.error)
+    try:
+      value = run(cell.program, values)
+    except ZeroDivisionError:
+      cell.error = "Division by zero"
+    except ArithmeticError:
+      cell.error = "Result is too large"
+    else:
+      if isinstance(value, float) and not math.isfinite(value):
+        cell.error = "Result is too large"
+      else:
+        cell.value = value
+    return old != (cell.value, cell.error)
+
+
+  def mark_cycles(self, names):
+    '''
+    Mark the cells that couldn't be ordered as errors. Cells with no
+    dependents among them are peeled off first, as they only refer to a
+    cycle, and the cells left are the ones in a cycle.
+    '''
+    dependents = { name: len(self.dependents.get(name, set()) & names.keys()) for name in names }
+    peel = [name for name, count in dependents.items() if count == 0]
+    while peel:
+      name = peel.pop()
+      del dependents[name]
+      cell = self.cells[name]
+      cell.value, cell.error = None, "Refers to a circular reference"
+      for reference in cell.references:
+        if reference in dependents:
+          dependents[reference] -= 1
+          if dependents[reference] == 0:
+            peel.append(reference)
+    for name in dependents:
+      cell = self.cells[name]
+      cell.value, cell.error = None, "Circular reference"
+
+
+class SheetText:
+  '''
+  Keeps a worksheet in step with the text of a sheet as it is edited, only
+  parsing the lines that changed
+  '''
+  def __init__(self, worksheet=None):
+    '''Initialize an empty sheet, kept in worksheet (a new one if None)'''
+    self.worksheet = Worksheet() if worksheet is None else worksheet
+    self.lines = []
+    # Name defined on each line, see parse_sheet
+    self.line_names = []
+    # Number of lines defining each name
+    self.counts = {}
+
+
+  def update(self, text):
+    '''
+    Update the worksheet to the new text of the sheet. Returns (start,
+    old_stop, new_stop, recomputed), where lines start to old_stop of the
+    old text were replaced by lines start to new_stop, and recomputed has
+    the names of the cells recomputed (see Worksheet.recompute).
+    '''
+    lines = text.split("\n")
+    start, old_stop, new_stop = diff_lines(self.lines, lines)
+    old_names = [name for name in self.line_names[start:old_stop] if name is not None]
+    cells, new_names = parse_lines(lines[start:new_stop])
+    # A name defined on more than one line (before or after the edit) can
+    # take its expression from a line outside the edit, so the whole sheet
+    # is parsed again
+    reparse = False
+    for name in old_names:
+      reparse = reparse or self.counts[name] > 1
+      self.counts[name] -= 1
+      if self.counts[name] == 0:
+        del self.counts[name]
+    for name in cells:
+      reparse = reparse or name in self.counts
+    for name in new_names:
+      if name is not None:
+        self.counts[name] = self.counts.get(name, 0) + 1
+    self.lines = lines
+    self.line_names[start:old_stop] = new_names
+    if reparse:
+      recomputed = self.worksheet.load(parse_lines(lines)[0])
+    else:
+      recomputed = self.worksheet.update(cells, [name for name in old_names if name not in cells])
+    return start, old_stop, new_stop, recomputed
@@ -1,10 +1,29 @@
-import re
+import time
 import tkinter as tk
 from tkinter import StringVar, ttk
 
+from calc.CalcCore import CalcCore
+from calc.ExprEngine import FLOAT, PRECISION_MODES
+from calc.Metrics import metrics
+from calc.ResultFormatter import ResultFormatter, default_formatter
+
 class BasicCalc:
-	def __init__(self, root, frame):
-		'''Intialize BasicCalc object with the inpur root widget and frame'''
+	# Expressions longer than this many chars are solved in a worker
+	# process, so that a slow solve can't freeze the window
+	inline_limit = 1000
+	# CPU time limit of a background solve, in seconds
+	time_limit = 5.0
+	# How often a background solve is checked for a result, in milliseconds
+	poll_interval = 20
+	# Text displayed while a background solve is in progress
+	busy_text = " ... "
+
+	def __init__(self, root, frame, history=None, recorder=None):
+		'''
+		Intialize BasicCalc object with the inpur root widget and frame, the
+		History that solved expressions are recorded in, and the
+		SessionRecorder that button and key presses are recorded by, if any
+		'''
 		# Root frame, the main app window
 		self.root = root
 		# Frame for this widget, the tab for this widget
@@ -17,16 +36,30 @@ class BasicCalc:
 		# Event bindings if a keyboard key or Enter is pressed
 		self.root.bind("<Key>", self.key_press)
 		self.root.bind('<Return>', self.solve_eqn)
+		# Escape cancels a background solve
+		self.root.bind('<Escape>', self.cancel_solve)
 
-		# Holds the current equation, generally is the same as
-		# self.equation, except when an invalid calculation is
-		# tried.
-		self.expression = ""
+		# The calculator state machine, which holds the current expression
+		# and does all of the work, this widget only displays it
+		self.core = CalcCore(history=history)
 		# The equation that is displayed in the Entry window
 		self.equation = StringVar()
-		# Flag to indicate whether the total from a previous
-		# equation is being displayed
-		self.total_flag=False
+		# The running result shown under the equation while typing
+		self.preview = StringVar()
+		# Worker for solving long expressions, started when first needed
+		self.solver = None
+		# Recorder of the presses that reach the calculator, for replaying them
+		self.recorder = recorder
+		# Keys typed since the display was last refreshed, which are
+		# processed together on the next idle cycle
+		self.pending_keys = []
+		# Whether a display refresh is scheduled for the next idle cycle
+		self.refresh_pending = False
+		# Number of display refreshes saved by merging them into one
+		# that was already scheduled
+		self.coalesced_updates = 0
+		# The (equation, preview) last shown, so unchanged text isn't set again
+		self.shown = None
 
 		# Frame for holding the Entry widget, used for border styling and padding around the Entry
 		frm_equation = tk.Frame(self.frame, borderwidth=5, relief=tk.SUNKEN, padx=10)
@@ -40,6 +73,10 @@ class BasicCalc:
 														state="disabled", font="Calibri 20",
 														disabledforeground="black")
 		ent_equation.grid(columnspan=4, sticky=tk.N+tk.S+tk.E+tk.W)
+		# Label for the running result, under the Entry widget
+		lbl_preview = tk.Label(frm_equation, textvariable=self.preview, anchor=tk.E,
+													 font="Calibri 12", fg="gray")
+		lbl_preview.grid(row=1, columnspan=4, sticky=tk.E+tk.W)
 
 		# Calculator buttons, with the text of the button as the dict key
 		# and the [row, col] coordinates as the dict values
@@ -59,146 +96,240 @@ class BasicCalc:
 			else:
 				new_but.grid(row=(but_coords[button][0]+1), column=but_coords[button][1], sticky=tk.N+tk.S+tk.E+tk.W)
 
+		# Precision mode selection, under the buttons. The number of digits
+		# is the decimal precision, and how many digits are displayed in
+		# decimal and fraction modes.
+		self.mode = StringVar(value=self.core.engine.mode)
+		self.precision = tk.IntVar(value=self.core.engine.precision)
+		frm_mode = tk.Frame(self.frame)
+		frm_mode.grid(row=6, columnspan=4, sticky=tk.E+tk.W)
+		tk.Label(frm_mode, text="Precision:").pack(side=tk.LEFT)
+		tk.OptionMenu(frm_mode, self.mode, *PRECISION_MODES,
+									command=lambda mode: self.set_mode()).pack(side=tk.LEFT)
+		# The Spinbox is read only, so that typing digits still goes to the calculator
+		tk.Spinbox(frm_mode, from_=1, to=200, width=4, textvariable=self.precision,
+							 state="readonly", command=self.set_mode).pack(side=tk.LEFT)
+		tk.Label(frm_mode, text="digits").pack(side=tk.LEFT)
+
+
+	@property
+	def expression(self):
+		'''The current expression, which is held by the calculator core'''
+		# Keys still queued for the next idle cycle are part of the expression
+		self.process_keys()
+		return self.core.expression
+
+	@expression.setter
+	def expression(self, value):
+		self.process_keys()
+		self.core.expression = value
+
 
+	@property
+	def total_flag(self):
+		'''Whether the total from a previous equation is being displayed'''
+		return self.core.total_flag
+
+	@total_flag.setter
+	def total_flag(self, value):
+		self.core.total_flag = value
+
+
+	@property
+	def solving(self):
+		'''Whether a background solve is in progress'''
+		return self.solver is not None and self.solver.busy
+
+
+	@metrics.timed("but_press", blocks=True)
 	def but_press(self, button):
 		'''Carry out the correct action when a calculator button is clicked'''
-		# Solve the input expression
+		# While solving in the background, only "AC" (which also cancels
+		# the solve) is accepted
+		if self.solving:
+			if button != "AC":
+				return
+			self.solver.cancel()
+		# Keys typed before the click are applied first. If a queued "=" sent
+		# a solve to the background, the click is dropped like any other
+		# made while it runs.
+		self.process_keys()
+		if self.solving:
+			return
+		if self.recorder is not None:
+			self.recorder.button(button)
 		if button == "=":
-			self.solve_eqn(None)
-		# Clear the input expression
-		elif button == "AC":
-			self.expression = ""
-			self.equation.set("")
-		# Negate the current number
-		elif button == "+/-":
-			self.negate_num()
-		# Add the button's value to the expression string
+			self.solve_eqn()
 		else:
-			self.update_eqn(button)
+			self.core.press(button)
+			self.schedule_refresh()
 
 
+	@metrics.timed("key_press", blocks=True)
 	def key_press(self, event):
-		'''Carry out the correct action when a keyboard key is pressed'''
-		key = str(event.char)
-		# If the key is a number, decimal, or operator, add it to the
-		# input expression
-		if key.isdigit() or key in "+-*/%.":
-			self.update_eqn(key)
-		# If the key is the equals key, solve the input expression
-		elif key == "=":
-			self.solve_eqn()
-		# If the key is something else, ignore it
+		'''Queue a keyboard key, to be processed with any others on the next idle cycle'''
+		# Keys are ignored while solving in the background, and when they are
+		# typed into another tab's text box
+		if self.solving or self.typing_elsewhere(event):
+			return
+		self.pending_keys.append(str(event.char))
+		self.schedule_refresh()
+
+
+	def typing_elsewhere(self, event):
+		'''Whether a key event is typing into an editable text box, rather than the calculator'''
+		widget = getattr(event, "widget", None)
+		if not isinstance(widget, tk.Misc):
+			return False
+		return (widget.winfo_class() in ("Entry", "TEntry", "Text")
+						and str(widget.cget("state")) == "normal")
+
+
+	def process_keys(self):
+		'''
+		Carry out the correct action for each queued keyboard key, recording
+		each one as it is applied, so a recording never holds a dropped key
+		'''
+		keys = self.pending_keys
+		self.pending_keys = []
+		for char in keys:
+			# Keys after a solve that went to the background are dropped,
+			# the same as if they were typed while it was running
+			if self.solving:
+				return
+			if self.recorder is not None:
+				self.recorder.key(char)
+			if char == "=":
+				self.solve_eqn()
+			else:
+				self.core.key(char)
 
 
 	def change_operation(self, operation):
 		'''Change the operator at the end of the expression to the input operation'''
-		# If the last two chars are "-", then the first is a minus
-		# sign and should be changed
-		if self.expression[-1:] == "-" and self.expression[-2:-1] in "+-*/%":
-			self.expression = self.expression[0:-2] + str(operation) + self.expression[-1:]
-			self.equation.set(self.expression)
-		# Otherwise just the last char should be changed
-		else:
-			self.expression = self.expression[0:-1] + str(operation)
-			self.equation.set(self.expression)
+		self.process_keys()
+		self.core.change_operation(operation)
+		self.schedule_refresh()
 
 
 	def negate_num(self):
 		'''Add or remove a negative sign based on what the current expression is'''
-		# Indices for getting chars from the input expression
-		i=-1
-		j=0
-		# The end char in the expression
-		curr_char = self.expression[i:]
-		# If its an operator (that isn't a minus sign), just add a negative sign
-		if curr_char in "+*/%":
-			self.expression = self.expression + "-"
-			self.equation.set(self.expression)
-		else:
-			# Get the next char, which is the char before the current char
-			i-=1
-			j-=1
-			next_char = self.expression[i:j]
-			# If the end char is a number, including the decimal point in a number
-			if curr_char.isdigit() or curr_char == ".":
-				# Iterate backwards through the expression until the
-				# next char is not a digit.
-				while next_char.isdigit() or next_char == ".":
-					i-=1
-					j-=1
-					curr_char = next_char
-					next_char = self.expression[i:j]
-
-			# If both current char and next char are either a minus
-			# or not a minus (logical XNOR)
-			if not (curr_char == "-") ^ (next_char == "-"):
-				self.expression = self.expression[:j] + "-" + self.expression[j:]
-			# Else if only current char is a minus
-			elif curr_char == "-":
-				self.expression = self.expression[:j]
-			# Else if only next char is minus
-			else:
-				self.expression = self.expression[:i] + self.expression[j:]
-
-			# Update the equation based on the expression
-			self.equation.set(self.expression)
+		self.process_keys()
+		self.core.negate_num()
+		self.schedule_refresh()
 
 
 	def update_eqn(self, char):
 		'''Add a character to the expression, and update the equation'''
-		# If the current expression is the result from the previous expression,
-		# and a number or decimal point is input, clear the expression first
-		if self.total_flag and (str(char).isdigit() or str(char) == "."):
-			self.expression = ""
-		# Indicates the current expression is no long the result of the previous
-		# expression, as it was either just reset, or something is being added to it
-		self.total_flag=False
-
-		# If an operator was selected
-		if str(char) in "+-*/%":
-			# If the expression is empty and the input char isn't a negative sign, or the
-			# expression only contains a decimal point or a negative sign, set the expression
-			# to contain only a zero, so that the operator can be added after that
-			if (self.expression == "" and str(char) != "-") or self.expression == "." or self.expression == "-":
-				self.expression = "0"
-			# If the last char in the expression is already an operator, change it to the new one
-			if self.expression[-1:] in "+-*/%":
-				self.change_operation(char)
-			# Otherwise just append the operator
-			else:
-				self.expression = self.expression + str(char)
-				self.equation.set(self.expression)
-		elif str(char) == ".":
-			# If the expression is empty or the end char is an operator,
-			# append a zero before appending the decimal
-			if self.expression == "" or self.expression[-1:] in "+-*/%":
-				self.expression = self.expression + "0" + str(char)
-				self.equation.set(self.expression)
-			else:
-				# Split the expression at each operator
-				exp_list = re.split('\+|\-|\*|/|%', self.expression)
-				# If the end number doesn't contain a decimal, append it,
-				# otherwise ignore the new decimal input
-				if "." not in exp_list[-1]:
-					self.expression = self.expression + str(char)
-					self.equation.set(self.expression)
+		self.process_keys()
+		self.core.update_eqn(char)
+		self.schedule_refresh()
+
+
+	def set_mode(self):
+		'''Switch the calculator to the selected precision mode and digits'''
+		mode = self.mode.get()
+		precision = self.precision.get()
+		if mode == FLOAT:
+			self.core.formatter = default_formatter
 		else:
-			self.expression = self.expression + str(char)
-			self.equation.set(self.expression)
+			self.core.formatter = ResultFormatter(digits=precision)
+		self.core.set_mode(mode, precision)
+		self.refresh_display()
+
+
+	def schedule_refresh(self):
+		'''
+		Refresh the display on the next idle cycle, so that a burst of input
+		(e.g. key auto-repeat or a paste) only redraws it once
+		'''
+		if self.refresh_pending:
+			self.coalesced_updates += 1
+			return
+		self.refresh_pending = True
+		self.root.after_idle(self.idle_refresh)
+
+
+	@metrics.timed("idle_refresh", blocks=True)
+	def idle_refresh(self):
+		'''Process the queued keys and refresh the display, run when Tk is idle'''
+		self.refresh_pending = False
+		# Tk redraws the widgets in idle callbacks queued by setting their text,
+		# so a callback queued after them runs once the redraw is done
+		if metrics.enabled:
+			self.root.after_idle(self.record_redraw, time.perf_counter_ns())
+		self.process_keys()
+		# A solve that went to the background is showing its busy text
+		if not self.solving:
+			self.refresh_display()
+
+
+	def record_redraw(self, start):
+		'''Record the time taken to process keys and redraw the display, from start'''
+		metrics.record("redraw", time.perf_counter_ns() - start)
 
-	def solve_eqn(self, event):
+
+	def refresh_display(self):
+		'''Show the core's current expression and running result'''
+		shown = (self.core.display, self.core.preview)
+		if shown == self.shown:
+			return
+		self.shown = shown
+		self.equation.set(shown[0])
+		self.preview.set(shown[1])
+
+
+	@metrics.timed("solve_eqn", blocks=True)
+	def solve_eqn(self, event=None):
 		'''Try and solve the current equation'''
-		# If there isn't any expression, don't change anything
-		if self.expression == "":
+		if self.solving or (event is not None and self.typing_elsewhere(event)):
+			return
+		self.process_keys()
+		# A queued "=" may have sent a solve to the background, which drops
+		# this one like any key typed while it runs
+		if self.solving:
+			return
+		# Enter solves without going through key_press, so it is recorded here
+		# as the "=" key it is equivalent to, after the keys queued before it
+		if event is not None and self.recorder is not None:
+			self.recorder.key("=")
+		expression = self.core.expression
+		# Short expressions are solved straight away
+		if len(expression) <= self.inline_limit:
+			self.core.solve_eqn()
+			self.refresh_display()
 			return
-		try:
-			# Format the total to be a max of 15 digits, and remove any
-			# trailing zeros and decimals
-			total = str(('%.15f' % eval(self.expression)).rstrip('0').rstrip('.'))
-			self.equation.set(total)
-			self.expression = total
-			self.total_flag=True
-		except:
-			self.equation.set(" NaN ")
-			self.expression = ""
+		# Long ones are sent to the worker, and the display shows that the
+		# calculator is busy until the result is polled
+		if self.solver is None:
+			# Imported here, as multiprocessing is slow to import and most
+			# sessions never need it
+			from calc.AsyncSolver import AsyncSolver
+			self.solver = AsyncSolver(self.time_limit)
+		self.solver.submit(expression, self.core.formatter, self.core.engine.settings)
+		self.shown = (self.busy_text, "")
+		self.equation.set(self.busy_text)
+		self.preview.set("")
+		self.root.after(self.poll_interval, self.poll_solve)
+
+
+	def poll_solve(self):
+		'''Check for the result of a background solve, and display it if it's done'''
+		# The solve was cancelled
+		if not self.solving:
+			return
+		result = self.solver.poll()
+		if result is None:
+			self.root.after(self.poll_interval, self.poll_solve)
+			return
+		# A solve that ran out of time shows NaN, the same as an invalid one
+		status, total = result
+		self.core.set_total(total)
+		self.refresh_display()
+
 
+	def cancel_solve(self, event=None):
+		'''Cancel a background solve, leaving the expression as it was'''
+		if self.solving:
+			self.solver.cancel()
+			self.refresh_display()
@@ -0,0 +1,123 @@
+import csv
+import threading
+import time
+import tkinter as tk
+from tkinter import filedialog
+
+from calc.ColumnCalc import run_file
+from calc.ExprEngine import ExprError
+
+# Example shown when the tab is first opened
+EXAMPLE_EXPRESSION = "col3*1.05-col1"
+
+
+class ColumnsTab:
+  '''
+  Tab that evaluates an expression over the columns of every row of a CSV
+  file, like "col3*1.05-col1", writing the rows with their results to
+  another file
+  '''
+  # How often a running job is checked for progress, in milliseconds
+  poll_interval = 100
+
+  def __init__(self, root, frame):
+    '''Initialize the tab in frame'''
+    self.root = root
+    self.frame = frame
+    # Thread running the current job, with its progress as (rows, bytes
+    # read, file size) and its result or error once done
+    self.worker = None
+    self.progress = None
+    self.result = None
+    self.started = None
+    self.frame.columnconfigure(1, weight=1)
+
+    tk.Label(self.frame, text="Expression:").grid(row=0, column=0, sticky=tk.W)
+    self.ent_expression = tk.Entry(self.frame)
+    self.ent_expression.insert(0, EXAMPLE_EXPRESSION)
+    self.ent_expression.grid(row=0, column=1, columnspan=2, sticky=tk.E+tk.W)
+    tk.Label(self.frame, text="Input:").grid(row=1, column=0, sticky=tk.W)
+    self.ent_input = tk.Entry(self.frame)
+    self.ent_input.grid(row=1, column=1, sticky=tk.E+tk.W)
+    tk.Button(self.frame, text="Browse...", command=self.choose_input).grid(row=1, column=2)
+    tk.Label(self.frame, text="Output:").grid(row=2, column=0, sticky=tk.W)
+    self.ent_output = tk.Entry(self.frame)
+    self.ent_output.grid(row=2, column=1, sticky=tk.E+tk.W)
+    tk.Button(self.frame, text="Browse...", command=self.choose_output).grid(row=2, column=2)
+    self.header = tk.BooleanVar(value=False)
+    tk.Checkbutton(self.frame, text="First row is a header",
+                   variable=self.header).grid(row=3, column=1, sticky=tk.W)
+    self.btn_run = tk.Button(self.frame, text="Run", command=self.start)
+    self.btn_run.grid(row=3, column=2, sticky=tk.E)
+    self.lbl_status = tk.Label(self.frame, anchor=tk.W)
+    self.lbl_status.grid(row=4, columnspan=3, sticky=tk.E+tk.W)
+
+
+  def choose_input(self):
+    '''Choose the input file'''
+    path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv"), ("All files", "*")])
+    if path:
+      self.ent_input.delete(0, tk.END)
+      self.ent_input.insert(0, path)
+
+
+  def choose_output(self):
+    '''Choose the output file'''
+    path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                        filetypes=[("CSV files", "*.csv"), ("All files", "*")])
+    if path:
+      self.ent_output.delete(0, tk.END)
+      self.ent_output.insert(0, path)
+
+
+  def start(self):
+    '''Start running the expression over the input file, in the background'''
+    if self.worker is not None:
+      return
+    path = self.ent_input.get()
+    output = self.ent_output.get()
+    if not path or not output:
+      self.lbl_status.config(text="Choose an input and an output file")
+      return
+    if path == output:
+      self.lbl_status.config(text="The output can't be the input file")
+      return
+    self.btn_run.config(state=tk.DISABLED)
+    self.lbl_status.config(text="Starting...")
+    self.progress = None
+    self.result = None
+    self.started = time.perf_counter()
+    self.worker = threading.Thread(target=self.run, daemon=True,
+                                   args=(self.ent_expression.get(), path, output, self.header.get()))
+    self.worker.start()
+    self.root.after(self.poll_interval, self.poll)
+
+
+  def run(self, expression, path, output, header):
+    '''Run a job, keeping its result or the error it raised'''
+    def progress(count, done, size):
+      self.progress = (count, done, size)
+    try:
+      self.result = run_file(expression, path, output, header, progress=progress)
+    except (ExprError, OSError, ValueError, csv.Error) as error:
+      self.result = error
+
+
+  def poll(self):
+    '''Show the progress of the job, or its result once it is done'''
+    if self.worker.is_alive():
+      if self.progress is not None:
+        count, done, size = self.progress
+        rate = count / (time.perf_counter() - self.started)
+        self.lbl_status.config(text=f'{count:,} rows ({min(1, done / size):.0%}),'
+                                    f' {rate:,.0f} rows/s' if size else f'{count:,} rows')
+      self.root.after(self.poll_interval, self.poll)
+      return
+    self.worker = None
+    self.btn_run.config(state=tk.NORMAL)
+    result = self.result
+    if isinstance(result, Exception):
+      self.lbl_status.config(text=f'Error: {result}')
+      return
+    self.lbl_status.config(text=f'{result["rows"]:,} rows in {result["seconds"]:.3f}s'
+                                f' ({result["rows_per_second"]:,.0f} rows/s)')
@@ -0,0 +1,68 @@
+import tkinter as tk
+from tkinter import ttk
+
+from calc.ExprEngine import default_engine
+from calc.Metrics import ENV_VAR, metrics
+
+# Columns of the histogram table, as (summary key, heading)
+COLUMNS = [("count", "Count"), ("mean", "Mean"), ("p50", "p50"), ("p90", "p90"),
+           ("p99", "p99"), ("max", "Max")]
+
+
+def format_value(value, unit):
+  '''Format a histogram value, showing times in microseconds'''
+  if unit == "ns":
+    return f'{value / 1000:.1f}us'
+  return f'{value:.0f}'
+
+
+class DiagnosticsTab:
+  '''
+  Tab showing the instrumentation histograms and the engine's cache
+  counters, updated live while the tab is shown
+  '''
+  # How often the tab is updated while it is shown, in milliseconds
+  update_interval = 500
+
+  def __init__(self, root, frame):
+    '''Initialize the tab in frame'''
+    self.root = root
+    self.frame = frame
+    self.frame.columnconfigure(0, weight=1)
+    self.frame.rowconfigure(1, weight=1)
+
+    if metrics.enabled:
+      status = "Latencies of the calculator's event handlers and redraws"
+    else:
+      status = f'Instrumentation is off, set {ENV_VAR}=1 before starting the app to turn it on'
+    tk.Label(self.frame, text=status, anchor=tk.W).grid(row=0, sticky=tk.E+tk.W)
+    # One row per histogram, added as they are first recorded
+    self.table = ttk.Treeview(self.frame, columns=[key for key, heading in COLUMNS])
+    self.table.heading("#0", text="Metric")
+    for key, heading in COLUMNS:
+      self.table.heading(key, text=heading)
+      self.table.column(key, width=70, anchor=tk.E)
+    self.table.grid(row=1, sticky=tk.N+tk.S+tk.E+tk.W)
+    self.caches = tk.Label(self.frame, anchor=tk.W, justify=tk.LEFT)
+    self.caches.grid(row=2, sticky=tk.E+tk.W)
+    self.update()
+
+
+  def update(self):
+    '''Show the latest metrics, and schedule the next update'''
+    # Nothing is drawn while another tab is shown
+    if self.frame.winfo_ismapped():
+      for name, summary in metrics.snapshot().items():
+        values = [summary["count"]] + [format_value(summary[key], summary["unit"])
+                                        for key, heading in COLUMNS[1:]]
+        if self.table.exists(name):
+          self.table.item(name, values=values)
+        else:
+          self.table.insert("", tk.END, iid=name, text=name, values=values)
+      lines = []
+      for name, stats in default_engine.stats.items():
+        lines.append(f'{name.capitalize()} cache: {stats["hits"]} hits, {stats["misses"]} misses'
+                     f' ({stats["hit_rate"]:.0%}), {stats["evictions"]} evictions,'
+                     f' {stats["size"]}/{stats["maxsize"]} entries')
+      self.caches.config(text="\n".join(lines))
+    self.root.after(self.update_interval, self.update)
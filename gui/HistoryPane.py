@@ -0,0 +1,138 @@
+import tkinter as tk
+from tkinter import StringVar, ttk
+
+
+class HistoryPane:
+  '''
+  Tab listing the calculation history, newest first, with a search box.
+
+  The list is drawn on a Canvas, and only the rows that are visible are
+  drawn, so scrolling through millions of entries is as quick as a few.
+  '''
+  # Height of each row of the list, in pixels
+  row_height = 22
+  # Chars of an entry that are shown, long expressions are cut off
+  text_limit = 200
+  # Most search results that are listed
+  search_limit = 10000
+
+  def __init__(self, root, frame, history, recall=None):
+    '''
+    Initialize the pane in frame, listing the entries of history. recall is
+    called with an entry's expression when it is double clicked.
+    '''
+    self.root = root
+    self.frame = frame
+    self.history = history
+    self.recall = recall
+    # Entry numbers matching the search, newest first, or None to list
+    # every entry without building a list of them
+    self.matches = None
+    # Row shown at the top of the list
+    self.top = 0
+
+    self.frame.columnconfigure(0, weight=1)
+    self.frame.rowconfigure(1, weight=1)
+    # Search box, with an option to only match the start of entries
+    frm_search = tk.Frame(self.frame)
+    frm_search.grid(row=0, columnspan=2, sticky=tk.E+tk.W)
+    tk.Label(frm_search, text="Search:").pack(side=tk.LEFT)
+    self.search = StringVar()
+    self.search.trace_add("write", lambda *args: self.refresh())
+    tk.Entry(frm_search, textvariable=self.search).pack(side=tk.LEFT, expand=1, fill=tk.X)
+    self.prefix = tk.BooleanVar(value=False)
+    tk.Checkbutton(frm_search, text="Starts with", variable=self.prefix,
+                   command=self.refresh).pack(side=tk.LEFT)
+
+    # The list, and its scrollbar which is driven by hand as the Canvas
+    # only ever holds the visible rows
+    self.canvas = tk.Canvas(self.frame, background="white", highlightthickness=0)
+    self.canvas.grid(row=1, column=0, sticky=tk.N+tk.S+tk.E+tk.W)
+    self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+    self.scrollbar.grid(row=1, column=1, sticky=tk.N+tk.S)
+    self.canvas.bind("<Configure>", lambda event: self.render())
+    self.canvas.bind("<MouseWheel>", lambda event: self.scroll(-event.delta // 120))
+    self.canvas.bind("<Button-4>", lambda event: self.scroll(-3))
+    self.canvas.bind("<Button-5>", lambda event: self.scroll(3))
+    self.canvas.bind("<Double-Button-1>", self.double_click)
+    # Entries may have been added while another tab was shown
+    self.frame.bind("<Map>", lambda event: self.refresh())
+    self.refresh()
+
+
+  @property
+  def row_count(self):
+    '''Number of rows in the list'''
+    return len(self.history) if self.matches is None else len(self.matches)
+
+
+  @property
+  def visible_rows(self):
+    '''Number of rows that fit in the list'''
+    return max(1, self.canvas.winfo_height() // self.row_height)
+
+
+  def entry_number(self, row):
+    '''Return the number of the history entry shown in a row'''
+    if self.matches is None:
+      return len(self.history) - 1 - row
+    return self.matches[row]
+
+
+  def refresh(self):
+    '''Search the history again and redraw the list from the top'''
+    text = self.search.get()
+    if text == "":
+      self.matches = None
+    else:
+      self.matches = self.history.search(text, self.search_limit, self.prefix.get())
+    self.top = 0
+    self.render()
+
+
+  def render(self):
+    '''Draw the visible rows of the list, and update the scrollbar'''
+    self.canvas.delete("row")
+    count = self.row_count
+    visible = self.visible_rows
+    for row in range(self.top, min(count, self.top + visible + 1)):
+      expression, result = self.history[self.entry_number(row)]
+      text = f'{expression} = {"NaN" if result is None else result}'
+      if len(text) > self.text_limit:
+        text = text[:self.text_limit] + "..."
+      self.canvas.create_text(5, (row - self.top) * self.row_height + 2, text=text,
+                              anchor=tk.NW, font="Calibri 12", tags="row")
+    if count == 0:
+      self.scrollbar.set(0, 1)
+    else:
+      self.scrollbar.set(self.top / count, min(1, (self.top + visible) / count))
+
+
+  def scroll_to(self, top):
+    '''Scroll the list so that row top is at the top, as far as it can go'''
+    top = max(0, min(top, self.row_count - self.visible_rows))
+    if top != self.top:
+      self.top = top
+      self.render()
+
+
+  def scroll(self, rows):
+    '''Scroll the list by a number of rows'''
+    self.scroll_to(self.top + rows)
+
+
+  def yview(self, action, amount, units=None):
+    '''Scroll the list as the scrollbar asks'''
+    if action == "moveto":
+      self.scroll_to(round(float(amount) * self.row_count))
+    elif units == "pages":
+      self.scroll(int(amount) * self.visible_rows)
+    else:
+      self.scroll(int(amount))
+
+
+  def double_click(self, event):
+    '''Recall the expression of the row that was double clicked'''
+    row = self.top + event.y // self.row_height
+    if self.recall is not None and row < self.row_count:
+      self.recall(self.history[self.entry_number(row)][0])
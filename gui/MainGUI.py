@@ -1,32 +1,100 @@
+import importlib
+import os
 import tkinter as tk
 from tkinter import ttk
-from turtle import width
 
-from gui.BasicCalc import BasicCalc
+from calc.ExprEngine import default_engine
+from calc.History import History
+from calc.Metrics import metrics
 
-class MainGUI:
-  def __init__(self):
+# Tabs of the notebook, in order, as (text, module, class, shared) tuples.
+# A tab's module is only imported, and its class built with the root
+# window and the tab's frame, the first time the tab is selected. shared
+# names the MainGUI attributes that are passed to the class as keyword
+# arguments. Tabs without a module are left empty.
+TABS = [("Basic Calculator", "gui.BasicCalc", "BasicCalc", ("history", "recorder")),
+        ("History", "gui.HistoryPane", "HistoryPane", ("history", "recall")),
+        ("Sweep", "gui.SweepTab", "SweepTab", ()),
+        ("Plot", "gui.PlotTab", "PlotTab", ()),
+        ("Worksheet", "gui.WorksheetTab", "WorksheetTab", ()),
+        ("Units", "gui.UnitsTab", "UnitsTab", ()),
+        ("Matrix", "gui.MatrixTab", "MatrixTab", ()),
+        ("Statistics", "gui.StatisticsTab", "StatisticsTab", ()),
+        ("Roots", "gui.RootsTab", "RootsTab", ()),
+        ("Columns", "gui.ColumnsTab", "ColumnsTab", ()),
+        ("Scientific", "gui.ScientificTab", "ScientificTab", ()),
+        ("Diagnostics", "gui.DiagnosticsTab", "DiagnosticsTab", ())]
+
+# File the calculation history is kept in, between runs of the app
+HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".eng_calc_history")
 
+class MainGUI:
+  def __init__(self, recorder=None):
+    """Create the main window, recording the Basic Calculator's session with recorder if given"""
 
     # Main GUI window creation
     self.root = tk.Tk()
     self.root.geometry('600x400')
     self.root.wm_title('Engineering Calculator')
+    # History of solved expressions, shared by the tabs
+    self.history = History(HISTORY_PATH)
+    # Recorder of the Basic Calculator's button and key presses
+    self.recorder = recorder
 
     # Create tab control
-    tabCtrl = ttk.Notebook(self.root)
-    tabCtrl.pack(expand=1, fill="both")
-    # Create the tabs
-    basicCalcTab = ttk.Frame(tabCtrl)
-    tab2 = ttk.Frame(tabCtrl)
-    # Add the tabs
-    tabCtrl.add(basicCalcTab, text='Basic Calculator', padding=5)
-    tabCtrl.add(tab2, text='Tab 2')
+    self.tabCtrl = ttk.Notebook(self.root)
+    self.tabCtrl.pack(expand=1, fill="both")
+    # Create and add an empty frame for each tab, their widgets are
+    # built when they are first selected
+    self.frames = []
+    for text, module, cls, shared in TABS:
+      frame = ttk.Frame(self.tabCtrl)
+      self.tabCtrl.add(frame, text=text, padding=5)
+      self.frames.append(frame)
+    # Widget object of each tab that has been built, keyed by tab text
+    self.tabs = {}
+
+    # Build the first tab now, as it is shown at startup, and the rest
+    # when they are selected
+    self.build_tab(0)
+    self.tabCtrl.bind("<<NotebookTabChanged>>", self.tab_changed)
+
+
+  def tab_changed(self, event):
+    """Build the selected tab, if it hasn't been built yet"""
+    self.build_tab(self.tabCtrl.index("current"))
+
+
+  def build_tab(self, index):
+    """Import the module of the tab at index, and build its widget"""
+    text, module, cls, shared = TABS[index]
+    if module is None or text in self.tabs:
+      return
+    tab_class = getattr(importlib.import_module(module), cls)
+    kwargs = {name: getattr(self, name) for name in shared}
+    self.tabs[text] = tab_class(self.root, self.frames[index], **kwargs)
+
 
-    # Add the widget for each tab
-    self.basicCalc = BasicCalc(self.root, basicCalcTab)
+  def recall(self, expression):
+    """Put an expression from the history into the Basic Calculator, and switch to it"""
+    self.build_tab(0)
+    calc = self.tabs[TABS[0][0]]
+    calc.expression = expression
+    calc.refresh_display()
+    self.tabCtrl.select(0)
 
 
   def start(self):
     """Start the app GUI"""
-    self.root.mainloop()
\ No newline at end of file
+    self.root.mainloop()
+    self.history.close()
+    # The recording ends with the final display, for checking a replay of it
+    if self.recorder is not None:
+      calc = self.tabs.get(TABS[0][0])
+      if calc is None:
+        self.recorder.close()
+      else:
+        calc.process_keys()
+        self.recorder.close(calc.core.display)
+    # Save the instrumentation, if it is on and has a file to go to
+    metrics.dump(extra={ "caches": default_engine.stats })
@@ -0,0 +1,106 @@
+import time
+import tkinter as tk
+from tkinter import filedialog
+
+from calc.Matrix import LUCache, SingularMatrixError, check_rhs, parse_matrix, parse_row, read_csv
+
+# Example shown when the tab is first opened, the nodal equations of a
+# three node resistor network in siemens, with its injected currents in amps
+EXAMPLE_MATRIX = "0.3, -0.1, -0.2\n-0.1, 0.35, -0.25\n-0.2, -0.25, 0.95"
+EXAMPLE_RHS = "1, 0, 0"
+# Most entries of x that are listed
+SHOWN_ENTRIES = 200
+
+
+class MatrixTab:
+  '''
+  Tab that solves Ax = b, with A typed in or imported from a CSV file.
+  Factorizations are cached by the matrix's contents, so solving again
+  with a new b reuses the last one.
+  '''
+  def __init__(self, root, frame):
+    '''Initialize the tab in frame'''
+    self.root = root
+    self.frame = frame
+    self.cache = LUCache()
+    # Matrix imported from a CSV file, used instead of the typed one
+    # until the typed one is edited
+    self.imported = None
+    self.frame.columnconfigure(1, weight=1)
+    self.frame.rowconfigure(0, weight=1)
+    self.frame.rowconfigure(3, weight=1)
+
+    tk.Label(self.frame, text="A:").grid(row=0, column=0, sticky=tk.N+tk.W)
+    self.txt_matrix = tk.Text(self.frame, height=8, wrap=tk.NONE)
+    self.txt_matrix.insert("1.0", EXAMPLE_MATRIX)
+    self.txt_matrix.grid(row=0, column=1, sticky=tk.N+tk.S+tk.E+tk.W)
+    self.txt_matrix.bind("<<Modified>>", self.matrix_edited)
+    tk.Label(self.frame, text="b:").grid(row=1, column=0, sticky=tk.W)
+    self.ent_rhs = tk.Entry(self.frame)
+    self.ent_rhs.insert(0, EXAMPLE_RHS)
+    self.ent_rhs.grid(row=1, column=1, sticky=tk.E+tk.W)
+    self.ent_rhs.bind("<Return>", lambda event: self.solve())
+
+    frm_buttons = tk.Frame(self.frame)
+    frm_buttons.grid(row=2, column=1, sticky=tk.E)
+    tk.Button(frm_buttons, text="Import A from CSV...", command=self.import_csv).pack(side=tk.LEFT)
+    tk.Button(frm_buttons, text="Solve", command=self.solve).pack(side=tk.LEFT)
+    self.txt_result = tk.Text(self.frame, height=8, wrap=tk.WORD, background="gray95")
+    self.txt_result.grid(row=3, columnspan=2, sticky=tk.N+tk.S+tk.E+tk.W)
+    self.lbl_status = tk.Label(self.frame, anchor=tk.W)
+    self.lbl_status.grid(row=4, columnspan=2, sticky=tk.E+tk.W)
+    self.txt_matrix.edit_modified(False)
+
+
+  def matrix_edited(self, event):
+    '''Go back to the typed matrix once it is edited'''
+    if self.txt_matrix.edit_modified():
+      self.txt_matrix.edit_modified(False)
+      self.imported = None
+
+
+  def import_csv(self):
+    '''Read A from a CSV file chosen by the user'''
+    path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv"), ("All files", "*")])
+    if not path:
+      return
+    start = time.perf_counter()
+    try:
+      rows = read_csv(path)
+    except (OSError, ValueError) as error:
+      self.lbl_status.config(text=f'Error: {error}')
+      return
+    elapsed = time.perf_counter() - start
+    nonzeros = sum(len(row) for row in rows)
+    self.txt_matrix.delete("1.0", tk.END)
+    self.txt_matrix.insert("1.0", f'Imported from {path}\n({len(rows)} rows, {nonzeros} nonzeros)')
+    # Showing the import isn't an edit
+    self.txt_matrix.edit_modified(False)
+    self.imported = rows
+    self.lbl_status.config(text=f'Read {len(rows)} rows in {elapsed * 1000:.1f}ms')
+
+
+  def solve(self):
+    '''Solve Ax = b, showing x and how long it took'''
+    try:
+      rows = self.imported
+      if rows is None:
+        rows = parse_matrix(self.txt_matrix.get("1.0", tk.END))
+      b = parse_row(self.ent_rhs.get())
+      check_rhs(b, len(rows))
+      start = time.perf_counter()
+      factorization, cached = self.cache.factorize(rows)
+      x = factorization.solve(b)
+      elapsed = time.perf_counter() - start
+    except (ValueError, SingularMatrixError) as error:
+      self.lbl_status.config(text=f'Error: {error}')
+      return
+    lines = [f'x{i + 1} = {value:.10g}' for i, value in enumerate(x[:SHOWN_ENTRIES])]
+    if len(x) > SHOWN_ENTRIES:
+      lines.append(f'... and {len(x) - SHOWN_ENTRIES} more')
+    self.txt_result.delete("1.0", tk.END)
+    self.txt_result.insert("1.0", "\n".join(lines))
+    storage = "sparse" if factorization.sparse else "dense"
+    action = "reused the cached" if cached else "computed the"
+    self.lbl_status.config(text=f'Solved {len(x)} unknowns in {elapsed * 1000:.1f}ms,'
+                                f' {action} {storage} LU factorization')
@@ -0,0 +1,140 @@
+import tkinter as tk
+
+from calc.ExprEngine import ExprError
+from calc.Metrics import metrics
+from calc.Plot import Function, View, decimate
+
+# Example shown when the tab is first opened
+EXAMPLE_EXPRESSION = "x*x*x/20 - x"
+
+
+class PlotTab:
+  '''
+  Tab plotting y as an expression of x. Drag to pan and scroll to zoom,
+  the samples already taken are reused so only newly shown parts of the
+  curve are evaluated.
+  '''
+  # Factor each scroll step zooms by
+  zoom_step = 1.25
+
+  def __init__(self, root, frame):
+    '''Initialize the tab in frame'''
+    self.root = root
+    self.frame = frame
+    self.function = None
+    # The canvas's real size is set once it is shown
+    self.view = View(-10.0, 10.0, -10.0, 10.0, 400, 300)
+    # Whether a redraw is scheduled for when Tk is next idle
+    self.redraw_pending = False
+    # Line items on the canvas, reused from one redraw to the next
+    self.lines = []
+    # Pixel the mouse was last dragged to
+    self.drag_from = None
+    self.frame.columnconfigure(1, weight=1)
+    self.frame.rowconfigure(1, weight=1)
+
+    frm_input = tk.Frame(self.frame)
+    frm_input.grid(row=0, columnspan=2, sticky=tk.E+tk.W)
+    tk.Label(frm_input, text="y =").pack(side=tk.LEFT)
+    self.ent_expression = tk.Entry(frm_input)
+    self.ent_expression.insert(0, EXAMPLE_EXPRESSION)
+    self.ent_expression.pack(side=tk.LEFT, expand=1, fill=tk.X)
+    self.ent_expression.bind("<Return>", lambda event: self.plot())
+    tk.Button(frm_input, text="Plot", command=self.plot).pack(side=tk.LEFT)
+    tk.Button(frm_input, text="Fit", command=self.fit).pack(side=tk.LEFT)
+
+    self.canvas = tk.Canvas(self.frame, background="white", highlightthickness=0)
+    self.canvas.grid(row=1, columnspan=2, sticky=tk.N+tk.S+tk.E+tk.W)
+    # Axes are drawn under the curve
+    self.x_axis = self.canvas.create_line(0, 0, 0, 0, fill="gray")
+    self.y_axis = self.canvas.create_line(0, 0, 0, 0, fill="gray")
+    self.canvas.bind("<Configure>", self.resized)
+    self.canvas.bind("<ButtonPress-1>", self.drag_start)
+    self.canvas.bind("<B1-Motion>", self.drag)
+    self.canvas.bind("<MouseWheel>", lambda event: self.zoom(event, event.delta > 0))
+    self.canvas.bind("<Button-4>", lambda event: self.zoom(event, True))
+    self.canvas.bind("<Button-5>", lambda event: self.zoom(event, False))
+    self.lbl_status = tk.Label(self.frame, anchor=tk.W)
+    self.lbl_status.grid(row=2, columnspan=2, sticky=tk.E+tk.W)
+    self.plot()
+
+
+  def plot(self):
+    '''Compile the expression and plot it, fitting the y range to it'''
+    try:
+      self.function = Function(self.ent_expression.get())
+    except ExprError as error:
+      self.function = None
+      self.lbl_status.config(text=f'Error: {error}')
+      self.schedule_redraw()
+      return
+    self.fit()
+
+
+  def fit(self):
+    '''Fit the y range to the part of the curve in view'''
+    if self.function is not None:
+      self.view.fit(self.view.sample(self.function))
+    self.schedule_redraw()
+
+
+  def schedule_redraw(self):
+    '''Redraw when Tk is next idle, so a burst of drags or scrolls redraws once'''
+    if not self.redraw_pending:
+      self.redraw_pending = True
+      self.root.after_idle(self.redraw)
+
+
+  @metrics.timed("plot.redraw")
+  def redraw(self):
+    '''Sample the curve in view and redraw it, reusing the canvas items'''
+    self.redraw_pending = False
+    view = self.view
+    left, top = view.to_pixel(0, 0)
+    self.canvas.coords(self.x_axis, 0, top, view.width, top)
+    self.canvas.coords(self.y_axis, left, 0, left, view.height)
+    if self.function is None:
+      lines = []
+    else:
+      evaluations = self.function.evaluations
+      points = view.sample(self.function)
+      lines = decimate(points, view)
+      self.lbl_status.config(
+        text=f'x: {view.x_min:.4g} to {view.x_max:.4g}, y: {view.y_min:.4g} to {view.y_max:.4g}'
+             f' | {len(points)} samples, {self.function.evaluations - evaluations} evaluated')
+    # Items are moved rather than recreated, and spares deleted
+    for i, coords in enumerate(lines):
+      if i < len(self.lines):
+        self.canvas.coords(self.lines[i], coords)
+      else:
+        self.lines.append(self.canvas.create_line(coords, fill="blue", width=2))
+    for item in self.lines[len(lines):]:
+      self.canvas.delete(item)
+    del self.lines[len(lines):]
+
+
+  def resized(self, event):
+    '''Keep the range shown when the canvas is resized'''
+    self.view.resize(event.width, event.height)
+    self.schedule_redraw()
+
+
+  def drag_start(self, event):
+    '''Start panning from the pixel that was clicked'''
+    self.drag_from = (event.x, event.y)
+
+
+  def drag(self, event):
+    '''Pan the view along with the mouse'''
+    if self.drag_from is None:
+      return
+    self.view.pan(event.x - self.drag_from[0], event.y - self.drag_from[1])
+    self.drag_from = (event.x, event.y)
+    self.schedule_redraw()
+
+
+  def zoom(self, event, zoom_in):
+    '''Zoom in or out one step, around the mouse'''
+    factor = self.zoom_step if zoom_in else 1 / self.zoom_step
+    self.view.zoom(factor, event.x, event.y)
+    self.schedule_redraw()
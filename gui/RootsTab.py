@@ -0,0 +1,80 @@
+import tkinter as tk
+
+from calc.ExprEngine import ExprError
+from calc.Roots import RootSolver
+
+# Example shown when the tab is first opened, Wallis's cubic with its one real root
+EXAMPLE_EQUATION = "x*x*x - 2*x = 5"
+EXAMPLE_START = "-10"
+EXAMPLE_STOP = "10"
+# Most roots that are listed
+SHOWN_ROOTS = 200
+
+
+class RootsTab:
+  '''
+  Tab that finds every real root of an equation in one unknown, like
+  "x*x = 2" or "x*x - 2", between two bounds. Solving again after moving
+  the bounds a little reuses the earlier scan and roots.
+  '''
+  def __init__(self, root, frame):
+    '''Initialize the tab in frame'''
+    self.root = root
+    self.frame = frame
+    self.solver = RootSolver()
+    self.frame.columnconfigure(1, weight=1)
+    self.frame.rowconfigure(4, weight=1)
+
+    tk.Label(self.frame, text="Equation:").grid(row=0, column=0, sticky=tk.W)
+    self.ent_equation = tk.Entry(self.frame)
+    self.ent_equation.insert(0, EXAMPLE_EQUATION)
+    self.ent_equation.grid(row=0, column=1, sticky=tk.E+tk.W)
+    tk.Label(self.frame, text="From:").grid(row=1, column=0, sticky=tk.W)
+    self.ent_start = tk.Entry(self.frame)
+    self.ent_start.insert(0, EXAMPLE_START)
+    self.ent_start.grid(row=1, column=1, sticky=tk.E+tk.W)
+    tk.Label(self.frame, text="To:").grid(row=2, column=0, sticky=tk.W)
+    self.ent_stop = tk.Entry(self.frame)
+    self.ent_stop.insert(0, EXAMPLE_STOP)
+    self.ent_stop.grid(row=2, column=1, sticky=tk.E+tk.W)
+    for entry in (self.ent_equation, self.ent_start, self.ent_stop):
+      entry.bind("<Return>", lambda event: self.solve())
+
+    frm_buttons = tk.Frame(self.frame)
+    frm_buttons.grid(row=3, column=1, sticky=tk.E)
+    # Refining in parallel only pays off for equations with many roots
+    self.parallel = tk.BooleanVar(value=False)
+    tk.Checkbutton(frm_buttons, text="Refine in parallel", variable=self.parallel).pack(side=tk.LEFT)
+    tk.Button(frm_buttons, text="Solve", command=self.solve).pack(side=tk.LEFT)
+    self.txt_roots = tk.Text(self.frame, height=8, wrap=tk.WORD, background="gray95")
+    self.txt_roots.grid(row=4, columnspan=2, sticky=tk.N+tk.S+tk.E+tk.W)
+    self.lbl_status = tk.Label(self.frame, anchor=tk.W)
+    self.lbl_status.grid(row=5, columnspan=2, sticky=tk.E+tk.W)
+
+
+  def solve(self):
+    '''Find the roots of the equation between the bounds, and show them'''
+    try:
+      start = float(self.ent_start.get())
+      stop = float(self.ent_stop.get())
+    except ValueError:
+      self.lbl_status.config(text="Error: The bounds should be numbers")
+      return
+    try:
+      result = self.solver.solve(self.ent_equation.get(), start, stop, self.parallel.get())
+    except (ExprError, ValueError) as error:
+      self.lbl_status.config(text=f'Error: {error}')
+      return
+    roots = result["roots"]
+    name = result["name"]
+    lines = [f'{name} = {root:.12g}' for root in roots[:SHOWN_ROOTS]]
+    if len(roots) > SHOWN_ROOTS:
+      lines.append(f'... and {len(roots) - SHOWN_ROOTS} more')
+    self.txt_roots.delete("1.0", tk.END)
+    self.txt_roots.insert("1.0", "\n".join(lines) if lines else "No roots in this interval")
+    if result["cached"]:
+      self.lbl_status.config(text=f'{len(roots)} roots, from the cache')
+      return
+    self.lbl_status.config(text=f'{len(roots)} roots from {result["brackets"]} sign changes'
+                                f' ({result["cached_brackets"]} cached), {result["evaluations"]:,}'
+                                f' evaluations in {result["seconds"] * 1000:.1f}ms')
@@ -0,0 +1,57 @@
+import tkinter as tk
+from tkinter import StringVar
+
+from calc.Scientific import CONSTANTS, FUNCTIONS, ScientificEngine, solve_scientific
+
+# Example shown when the tab is first opened
+EXAMPLE_EXPRESSION = "sin(pi/6)^2 + cos(pi/6)^2"
+# Text inserted by each button, in rows
+BUTTONS = [["sin(", "cos(", "tan(", "asin(", "acos(", "atan("],
+           ["ln(", "log(", "exp(", "sqrt(", "^", "!"],
+           ["pi", "e", "(", ")"]]
+
+
+class ScientificTab:
+  '''
+  Tab that evaluates expressions with functions, powers, factorials and
+  constants, like "sin(pi/6)^2", showing the result as it is typed
+  '''
+  def __init__(self, root, frame):
+    '''Initialize the tab in frame'''
+    self.root = root
+    self.frame = frame
+    self.engine = ScientificEngine()
+    self.frame.columnconfigure(0, weight=1)
+
+    self.expression = StringVar(value=EXAMPLE_EXPRESSION)
+    self.expression.trace_add("write", lambda *args: self.solve())
+    self.ent_expression = tk.Entry(self.frame, textvariable=self.expression,
+                                   font=("TkDefaultFont", 14))
+    self.ent_expression.grid(row=0, sticky=tk.E+tk.W)
+    self.lbl_result = tk.Label(self.frame, anchor=tk.E, font=("TkDefaultFont", 18))
+    self.lbl_result.grid(row=1, sticky=tk.E+tk.W)
+    frm_buttons = tk.Frame(self.frame)
+    frm_buttons.grid(row=2, pady=10)
+    for row, texts in enumerate(BUTTONS):
+      for column, text in enumerate(texts):
+        tk.Button(frm_buttons, text=text.rstrip("(") or text, width=5,
+                  command=lambda text=text: self.insert(text)).grid(row=row, column=column)
+    functions = ", ".join(FUNCTIONS)
+    constants = ", ".join(CONSTANTS)
+    tk.Label(self.frame, text=f'Functions: {functions}\nConstants: {constants}\n'
+                              'Angles are in radians, and x! is the factorial (or gamma(x+1))',
+             anchor=tk.W, justify=tk.LEFT, wraplength=560).grid(row=3, sticky=tk.E+tk.W)
+    self.solve()
+
+
+  def insert(self, text):
+    '''Insert text at the cursor of the expression'''
+    self.ent_expression.insert(tk.INSERT, text)
+    self.ent_expression.focus_set()
+
+
+  def solve(self):
+    '''Show the result of the expression, or why it can't be solved'''
+    expression = self.expression.get()
+    self.lbl_result.config(text=solve_scientific(expression, self.engine)
+                           if expression.strip() else "")
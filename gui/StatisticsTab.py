@@ -0,0 +1,153 @@
+import threading
+import tkinter as tk
+from tkinter import filedialog
+
+from calc.Statistics import Statistics, add_text, parse_fields, read_file
+
+
+def format_summary(summary):
+  '''Format the summary of some statistics as lines of text'''
+  if summary["count"] == 0:
+    return "No values"
+  lines = [f'Count: {summary["count"]:,}' + (f' ({summary["skipped"]:,} skipped)'
+                                             if summary["skipped"] else ""),
+           f'Mean: {summary["mean"]:.10g}',
+           f'Std dev: {summary["stdev"]:.10g}   Variance: {summary["variance"]:.10g}',
+           f'Min: {summary["min"]:.10g}   Max: {summary["max"]:.10g}',
+           "Percentiles: " + ", ".join(f'p{fraction * 100:g} {value:.6g}'
+                                        for fraction, value in summary["percentiles"].items()),
+           f'Regression: y = {summary["slope"]:.10g} x + {summary["intercept"]:.10g}'
+           f'   r = {summary["r"]:.6g}']
+  return "\n".join(lines)
+
+
+class StatisticsTab:
+  '''
+  Tab that summarizes a data series, typed in one value (or "x, y") at a
+  time or imported from a file. The statistics are updated as each value
+  is added, without going over the earlier ones again.
+  '''
+  # How often a running import is checked for progress, in milliseconds
+  poll_interval = 100
+
+  def __init__(self, root, frame):
+    '''Initialize the tab in frame'''
+    self.root = root
+    self.frame = frame
+    self.statistics = Statistics()
+    # Thread running the current import, with its progress as (bytes read,
+    # file size) and its result once done
+    self.worker = None
+    self.progress = (0, 0)
+    self.result = None
+    self.frame.columnconfigure(1, weight=1)
+    self.frame.rowconfigure(1, weight=1)
+
+    tk.Label(self.frame, text="Value:").grid(row=0, column=0, sticky=tk.W)
+    self.ent_value = tk.Entry(self.frame)
+    self.ent_value.grid(row=0, column=1, sticky=tk.E+tk.W)
+    self.ent_value.bind("<Return>", lambda event: self.add_value())
+    # The values typed in so far, one per line, which can also be edited or
+    # pasted into and used with use_text
+    self.txt_values = tk.Text(self.frame, height=8, width=30)
+    self.txt_values.grid(row=1, column=1, sticky=tk.N+tk.S+tk.E+tk.W)
+    frm_buttons = tk.Frame(self.frame)
+    frm_buttons.grid(row=2, column=1, sticky=tk.E)
+    tk.Button(frm_buttons, text="Use typed values", command=self.use_text).pack(side=tk.LEFT)
+    self.btn_import = tk.Button(frm_buttons, text="Import file...", command=self.import_file)
+    self.btn_import.pack(side=tk.LEFT)
+    tk.Button(frm_buttons, text="Clear", command=self.clear).pack(side=tk.LEFT)
+    self.lbl_summary = tk.Label(self.frame, anchor=tk.W, justify=tk.LEFT)
+    self.lbl_summary.grid(row=3, columnspan=2, sticky=tk.E+tk.W)
+    self.show()
+
+
+  def show(self, note=None):
+    '''Show the statistics, after a note if one is given'''
+    text = format_summary(self.statistics.summary())
+    self.lbl_summary.config(text=text if note is None else f'{note}\n{text}')
+
+
+  def add_value(self):
+    '''Add the value typed in the entry, updating the statistics with only it'''
+    # The statistics belong to the import while it runs
+    if self.worker is not None:
+      return
+    text = self.ent_value.get()
+    try:
+      x, y = parse_fields(text)
+    except ValueError:
+      self.show("Error: Enter a value, or an x and a y")
+      return
+    self.statistics.add(y, x)
+    self.txt_values.insert(tk.END, text.strip() + "\n")
+    self.txt_values.see(tk.END)
+    self.ent_value.delete(0, tk.END)
+    self.show()
+
+
+  def use_text(self):
+    '''Start over from the values in the text box, e.g. after editing or pasting them'''
+    if self.worker is not None:
+      return
+    statistics = Statistics()
+    try:
+      add_text(self.txt_values.get("1.0", tk.END), statistics)
+    except ValueError as error:
+      self.show(f'Error: {error}')
+      return
+    self.statistics = statistics
+    self.show()
+
+
+  def clear(self):
+    '''Forget every value'''
+    if self.worker is not None:
+      return
+    self.statistics = Statistics()
+    self.txt_values.delete("1.0", tk.END)
+    self.show()
+
+
+  def import_file(self):
+    '''Add the values in a file chosen by the user, in the background'''
+    if self.worker is not None:
+      return
+    path = filedialog.askopenfilename(filetypes=[("CSV and text files", "*.csv *.txt"),
+                                                 ("All files", "*")])
+    if not path:
+      return
+    self.btn_import.config(state=tk.DISABLED)
+    self.progress = (0, 0)
+    self.result = None
+    self.worker = threading.Thread(target=self.run, args=(path,), daemon=True)
+    self.worker.start()
+    self.root.after(self.poll_interval, self.poll)
+
+
+  def run(self, path):
+    '''Import a file into the statistics, keeping the number of lines skipped or the error raised'''
+    def progress(done, size):
+      self.progress = (done, size)
+    try:
+      self.result = read_file(path, self.statistics, progress=progress)
+    except (OSError, ValueError) as error:
+      self.result = error
+
+
+  def poll(self):
+    '''Show the progress of the import, or its result once it is done'''
+    if self.worker.is_alive():
+      done, size = self.progress
+      if size:
+        self.lbl_summary.config(text=f'Importing... {done / size:.0%} of {size / 1e6:,.1f}MB')
+      self.root.after(self.poll_interval, self.poll)
+      return
+    self.worker = None
+    self.btn_import.config(state=tk.NORMAL)
+    if isinstance(self.result, Exception):
+      self.show(f'Error: {self.result}')
+    elif self.result:
+      self.show(f'Skipped {self.result:,} lines that weren\'t numbers')
+    else:
+      self.show()
@@ -0,0 +1,108 @@
+import threading
+import tkinter as tk
+
+from calc.ExprEngine import ExprError
+from calc.Sweep import numpy, parse_bindings, sweep
+
+# Example shown when the tab is first opened
+EXAMPLE_EXPRESSION = "x * y - 2 * x"
+EXAMPLE_BINDINGS = "x = -10:10:1001\ny = 0, 0.5, 1, 2"
+
+
+def format_point(values):
+  '''Format the variable values at a point of a sweep, e.g. "x=1, y=2"'''
+  return ", ".join(f'{name}={value:.6g}' for name, value in values.items())
+
+
+class SweepTab:
+  '''
+  Tab that evaluates an expression over ranges of its variables, e.g.
+  "x = 0:1:1001" for 1001 values from 0 to 1, and summarizes the results
+  '''
+  # How often a running sweep is checked for completion, in milliseconds
+  poll_interval = 50
+  # Most points a sweep can have, so a typo can't hang the tab for minutes
+  max_points = 50_000_000
+
+  def __init__(self, root, frame):
+    '''Initialize the tab in frame'''
+    self.root = root
+    self.frame = frame
+    # Thread running the current sweep, and its result or error once done
+    self.worker = None
+    self.result = None
+    self.frame.columnconfigure(1, weight=1)
+    self.frame.rowconfigure(1, weight=1)
+
+    tk.Label(self.frame, text="Expression:").grid(row=0, column=0, sticky=tk.W)
+    self.ent_expression = tk.Entry(self.frame)
+    self.ent_expression.insert(0, EXAMPLE_EXPRESSION)
+    self.ent_expression.grid(row=0, column=1, sticky=tk.E+tk.W)
+    self.ent_expression.bind("<Return>", lambda event: self.start())
+    # One "name = start:stop:count" or "name = a, b, c" per line
+    tk.Label(self.frame, text="Variables:").grid(row=1, column=0, sticky=tk.N+tk.W)
+    self.txt_bindings = tk.Text(self.frame, height=6, width=40)
+    self.txt_bindings.insert("1.0", EXAMPLE_BINDINGS)
+    self.txt_bindings.grid(row=1, column=1, sticky=tk.N+tk.S+tk.E+tk.W)
+    self.btn_sweep = tk.Button(self.frame, text="Sweep", command=self.start)
+    self.btn_sweep.grid(row=2, column=1, sticky=tk.E)
+    self.lbl_summary = tk.Label(self.frame, anchor=tk.W, justify=tk.LEFT)
+    self.lbl_summary.grid(row=3, columnspan=2, sticky=tk.E+tk.W)
+
+
+  def start(self):
+    '''Start sweeping the expression over the variables, in the background'''
+    if self.worker is not None:
+      return
+    expression = self.ent_expression.get()
+    try:
+      bindings = parse_bindings(self.txt_bindings.get("1.0", tk.END))
+    except ValueError as error:
+      self.lbl_summary.config(text=str(error))
+      return
+    points = 1
+    for values in bindings.values():
+      points *= len(values)
+    if points > self.max_points:
+      self.lbl_summary.config(text=f'{points:,} points is too many, the most is {self.max_points:,}')
+      return
+    self.btn_sweep.config(state=tk.DISABLED)
+    self.lbl_summary.config(text=f'Sweeping {points:,} points...')
+    self.result = None
+    self.worker = threading.Thread(target=self.run, args=(expression, bindings), daemon=True)
+    self.worker.start()
+    self.root.after(self.poll_interval, self.poll)
+
+
+  def run(self, expression, bindings):
+    '''Run a sweep, keeping its summary or the error it raised'''
+    try:
+      self.result = sweep(expression, bindings)
+    except (ExprError, ValueError, RuntimeError) as error:
+      self.result = error
+
+
+  def poll(self):
+    '''Show the result of the sweep if it is done, or check again later'''
+    if self.worker.is_alive():
+      self.root.after(self.poll_interval, self.poll)
+      return
+    self.worker = None
+    self.btn_sweep.config(state=tk.NORMAL)
+    self.show(self.result)
+
+
+  def show(self, result):
+    '''Show a sweep's summary, or the error that stopped it'''
+    if isinstance(result, Exception):
+      self.lbl_summary.config(text=f'Error: {result}')
+      return
+    lines = [f'{result["points"]:,} points, {result["finite"]:,} finite']
+    if result["finite"]:
+      lines.append(f'Min: {result["min"]:.10g} at {format_point(result["min_at"])}')
+      lines.append(f'Max: {result["max"]:.10g} at {format_point(result["max_at"])}')
+      lines.append(f'Mean: {result["mean"]:.10g}')
+    method = "NumPy" if result["vectorized"] else ("lists, install NumPy to speed this up"
+                                                    if numpy is None else "lists")
+    lines.append(f'Took {result["seconds"] * 1000:.1f}ms ({method})')
+    self.lbl_summary.config(text="\n".join(lines))
@@ -0,0 +1,40 @@
+import tkinter as tk
+from tkinter import StringVar
+
+from calc.Units import PREFIXES, UNITS, UnitEngine, UnitFormatter, solve_units
+
+# Example shown when the tab is first opened
+EXAMPLE_EXPRESSION = "4.7k ohm * 2 mA"
+
+
+class UnitsTab:
+  '''
+  Tab that evaluates expressions with units, like "4.7k ohm * 2 mA",
+  showing the result in the best SI prefix as it is typed
+  '''
+  def __init__(self, root, frame):
+    '''Initialize the tab in frame'''
+    self.root = root
+    self.frame = frame
+    self.engine = UnitEngine()
+    self.formatter = UnitFormatter()
+    self.frame.columnconfigure(0, weight=1)
+
+    self.expression = StringVar(value=EXAMPLE_EXPRESSION)
+    self.expression.trace_add("write", lambda *args: self.solve())
+    tk.Entry(self.frame, textvariable=self.expression, font=("TkDefaultFont", 14)).grid(
+      row=0, sticky=tk.E+tk.W)
+    self.lbl_result = tk.Label(self.frame, anchor=tk.E, font=("TkDefaultFont", 18))
+    self.lbl_result.grid(row=1, sticky=tk.E+tk.W)
+    units = ", ".join(symbol for symbol in UNITS)
+    prefixes = ", ".join(f'{prefix} (1e{power})' for prefix, power in PREFIXES.items())
+    tk.Label(self.frame, text=f'Units: {units}\nPrefixes: {prefixes}', anchor=tk.W,
+             justify=tk.LEFT, wraplength=560).grid(row=2, sticky=tk.E+tk.W, pady=10)
+    self.solve()
+
+
+  def solve(self):
+    '''Show the result of the expression, or why it can't be solved'''
+    expression = self.expression.get()
+    self.lbl_result.config(text=solve_units(expression, self.engine, self.formatter)
+                           if expression.strip() else "")
@@ -0,0 +1,107 @@
+import tkinter as tk
+from tkinter import ttk
+
+from calc.Metrics import metrics
+from calc.ResultFormatter import default_formatter
+from calc.Worksheet import SheetText
+
+# Example shown when the tab is first opened
+EXAMPLE_SHEET = "r = 4.7e3\nc = 1e-6\ntau = r*c\nf = 1/(2*3.14159265*tau)\n"
+
+
+class WorksheetTab:
+  '''
+  Tab with a worksheet of "name = expression" lines, each of which can
+  refer to the names defined on other lines. The result of each line is
+  shown beside it, and editing a line only recomputes the lines that
+  depend on it.
+  '''
+  def __init__(self, root, frame, formatter=default_formatter):
+    '''Initialize the tab in frame, formatting results with formatter'''
+    self.root = root
+    self.frame = frame
+    self.formatter = formatter
+    self.sheet = SheetText()
+    # Whether a sync is scheduled for when Tk is next idle
+    self.sync_pending = False
+    self.frame.columnconfigure(0, weight=2)
+    self.frame.columnconfigure(1, weight=1)
+    self.frame.rowconfigure(0, weight=1)
+
+    self.txt_sheet = tk.Text(self.frame, width=40, wrap=tk.NONE, undo=True)
+    self.txt_sheet.grid(row=0, column=0, sticky=tk.N+tk.S+tk.E+tk.W)
+    # Results are shown line for line beside the sheet, and can't be edited
+    self.txt_results = tk.Text(self.frame, width=24, wrap=tk.NONE, background="gray95",
+                               state=tk.DISABLED)
+    self.txt_results.grid(row=0, column=1, sticky=tk.N+tk.S+tk.E+tk.W)
+    # Both scroll together, the sheet leading
+    self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+    self.scrollbar.grid(row=0, column=2, sticky=tk.N+tk.S)
+    self.txt_sheet.config(yscrollcommand=self.scrolled)
+    self.txt_results.config(yscrollcommand=lambda first, last: None)
+    self.lbl_status = tk.Label(self.frame, anchor=tk.W)
+    self.lbl_status.grid(row=1, columnspan=3, sticky=tk.E+tk.W)
+
+    self.txt_sheet.bind("<<Modified>>", self.modified)
+    self.txt_sheet.insert("1.0", EXAMPLE_SHEET)
+
+
+  def yview(self, *args):
+    '''Scroll the sheet and results together, from the scrollbar'''
+    self.txt_sheet.yview(*args)
+    self.txt_results.yview(*args)
+
+
+  def scrolled(self, first, last):
+    '''Keep the scrollbar and results in step with the sheet'''
+    self.scrollbar.set(first, last)
+    self.txt_results.yview_moveto(first)
+
+
+  def modified(self, event):
+    '''Sync the worksheet when Tk is next idle, so a burst of typing syncs once'''
+    # The flag has to be cleared for the next edit to fire the event
+    self.txt_sheet.edit_modified(False)
+    if not self.sync_pending:
+      self.sync_pending = True
+      self.root.after_idle(self.sync)
+
+
+  def result_text(self, name):
+    '''Return the text shown beside a line defining name'''
+    if name is None:
+      return ""
+    worksheet = self.sheet.worksheet
+    error = worksheet.error(name)
+    if error is not None:
+      return f'Error: {error}'
+    try:
+      return self.formatter.format(worksheet.value(name))
+    except ValueError as error:
+      return f'Error: {error}'
+
+
+  @metrics.timed("worksheet.sync")
+  def sync(self):
+    '''Update the worksheet to the sheet's text, and redraw the results that changed'''
+    self.sync_pending = False
+    start, old_stop, new_stop, recomputed = self.sheet.update(self.txt_sheet.get("1.0", "end-1c"))
+    line_names = self.sheet.line_names
+    results = self.txt_results
+    results.config(state=tk.NORMAL)
+    # Lines of the results end in newlines, so line i is replaced by
+    # replacing the text from the start of line i to the start of line i + 1
+    results.delete(f'{start + 1}.0', f'{old_stop + 1}.0')
+    results.insert(f'{start + 1}.0', "".join(self.result_text(name) + "\n"
+                                             for name in line_names[start:new_stop]))
+    # Cells recomputed outside the edited lines are found by scanning the
+    # names, which is only needed when the edit had dependents
+    outside = set(recomputed).difference(line_names[start:new_stop])
+    if outside:
+      for i, name in enumerate(line_names):
+        if name in outside:
+          results.delete(f'{i + 1}.0', f'{i + 1}.end')
+          results.insert(f'{i + 1}.0', self.result_text(name))
+    results.config(state=tk.DISABLED)
+    results.yview_moveto(self.txt_sheet.yview()[0])
+    self.lbl_status.config(text=f'{len(self.sheet.worksheet)} cells, {len(recomputed)} recomputed')
@@ -0,0 +1,31 @@
+import argparse
+import sys
+
+
+def parse_args(args=None):
+  '''Parse the command line arguments'''
+  parser = argparse.ArgumentParser(
+    description="Engineering Calculator evaluation server. Each line sent is solved as the"
+                " Basic Calculator would, and answered with a line holding its total or NaN.")
+  where = parser.add_mutually_exclusive_group()
+  where.add_argument("--socket", metavar="PATH", help="serve on (or connect to) a Unix socket at PATH")
+  where.add_argument("--port", type=int, default=8765,
+                     help="serve on (or connect to) this localhost TCP port (default: 8765)")
+  parser.add_argument("--workers", type=int, default=None,
+                      help="number of worker processes for long expressions (default: one per CPU)")
+  parser.add_argument("--load", type=int, metavar="N",
+                      help="instead of serving, send N requests to a running server and report the rate")
+  parser.add_argument("--connections", type=int, default=4,
+                      help="with --load, number of connections to spread the requests over")
+  parser.add_argument("--window", type=int, default=256,
+                      help="with --load, most requests each connection has unanswered at a time")
+  return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+  args = parse_args()
+  from calc.Server import main_load, main_serve, parse_address
+  address = parse_address(args.socket, args.port)
+  if args.load is not None:
+    sys.exit(main_load(address, args.load, args.connections, args.window))
+  sys.exit(main_serve(address, args.workers))
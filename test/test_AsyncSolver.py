@@ -0,0 +1,67 @@
+import pytest
+from calc.AsyncSolver import AsyncSolver, DONE, TIMEOUT
+
+# An expression that takes seconds to solve, multiplying
+# hundreds of 4000 digit numbers together
+SLOW_EXPRESSION = ("9" * 4000 + "*") * 300 + "9"
+
+
+class TestSolve:
+  '''
+  Test the AsyncSolver.submit and AsyncSolver.poll functions,
+  through AsyncSolver.solve.
+
+  Excluded Test Cases:
+    1) Killing a worker stuck in a single operation
+        - there is no expression that reliably takes longer than
+          the time limit inside one operation without also taking
+          a long time to build
+  '''
+  @pytest.fixture(autouse=True)
+  def solver_fixture(self):
+    '''An AsyncSolver object with a short time limit'''
+    self.solver = AsyncSolver(time_limit=0.5)
+    yield
+    self.solver.close()
+
+  def test_solve_simple(self):
+    '''Solve a simple expression in the worker'''
+    assert self.solver.solve("3+3") == (DONE, "6")
+
+  def test_solve_invalid(self):
+    '''Solve an invalid expression in the worker'''
+    assert self.solver.solve("2/0") == (DONE, None)
+
+  def test_solve_timeout(self):
+    '''Solve an expression that takes longer than the time limit'''
+    assert self.solver.solve(SLOW_EXPRESSION) == (TIMEOUT, None)
+    # The worker keeps working after a timeout
+    assert self.solver.solve("2*3") == (DONE, "6")
+
+
+class TestCancel:
+  '''
+  Test the AsyncSolver.cancel function.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def solver_fixture(self):
+    '''An AsyncSolver object'''
+    self.solver = AsyncSolver()
+    yield
+    self.solver.close()
+
+  def test_cancel_running(self):
+    '''Cancel a solve that is in progress'''
+    self.solver.submit(SLOW_EXPRESSION)
+    self.solver.cancel()
+    assert not self.solver.busy and self.solver.poll() is None
+    # A new worker is started for the next solve
+    assert self.solver.solve("1+1") == (DONE, "2")
+
+  def test_cancel_idle(self):
+    '''Cancel when no solve is in progress'''
+    self.solver.cancel()
+    assert not self.solver.busy
@@ -430,3 +430,111 @@ class TestSolveEqn:
     self.bc_fixture.solve_eqn(None)
     assert self.bc_fixture.expression == "" and self.bc_fixture.equation.get() == " NaN " and self.bc_fixture.total_flag == False
 
+
+
+class TestCoalescing:
+  '''
+  Test that keys typed between idle cycles are processed together, with a
+  single display refresh.
+
+  Excluded Test Cases:
+    1) Coalescing while solving in the background
+        - keys are ignored while solving, which is tested through the
+          AsyncSolver tests
+  '''
+  @pytest.fixture(autouse=True)
+  def bc_fixture(self):
+    '''A simulated BasicCalc object'''
+    self.bc_fixture = BasicCalc(tk.Tk(), tk.Frame())
+
+  def press_keys(self, chars):
+    '''Simulate the user typing chars faster than the display refreshes'''
+    for char in chars:
+      event = tk.Event()
+      event.char = char
+      self.bc_fixture.key_press(event)
+
+  def test_keys_coalesced(self):
+    '''A burst of keys only schedules one refresh, which shows all of them'''
+    self.press_keys("12+34")
+    assert self.bc_fixture.equation.get() == "" and self.bc_fixture.coalesced_updates == 4
+    self.bc_fixture.root.update()
+    assert self.bc_fixture.equation.get() == "12+34" and self.bc_fixture.preview.get() == "46"
+
+  def test_keys_then_equals(self):
+    '''A queued "=" key solves the keys typed before it'''
+    self.press_keys("2*3=")
+    self.bc_fixture.root.update()
+    assert self.bc_fixture.equation.get() == "6" and self.bc_fixture.total_flag == True
+
+  def test_keys_then_button(self):
+    '''A button press processes the keys typed before it'''
+    self.press_keys("7")
+    self.bc_fixture.but_press("+")
+    self.bc_fixture.root.update()
+    assert self.bc_fixture.expression == "7+" and self.bc_fixture.equation.get() == "7+"
+
+
+class TestRecording:
+  '''
+  Test that a session recording holds exactly the keys and buttons that
+  reached the calculator.
+
+  Excluded Test Cases:
+    1) Replaying the recording
+        - covered by the Session tests
+  '''
+  class Recorder:
+    '''A recorder that keeps its events in a list'''
+    def __init__(self):
+      self.events = []
+
+    def key(self, char):
+      self.events.append(("key", char))
+
+    def button(self, button):
+      self.events.append(("button", button))
+
+  class Solver:
+    '''A background solver that stays busy once it is given an expression'''
+    busy = False
+
+    def submit(self, *args):
+      self.busy = True
+
+    def cancel(self):
+      self.busy = False
+
+  @pytest.fixture(autouse=True)
+  def bc_fixture(self):
+    '''A simulated BasicCalc object with a recorder, a stand in background solver and a log of what it applies'''
+    self.recorder = self.Recorder()
+    self.bc_fixture = BasicCalc(tk.Tk(), tk.Frame(), recorder=self.recorder)
+    self.bc_fixture.solver = self.Solver()
+    self.received = []
+    key = self.bc_fixture.core.key
+    solve_eqn = self.bc_fixture.solve_eqn
+    self.bc_fixture.core.key = lambda char: (self.received.append(("key", char)), key(char))
+    self.bc_fixture.solve_eqn = lambda event=None: (self.received.append(("key", "=")), solve_eqn(event))
+
+  def press_keys(self, chars):
+    '''Simulate the user typing chars faster than the display refreshes'''
+    for char in chars:
+      event = tk.Event()
+      event.char = char
+      self.bc_fixture.key_press(event)
+
+  def test_keys_after_background_solve(self):
+    '''Queue keys after a long expression's "=", which are dropped and so not recorded'''
+    self.bc_fixture.expression = "1+" * self.bc_fixture.inline_limit
+    self.press_keys("1=5+")
+    self.bc_fixture.process_keys()
+    assert self.bc_fixture.solving
+    assert self.recorder.events == self.received == [("key", "1"), ("key", "=")]
+
+  def test_button_after_background_solve(self):
+    '''Click a button after queued keys that start a background solve, which drops the click'''
+    self.bc_fixture.expression = "1+" * self.bc_fixture.inline_limit
+    self.press_keys("1=")
+    self.bc_fixture.but_press(7)
+    assert self.recorder.events == [("key", "1"), ("key", "=")]
@@ -0,0 +1,55 @@
+import io
+import pytest
+from calc.BatchEval import run_batch, solve_line
+
+
+class TestSolveLine:
+  '''
+  Test the BatchEval.solve_line function, which should give the
+  same totals as the calculator.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_solve_line_simple(self):
+    '''Solve a line with a simple expression'''
+    assert solve_line("3+3\n") == "6"
+
+  def test_solve_line_repeating_decimal(self):
+    '''Solve a line with a result that is rounded to 15 digits'''
+    assert solve_line("2/3\n") == "0.666666666666667"
+
+  def test_solve_line_whitespace(self):
+    '''Solve a line with whitespace around the expression'''
+    assert solve_line("  5/2 \n") == "2.5"
+
+  def test_solve_line_invalid(self):
+    '''Solve a line with an invalid expression'''
+    assert solve_line("2/0\n") == "NaN"
+
+  def test_solve_line_blank(self):
+    '''Solve a blank line'''
+    assert solve_line("\n") == ""
+
+
+class TestRunBatch:
+  '''
+  Test the BatchEval.run_batch function.
+
+  Excluded Test Cases:
+    None
+  '''
+  LINES = [f'{i}*2+1\n' for i in range(50)] + ["2+\n", "\n", "7%4\n"]
+  EXPECTED = "".join(f'{i * 2 + 1}\n' for i in range(50)) + "NaN\n\n3\n"
+
+  @pytest.mark.parametrize("workers", [1, 2])
+  def test_run_batch_in_order(self, workers):
+    '''Run a batch in chunks, with and without worker processes'''
+    output = io.StringIO()
+    count = run_batch(io.StringIO("".join(self.LINES)), output, workers, chunk_size=4)
+    assert output.getvalue() == self.EXPECTED and count == len(self.LINES)
+
+  def test_run_batch_empty(self):
+    '''Run a batch with no input'''
+    output = io.StringIO()
+    assert run_batch(io.StringIO(""), output, 1) == 0 and output.getvalue() == ""
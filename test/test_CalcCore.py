@@ -0,0 +1,658 @@
+import random
+import pytest
+from calc.CalcCore import CalcCore, solve_expression
+from calc.ExprEngine import ExprEngine, DECIMAL, FRACTION
+from calc.History import History
+from calc.ResultFormatter import ResultFormatter
+
+
+class TestPress:
+  '''
+  Test the CalcCore.press function. Since this
+  function primarily only calls other CalcCore functions,
+  which are tested elsewhere, complex test cases are not
+  required for this function.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def core_fixture(self):
+    '''A new CalcCore object'''
+    self.core = CalcCore()
+
+  def test_press_equals(self):
+    '''Simulate the user hitting the "=" button'''
+    self.core.expression = "1+1"
+    self.core.press("=")
+    assert self.core.expression == "2"
+
+  def test_press_AC(self):
+    '''Simulate the user hitting the "AC" button'''
+    self.core.expression = "1+1"
+    self.core.press("AC")
+    assert self.core.expression == ""
+
+  def test_press_negative(self):
+    '''Simulate the user hitting the "+/-" button'''
+    self.core.expression = "1+1"
+    self.core.press("+/-")
+    assert self.core.expression == "1+-1"
+
+  def test_press_number(self):
+    '''Simulate the user hitting a number button'''
+    self.core.expression = "1+"
+    self.core.press(3)
+    assert self.core.expression == "1+3"
+
+  def test_press_operator(self):
+    '''Simulate the user hitting an operator button'''
+    self.core.expression = "1"
+    self.core.press("/")
+    assert self.core.expression == "1/"
+
+
+class TestKey:
+  '''
+  Test the CalcCore.key function. Since this function
+  primarily only calls other CalcCore functions, which
+  are tested elsewhere, complex test cases are not
+  required for this function.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def core_fixture(self):
+    '''A new CalcCore object'''
+    self.core = CalcCore()
+
+  def test_key_number(self):
+    '''Simulate the user typing a number'''
+    self.core.expression = "1+"
+    self.core.key("3")
+    assert self.core.expression == "1+3" and self.core.display == "1+3"
+
+  def test_key_equals(self):
+    '''Simulate the user typing "="'''
+    self.core.expression = "1+1"
+    self.core.key("=")
+    assert self.core.expression == "2" and self.core.display == "2"
+
+  def test_key_ignored(self):
+    '''Simulate the user typing a key that isn't used by the calculator'''
+    self.core.expression = "1+1"
+    self.core.key("a")
+    self.core.key("")
+    assert self.core.expression == "1+1"
+
+
+class TestFeed:
+  '''
+  Test the CalcCore.feed function.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_feed_session(self):
+    '''Feed a full sequence of button presses'''
+    core = CalcCore()
+    core.feed([1, 2, "+", "+/-", 3, ".", 5, "=", "*", 2, "="])
+    assert core.expression == "17" and core.display == "17" and core.total_flag == True
+
+  def test_feed_clear(self):
+    '''Feed a sequence ending with the "AC" button'''
+    core = CalcCore()
+    core.feed([1, "+", 2, "AC"])
+    assert core.expression == "" and core.display == ""
+
+
+class TestChangeOperation:
+  '''
+  Test the CalcCore.change_operation function. Extra tests are
+  included to ensure the correct changes are made when dealing
+  with minus signs and negatives, as the "-" char can cause
+  issues due to possibly being either a minus sign or a negative
+  sign.
+
+  Excluded Test Cases:
+    1) Expression ending in a number or a decimal point
+        - the change_operation function is only called if the
+          expression ends with an operator
+    2) Non-operator character being passed as the replacement
+        - the change_operation function is only called when
+          the button or key pressed is an operator
+  '''
+  @pytest.fixture(autouse=True)
+  def core_fixture(self):
+    '''A new CalcCore object'''
+    self.core = CalcCore()
+
+  def test_change_same_op_no_minus_no_neg(self):
+    '''Change operation to the same operation'''
+    self.core.expression = "3+"
+    self.core.change_operation("+")
+    assert self.core.expression == "3+"
+
+  def test_change_diff_op_no_minus_no_neg(self):
+    '''Change operation to a different operation, with neither operation being a minus'''
+    self.core.expression = "3+"
+    self.core.change_operation("*")
+    assert self.core.expression == "3*"
+
+  def test_change_same_op_minus_no_neg(self):
+    '''Change operation when both are minus'''
+    self.core.expression = "3-"
+    self.core.change_operation("-")
+    assert self.core.expression == "3-"
+
+  def test_change_diff_op_minus_no_neg_1(self):
+    '''Change operation to a minus'''
+    self.core.expression = "3+"
+    self.core.change_operation("-")
+    assert self.core.expression == "3-"
+
+  def test_change_diff_op_minus_no_neg_2(self):
+    '''Change operation from a minus'''
+    self.core.expression = "3-"
+    self.core.change_operation("+")
+    assert self.core.expression == "3+"
+
+  def test_change_same_op_no_minus_neg(self):
+    '''Change operation to the same operation when there is a negative present'''
+    self.core.expression = "3+-"
+    self.core.change_operation("+")
+    assert self.core.expression == "3+-"
+
+  def test_change_diff_op_no_minus_neg(self):
+    '''Change operation to a different operation when there is a negative present'''
+    self.core.expression = "3+-"
+    self.core.change_operation("*")
+    assert self.core.expression == "3*-"
+
+  def test_change_same_op_minus_neg(self):
+    '''Change operation when both are minus and there is a negative present'''
+    self.core.expression = "3--"
+    self.core.change_operation("-")
+    assert self.core.expression == "3--"
+
+  def test_change_diff_op_minus_neg_1(self):
+    '''Change operation to a minus when there is a negative present'''
+    self.core.expression = "3+-"
+    self.core.change_operation("-")
+    assert self.core.expression == "3--"
+    
+  def test_change_diff_op_minus_neg_1(self):
+    '''Change operation from a minus when there is a negative present'''
+    self.core.expression = "3--"
+    self.core.change_operation("*")
+    assert self.core.expression == "3*-"
+
+
+class TestNegateNum:
+  '''
+  Test the CalcCore.negate_num function.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def core_fixture(self):
+    '''A new CalcCore object'''
+    self.core = CalcCore()
+
+  def test_negate_num_no_num_no_neg_1(self):
+    '''Negate the number before the number is entered (at the start of the expression) and without a negative present'''
+    self.core.expression = ""
+    self.core.negate_num()
+    assert self.core.expression == "-"
+
+  def test_negate_num_no_num_no_neg_2(self):
+    '''Negate the number before the number is entered (at the end of the expression) and without a negative present'''
+    self.core.expression = "3+"
+    self.core.negate_num()
+    assert self.core.expression == "3+-"
+
+  def test_negate_num_num_no_neg(self):
+    '''Negate the number after the number is entered and without a negative present'''
+    self.core.expression = "3"
+    self.core.negate_num()
+    assert self.core.expression == "-3"
+
+  def test_negate_num_no_num_neg_1(self):
+    '''Negate the number before the number is entered (at the start of the expression) with a negative present'''
+    self.core.expression = "-"
+    self.core.negate_num()
+    assert self.core.expression == ""
+
+  def test_negate_num_no_num_neg_2(self):
+    '''Negate the number before the number is entered (at the end of the expression) with a negative present'''
+    self.core.expression = "3+-"
+    self.core.negate_num()
+    assert self.core.expression == "3+"
+
+  def test_negate_num_num_neg(self):
+    '''Negate the number after the number is entered with a negative present'''
+    self.core.expression = "-3"
+    self.core.negate_num()
+    assert self.core.expression == "3"
+
+  def test_negate_num_decimal_after_num_no_neg(self):
+    '''Negate the number with a trailing decimal point without a negative present'''
+    self.core.expression = "3."
+    self.core.negate_num()
+    assert self.core.expression == "-3."
+
+  def test_negate_num_decimal_before_num_no_neg(self):
+    '''Negate the number with a leading decimal point without a negative present'''
+    self.core.expression = ".3"
+    self.core.negate_num()
+    assert self.core.expression == "-.3"
+
+  def test_negate_num_decimal_between_num_no_neg(self):
+    '''Negate the number with a decimal point within the number without a negative present'''
+    self.core.expression = "3.5"
+    self.core.negate_num()
+    assert self.core.expression == "-3.5"
+
+  def test_negate_num_decimal_after_num_neg(self):
+    '''Negate the number with a trailing decimal point with a negative present'''
+    self.core.expression = "-3."
+    self.core.negate_num()
+    assert self.core.expression == "3."
+
+  def test_negate_num_decimal_before_num_neg(self):
+    '''Negate the number with a leading decimal point with a negative present'''
+    self.core.expression = "-.3"
+    self.core.negate_num()
+    assert self.core.expression == ".3"
+
+  def test_negate_num_decimal_between_num_neg(self):
+    '''Negate the number with a decimal point within the number with a negative present'''
+    self.core.expression = "-3.5"
+    self.core.negate_num()
+    assert self.core.expression == "3.5"
+
+
+class TestUpdateEqn:
+  '''
+  Test the CalcCore.update_eqn function.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def core_fixture(self):
+    '''A new CalcCore object'''
+    self.core = CalcCore()
+
+  def test_update_eqn_number_1(self):
+    '''Add a number to an empty expression'''
+    self.core.expression = ""
+    self.core.update_eqn(3)
+    assert self.core.expression == "3"
+
+  def test_update_eqn_number_2(self):
+    '''Add a number to an expression that ends in a number'''
+    self.core.expression = "5"
+    self.core.update_eqn(3)
+    assert self.core.expression == "53"
+
+  def test_update_eqn_number_3(self):
+    '''Add a number to an expression that ends in an operator'''
+    self.core.expression = "5+"
+    self.core.update_eqn(3)
+    assert self.core.expression == "5+3"
+
+  def test_update_eqn_number_4(self):
+    '''Add a number to an expression that ends in a decimal'''
+    self.core.expression = "0."
+    self.core.update_eqn(3)
+    assert self.core.expression == "0.3"
+
+  def test_update_eqn_number_5(self):
+    '''Add a number to an expression that ends in a negative sign'''
+    self.core.expression = "-"
+    self.core.update_eqn(3)
+    assert self.core.expression == "-3"
+
+  def test_update_eqn_operator_1(self):
+    '''Add an operator to an empty expression'''
+    self.core.expression = ""
+    self.core.update_eqn("+")
+    assert self.core.expression == "0+"
+
+  def test_update_eqn_operator_2(self):
+    '''Add an operator to an expression that ends in a number'''
+    self.core.expression = "3"
+    self.core.update_eqn("+")
+    assert self.core.expression == "3+"
+
+  def test_update_eqn_operator_3(self):
+    '''Add an operator to an expression that ends in an operator'''
+    self.core.expression = "3*"
+    self.core.update_eqn("+")
+    assert self.core.expression == "3+"
+
+  def test_update_eqn_operator_4(self):
+    '''Add an operator to an expression that ends in a decimal'''
+    self.core.expression = "3."
+    self.core.update_eqn("+")
+    assert self.core.expression == "3.+"
+
+  def test_update_eqn_operator_5(self):
+    '''Add an operator to an expression that ends in a negative sign'''
+    self.core.expression = "3*-"
+    self.core.update_eqn("+")
+    assert self.core.expression == "3+-"
+
+  def test_update_eqn_decimal_1(self):
+    '''Add a decimal point to an empty expression'''
+    self.core.expression = ""
+    self.core.update_eqn(".")
+    assert self.core.expression == "0."
+
+  def test_update_eqn_decimal_2(self):
+    '''Add a decimal point to an expression that ends in a number'''
+    self.core.expression = "3"
+    self.core.update_eqn(".")
+    assert self.core.expression == "3."
+
+  def test_update_eqn_decimal_3(self):
+    '''Add a decimal point to an expression that ends in an operator'''
+    self.core.expression = "3+"
+    self.core.update_eqn(".")
+    assert self.core.expression == "3+0."
+
+  def test_update_eqn_decimal_4(self):
+    '''Add a decimal point to an expression that already contains a decimal point'''
+    self.core.expression = "3.3"
+    self.core.update_eqn(".")
+    assert self.core.expression == "3.3"
+
+  def test_update_eqn_decimal_5(self):
+    '''Add a decimal point to an expression that ends in a negative sign'''
+    self.core.expression = "3+-"
+    self.core.update_eqn(".")
+    assert self.core.expression == "3+-0."
+
+  def test_update_eqn_decimal_6(self):
+    '''Add a decimal point to an expression with multiple decimal numbers'''
+    self.core.expression = "3.3+6"
+    self.core.update_eqn(".")
+    assert self.core.expression == "3.3+6."
+
+  def test_update_eqn_total_flag_1(self):
+    '''Add a number to an expression that is a previous total'''
+    self.core.expression = "36"
+    self.core.total_flag = True
+    self.core.update_eqn("7")
+    assert self.core.expression == "7" and self.core.total_flag == False
+
+  def test_update_eqn_total_flag_2(self):
+    '''Add an operator to an expression that is a previous total'''
+    self.core.expression = "36"
+    self.core.total_flag = True
+    self.core.update_eqn("+")
+    assert self.core.expression == "36+" and self.core.total_flag == False
+
+  def test_update_eqn_total_flag_3(self):
+    '''Add a decimal point to an expression that is a previous total'''
+    self.core.expression = "36"
+    self.core.total_flag = True
+    self.core.update_eqn(".")
+    assert self.core.expression == "0." and self.core.total_flag == False
+
+
+class TestSolveEqn:
+  '''
+  Test the CalcCore.solve_eqn function.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def core_fixture(self):
+    '''A new CalcCore object'''
+    self.core = CalcCore()
+
+  def test_solve_eqn_empty(self):
+    '''Solve the equation when the expression is empty'''
+    self.core.expression = ""
+    self.core.solve_eqn()
+    assert self.core.expression == "" and self.core.display == "" and self.core.total_flag == False
+
+  def test_solve_eqn_simple(self):
+    '''Solve the equation when the expression is a simple integer arithmetic'''
+    self.core.expression = "3+3"
+    self.core.solve_eqn()
+    assert self.core.expression == "6" and self.core.display == "6" and self.core.total_flag == True
+
+  def test_solve_eqn_division(self):
+    '''Solve the equation when the expression is an integer division with an integer result'''
+    self.core.expression = "6/3"
+    self.core.solve_eqn()
+    assert self.core.expression == "2" and self.core.display == "2" and self.core.total_flag == True
+
+  def test_solve_eqn_division_decimal(self):
+    '''Solve the equation when the expression is an integer division with a decimal result'''
+    self.core.expression = "5/2"
+    self.core.solve_eqn()
+    assert self.core.expression == "2.5" and self.core.display == "2.5" and self.core.total_flag == True
+
+  def test_solve_eqn_division_repeating_decimal(self):
+    '''Solve the equation when the expression results in a repeating decimal that should be rounded up'''
+    self.core.expression = "2/3"
+    self.core.solve_eqn()
+    assert self.core.expression == "0.666666666666667" and self.core.display == "0.666666666666667" and self.core.total_flag == True
+
+  def test_solve_eqn_divide_by_zero(self):
+    '''Solve the equation when the expression is a division by zero'''
+    self.core.expression = "2/0"
+    self.core.solve_eqn()
+    assert self.core.expression == "" and self.core.display == " NaN " and self.core.total_flag == False
+
+  def test_solve_eqn_invalid_modulus(self):
+    '''Solve the equation when the expression is in invalid modulus operation'''
+    self.core.expression = "2%0"
+    self.core.solve_eqn()
+    assert self.core.expression == "" and self.core.display == " NaN " and self.core.total_flag == False
+
+  def test_solve_eqn_invalid_equation(self):
+    '''Solve the equation when the expression is in invalid modulus operation'''
+    self.core.expression = "2+"
+    self.core.solve_eqn()
+    assert self.core.expression == "" and self.core.display == " NaN " and self.core.total_flag == False
+
+
+
+class TestTokenBuffer:
+  '''
+  Test the CalcCore token buffer, which replaces the expression
+  string, and how it is rebuilt when the expression is set.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def core_fixture(self):
+    '''A new CalcCore object'''
+    self.core = CalcCore()
+
+  def test_expression_round_trip(self):
+    '''Set an expression and render it again'''
+    self.core.expression = "3.5*-2+-.5%4-1"
+    assert self.core.expression == "3.5*-2+-.5%4-1"
+
+  def test_expression_round_trip_invalid(self):
+    '''Set an expression the calculator wouldn't produce and render it again'''
+    self.core.expression = "3+*4--"
+    assert self.core.expression == "3+*4--"
+
+  def test_negate_num_after_minus(self):
+    '''Negate a number that comes after a minus sign'''
+    self.core.expression = "3-5"
+    self.core.negate_num()
+    assert self.core.expression == "3--5"
+
+  def test_negate_num_after_minus_neg(self):
+    '''Negate the number after a minus sign when there is a negative present'''
+    self.core.expression = "3--"
+    self.core.negate_num()
+    assert self.core.expression == "3-"
+
+  def test_decimal_tracked_per_number(self):
+    '''Add decimal points to a number typed after a decimal number'''
+    self.core.feed([3, ".", 3, "+", 6, ".", 1, "."])
+    assert self.core.expression == "3.3+6.1"
+
+  def test_display_nan_cleared(self):
+    '''Add a number after an invalid calculation'''
+    self.core.feed([2, "/", 0, "="])
+    assert self.core.display == " NaN "
+    self.core.update_eqn(4)
+    assert self.core.display == "4"
+
+  def test_long_expression(self):
+    '''Type a long expression key by key'''
+    self.core.feed([1, "+"] * 50000 + [1])
+    self.core.solve_eqn()
+    assert self.core.expression == "50001"
+
+
+class TestPreview:
+  '''
+  Test the CalcCore.preview property, which should always match
+  solving the expression so far.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def core_fixture(self):
+    '''A new CalcCore object'''
+    self.core = CalcCore()
+
+  def test_preview_single_number(self):
+    '''Preview an expression that is only a number'''
+    self.core.feed([1, 2])
+    assert self.core.preview == ""
+
+  def test_preview_precedence(self):
+    '''Preview an expression mixing addition and multiplication'''
+    self.core.feed([1, "+", 2, "*", 3])
+    assert self.core.preview == "7"
+
+  def test_preview_trailing_operator(self):
+    '''Preview an expression ending in an operator'''
+    self.core.feed([1, "+", 2, "*", 3, "-"])
+    assert self.core.preview == "7"
+
+  def test_preview_changed_operator(self):
+    '''Preview an expression after its last operator was changed'''
+    self.core.feed([8, "-", 2, "*", "/", 4])
+    assert self.core.preview == "7.5"
+
+  def test_preview_negated(self):
+    '''Preview an expression after the current number is negated'''
+    self.core.feed([8, "-", 2, "+/-"])
+    assert self.core.preview == "10"
+
+  def test_preview_divide_by_zero(self):
+    '''Preview an expression with a division by zero in it'''
+    self.core.feed([8, "/", 0, "+", 1])
+    assert self.core.preview == ""
+
+  def test_preview_set_expression(self):
+    '''Preview an expression that was set as a string'''
+    self.core.expression = "3.5*-2+-.5%4-1"
+    assert self.core.preview == "-4.5"
+
+  def test_preview_matches_solve(self):
+    '''Preview random sessions and compare against solving each step'''
+    rand = random.Random(1)
+    buttons = list(range(10)) + ["+", "-", "*", "/", "%", ".", "+/-"]
+    for _ in range(200):
+      core = CalcCore()
+      for _ in range(15):
+        core.press(rand.choice(buttons))
+        # An expression ending in an operator previews the part before it
+        expected = solve_expression(core.expression.rstrip("+-*/%")) if core.head else None
+        assert core.preview == (expected or "")
+
+  def test_preview_exponent(self):
+    '''Preview an expression with a number that has an exponent'''
+    self.core.expression = "1.5e-6*2"
+    assert self.core.expression == "1.5e-6*2" and self.core.preview == "3e-6"
+
+
+class TestSetMode:
+  '''
+  Test the CalcCore.set_mode function, and solving in each
+  precision mode.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def core_fixture(self):
+    '''A CalcCore object with its own engine'''
+    self.core = CalcCore(ExprEngine(), ResultFormatter(digits=30))
+
+  def test_set_mode_decimal(self):
+    '''Solve a sum of decimals in decimal mode'''
+    self.core.set_mode(DECIMAL, 30)
+    self.core.expression = "0.1+0.2"
+    self.core.solve_eqn()
+    assert self.core.expression == "0.3"
+
+  def test_set_mode_fraction(self):
+    '''Solve a repeating decimal in fraction mode'''
+    self.core.set_mode(FRACTION)
+    self.core.expression = "1/3*3"
+    self.core.solve_eqn()
+    assert self.core.expression == "1"
+
+  def test_set_mode_preview(self):
+    '''Change the mode part way through an expression'''
+    self.core.feed([0, ".", 1, "+", 0, ".", 2])
+    self.core.set_mode(DECIMAL, 30)
+    assert self.core.preview == "0.3"
+
+  def test_set_mode_keeps_total(self):
+    '''Change the mode while a total is displayed'''
+    self.core.feed([1, "+", 1, "="])
+    self.core.set_mode(DECIMAL, 30)
+    assert self.core.expression == "2" and self.core.total_flag == True
+
+
+class TestHistory:
+  '''
+  Test that CalcCore.set_total records solves in its history.
+
+  Excluded Test Cases:
+    1) Solves from the background solver
+        - these also go through set_total, which is tested here
+  '''
+  @pytest.fixture(autouse=True)
+  def core_fixture(self):
+    '''A CalcCore object with a session history'''
+    self.history = History()
+    self.core = CalcCore(history=self.history)
+    yield
+    self.history.close()
+
+  def test_history_solve(self):
+    '''Solve an expression, recording it and its total'''
+    self.core.feed("2*3=")
+    assert list(self.history) == [("2*3", "6")]
+
+  def test_history_invalid(self):
+    '''Solve an invalid expression, recording it without a total'''
+    self.core.feed("2/0=")
+    assert list(self.history) == [("2/0", None)]
+
+  def test_history_empty(self):
+    '''Solving an empty expression doesn't record anything'''
+    self.core.feed("=")
+    assert len(self.history) == 0
@@ -0,0 +1,115 @@
+import csv
+import io
+
+import pytest
+from calc.BatchEval import solve_line
+from calc.ColumnCalc import ColumnExpression, columns, main, run_columns, run_file
+from calc.ExprEngine import ExprError
+
+
+class TestColumns:
+  '''
+  Test finding the columns an expression uses.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_columns(self):
+    '''Find columns, in order of their index'''
+    assert columns("col10 + col2*col2") == [("col2", 1), ("col10", 9)]
+
+  @pytest.mark.parametrize("expression", ["x + col1", "col0 * 2", "col1 +"])
+  def test_invalid(self, expression):
+    '''Compile expressions with names that aren't columns, or that are incomplete'''
+    with pytest.raises(ExprError):
+      ColumnExpression(expression)
+
+
+class TestEvaluate:
+  '''
+  Test evaluating an expression over batches of rows.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_same_as_calculator(self):
+    '''Evaluate rows, giving the totals the calculator gives for the same numbers'''
+    rows = [["3", "2"], ["-12.5", "4"], ["7", "4"], ["1", "3"], ["0.1", "0.2"]]
+    expected = [solve_line(f'{a}%{b}+{a}/{b}') for a, b in rows]
+    assert ColumnExpression("col1%col2+col1/col2").evaluate(rows) == expected
+
+  def test_invalid_rows(self):
+    '''Evaluate rows with a division by zero, a field that isn't a number and a missing field'''
+    rows = [["1", "2"], ["1", "0"], ["x", "1"], ["5"], ["6", "3"]]
+    assert ColumnExpression("col1/col2").evaluate(rows) == ["0.5", "NaN", "NaN", "NaN", "2"]
+
+  def test_scientific(self):
+    '''Evaluate rows with scientific functions, with NaN outside their domain'''
+    rows = [["4", "1"], ["-4", "2"], ["9", "3"]]
+    assert ColumnExpression("sqrt(col1) * col2^2 + ln(e)").evaluate(rows) == ["3", "NaN", "28"]
+
+  def test_constant(self):
+    '''Evaluate an expression that doesn't use any column'''
+    assert ColumnExpression("2*3").evaluate([["1"], ["2"]]) == ["6", "6"]
+
+
+class TestRun:
+  '''
+  Test running an expression over a whole CSV file.
+
+  Excluded Test Cases:
+    1) Progress from stdin
+        - has no size to report progress against
+  '''
+  def test_run_columns(self):
+    '''Run over rows in several batches, with a header'''
+    infile = io.StringIO("a,b\n" + "".join(f'{i},{i * 2}\n' for i in range(10)))
+    outfile = io.StringIO()
+    counts = []
+    assert run_columns(infile, outfile, "col2-col1", True, batch_rows=4, progress=counts.append) == 10
+    lines = outfile.getvalue().splitlines()
+    assert lines[0] == "a,b,result" and lines[1:] == [f'{i},{i * 2},{i}' for i in range(10)]
+    assert counts == [4, 8, 10]
+
+  def test_run_quoted(self):
+    '''Run over rows with quoted fields, which are written back quoted'''
+    outfile = io.StringIO()
+    run_columns(io.StringIO('"a, b",2\n'), outfile, "col2*2")
+    assert outfile.getvalue() == '"a, b",2,4\n'
+
+  def test_run_file(self, tmp_path):
+    '''Run over a file, reporting progress and the rate'''
+    path = tmp_path / "in.csv"
+    path.write_text("".join(f'{i},1.5\n' for i in range(100)))
+    output = tmp_path / "out.csv"
+    progress = []
+    result = run_file("col1*col2", str(path), str(output), batch_rows=30,
+                      progress=lambda *args: progress.append(args))
+    assert result["rows"] == 100 and result["rows_per_second"] > 0
+    assert output.read_text().splitlines()[3] == "3,1.5,4.5"
+    assert [count for count, done, size in progress] == [30, 60, 90, 100]
+    assert progress[-1][1:] == (path.stat().st_size, path.stat().st_size)
+
+  def test_run_file_invalid(self, tmp_path):
+    '''Run an invalid expression, which doesn't create the output'''
+    path = tmp_path / "in.csv"
+    path.write_text("1\n")
+    with pytest.raises(ExprError):
+      run_file("col1 +", str(path), str(tmp_path / "out.csv"))
+    assert not (tmp_path / "out.csv").exists()
+
+  def test_run_file_bad_csv(self, tmp_path):
+    '''Run over a file with a field past the CSV reader's limit, whose csv.Error is left to the caller'''
+    path = tmp_path / "in.csv"
+    path.write_text("1,2\n" + "9" * (csv.field_size_limit() + 1) + ",2\n")
+    with pytest.raises(csv.Error):
+      run_file("col1+col2", str(path), str(tmp_path / "out.csv"))
+
+  @pytest.mark.parametrize("content", [None, b"1,2\n\xff\xfe,3\n", b"9" * (csv.field_size_limit() + 1)])
+  def test_main_errors(self, tmp_path, capsys, content):
+    '''Run from the command line over a missing file, a file that isn't UTF-8 and a field that's too big'''
+    path = tmp_path / "in.csv"
+    if content is not None:
+      path.write_bytes(content)
+    assert main("col1*2", str(path), str(tmp_path / "out.csv")) == 1
+    assert capsys.readouterr().err.startswith("Error: ")
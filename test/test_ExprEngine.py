@@ -0,0 +1,277 @@
+import decimal
+import random
+import fractions
+import pytest
+from calc.ExprEngine import ExprEngine, ExprError, canonicalize, compile_expr, run, tokenize, DECIMAL, FLOAT, FRACTION
+
+
+class TestTokenize:
+  '''
+  Test the ExprEngine.tokenize function.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_tokenize_numbers_and_operators(self):
+    '''Tokenize an expression with integers, decimals and operators'''
+    assert tokenize("3+.5*12.") == ["3", "+", ".5", "*", "12."]
+
+  def test_tokenize_whitespace(self):
+    '''Tokenize an expression containing whitespace'''
+    assert tokenize(" 3 +  4 ") == ["3", "+", "4"]
+
+  def test_tokenize_empty(self):
+    '''Tokenize an empty expression'''
+    assert tokenize("") == []
+
+  def test_tokenize_names(self):
+    '''Tokenize an expression with variable names'''
+    assert tokenize("x_1*2+rate") == ["x_1", "*", "2", "+", "rate"]
+
+
+class TestEvaluate:
+  '''
+  Test the ExprEngine.evaluate function. Results are compared against
+  Python's own arithmetic, since the engine replaces eval.
+
+  Excluded Test Cases:
+    1) Leading zeros (e.g. "05")
+        - eval rejects these as a syntax error, the engine reads
+          them as decimal numbers
+  '''
+  @pytest.fixture(autouse=True)
+  def engine_fixture(self):
+    '''A new ExprEngine object'''
+    self.engine = ExprEngine()
+
+  @pytest.mark.parametrize("expression", [
+    "3+3", "6/3", "5/2", "2/3", "7%3", "-7%3", "7.5%2", "2+3*4", "2*3+4",
+    "10-4-3", "100/10/5", "3--3", "3*-2", "-3.", "-.5*4", "--3", "2+-3*-4",
+    "(2+3)*4", "-(2+3)", "1.5", "+3"])
+  def test_evaluate_matches_python(self, expression):
+    '''Evaluate an expression and compare it against eval'''
+    result = self.engine.evaluate(expression)
+    expected = eval(expression)
+    assert result == expected and type(result) == type(expected)
+
+  def test_evaluate_long_chain(self):
+    '''Evaluate a chain that is too long for eval to compile'''
+    assert self.engine.evaluate("1+" * 50000 + "1") == 50001
+
+  def test_evaluate_divide_by_zero(self):
+    '''Evaluate a division by zero'''
+    with pytest.raises(ZeroDivisionError):
+      self.engine.evaluate("2/0")
+
+  @pytest.mark.parametrize("expression", ["", "2+", "*2", "2**3", "3..", "2(3)", "(2", "2)", "abs(2)"])
+  def test_evaluate_invalid(self, expression):
+    '''Evaluate an expression that isn't valid calculator input'''
+    with pytest.raises(ExprError):
+      self.engine.evaluate(expression)
+
+
+class TestCompile:
+  '''
+  Test the ExprEngine.compile function and its program cache.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_compile_cached(self):
+    '''Compiling the same expression twice returns the cached program'''
+    engine = ExprEngine()
+    assert engine.compile("1+2") is engine.compile(" 1+2 ")
+
+  def test_compile_mode_change(self):
+    '''Changing the precision mode drops programs compiled for the old mode'''
+    engine = ExprEngine()
+    engine.compile("1+2")
+    engine.set_mode(DECIMAL)
+    assert "1+2" not in engine.programs
+
+  def test_compile_cache_bounded(self):
+    '''The program cache never grows past its size limit'''
+    engine = ExprEngine(cache_size=4)
+    for i in range(10):
+      engine.compile(f'{i}+1')
+    assert len(engine.programs) == 4 and "9+1" in engine.programs and "0+1" not in engine.programs
+
+
+class TestVariables:
+  '''
+  Test compiling and running programs with variables.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_variables_run(self):
+    '''Run a program with the values of its variables'''
+    program = compile_expr("x*y-(x+1)", variables=("x", "y"))
+    assert run(program, {"x": 3, "y": 4}) == 8
+
+  def test_variables_unary(self):
+    '''Negate a variable'''
+    assert run(compile_expr("-x*2", variables=("x",)), {"x": 3}) == -6
+
+  @pytest.mark.parametrize("expression", ["z+1", "x y", "x(2)"])
+  def test_variables_invalid(self, expression):
+    '''Compile an expression with an unknown variable, or a misplaced one'''
+    with pytest.raises(ExprError):
+      compile_expr(expression, variables=("x", "y"))
+
+  def test_constants_implied_multiply(self):
+    '''A constant after an operand multiplies it, binding tighter than any operator'''
+    constants = {"k": 1000, "half": 0.5}.__getitem__
+    assert run(compile_expr("2/4 k", constants=constants)) == 0.0005
+    assert run(compile_expr("-3 k half + k", constants=constants)) == -500
+
+  def test_variables_not_in_engine(self):
+    '''The engine doesn't accept variables, as the calculator has none'''
+    with pytest.raises(ExprError, match="Unknown variable"):
+      ExprEngine().evaluate("x+1")
+
+
+class TestPrecisionModes:
+  '''
+  Test the ExprEngine.evaluate function in decimal and fraction
+  precision modes.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_decimal_exact_decimals(self):
+    '''Evaluate a sum of decimals that has a float artefact'''
+    engine = ExprEngine(mode=DECIMAL)
+    assert engine.evaluate("0.1+0.2") == decimal.Decimal("0.3")
+
+  def test_decimal_precision(self):
+    '''Evaluate a repeating decimal with a chosen precision'''
+    engine = ExprEngine(mode=DECIMAL, precision=5)
+    assert str(engine.evaluate("1/3")) == "0.33333"
+
+  def test_decimal_modulus_sign(self):
+    '''Evaluate a modulus of a negative decimal, which follows Python's sign rules'''
+    engine = ExprEngine(mode=DECIMAL)
+    assert engine.evaluate("-7.5%2") == decimal.Decimal("0.5")
+
+  def test_decimal_divide_by_zero(self):
+    '''Evaluate a division by zero in decimal mode'''
+    with pytest.raises(ZeroDivisionError):
+      ExprEngine(mode=DECIMAL).evaluate("1.5/0")
+
+  def test_fraction_exact(self):
+    '''Evaluate a repeating decimal exactly'''
+    engine = ExprEngine(mode=FRACTION)
+    assert engine.evaluate("1/3+0.5") == fractions.Fraction(5, 6)
+
+  @pytest.mark.parametrize("mode", [DECIMAL, FRACTION])
+  def test_exact_fast_path(self, mode):
+    '''Evaluate an int expression without division, which stays native'''
+    engine = ExprEngine(mode=mode)
+    program, native = engine.compile("12*-3+7%4")
+    assert native and engine.evaluate("12*-3+7%4") == -33
+
+  @pytest.mark.parametrize("expression", ["1/2", "1.5*2", "1e3+1"])
+  def test_inexact_programs(self, expression):
+    '''Expressions with division or decimals aren't evaluated natively'''
+    program, native = ExprEngine(mode=DECIMAL).compile(expression)
+    assert not native
+
+  def test_invalid_mode(self):
+    '''Set an unknown precision mode'''
+    with pytest.raises(ValueError):
+      ExprEngine().set_mode("binary")
+
+
+class TestCanonicalize:
+  '''
+  Test the canonicalize function, which gives equivalent spellings of an
+  expression the same cache key.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.mark.parametrize("expression, canonical", [
+    (" 1 + 2 ", "1+2"), ("007+00.5-0", "7+0.5-0"), ("100+0.005", "100+0.005"),
+    ("--5", "5"), ("+5", "5"), ("3---5", "3-5"), ("3*+5", "3*5"),
+    ("5-+-+3", "5--3"), ("(+-5)*-(-3)", "(-5)*-(-3)"), ("1e+5", "1e+5")])
+  def test_canonicalize(self, expression, canonical):
+    '''Put an expression in canonical form'''
+    assert canonicalize(expression) == canonical
+
+  @pytest.mark.parametrize("expression", ["1 2", "1 e5", "1 . 5", "1e-+5", "1e++5"])
+  def test_canonicalize_keeps_invalid(self, expression):
+    '''Spaces that separate parts of a number aren't dropped, so the expression stays invalid'''
+    with pytest.raises(ExprError):
+      ExprEngine().evaluate(expression)
+
+  def test_canonicalize_no_signs(self):
+    '''Leave runs of signs as they are, as in decimal mode'''
+    assert canonicalize("--05", signs=False) == "--5"
+
+  @pytest.mark.parametrize("mode", [FLOAT, DECIMAL, FRACTION])
+  def test_canonicalize_same_result(self, mode):
+    '''Random expressions evaluate the same before and after canonicalizing'''
+    rand = random.Random(0)
+    engine = ExprEngine(mode=mode, cache_size=0)
+    for i in range(200):
+      parts = []
+      for j in range(rand.randint(1, 6)):
+        parts.append(rand.choice(["", "+", "*", "-"]) if j else "")
+        parts.append("".join(rand.choice("+- ") for k in range(rand.randint(0, 3))))
+        parts.append("0" * rand.randint(0, 2) + str(rand.randint(1, 99))
+                     + rand.choice(["", ".05", ".5", "e+", "e-0", "e0"]))
+      expression = "".join(parts)
+      canonical = canonicalize(expression, mode != DECIMAL)
+      try:
+        engine.compile(expression)
+      except ExprError:
+        # An invalid expression stays invalid
+        with pytest.raises(ExprError):
+          engine.compile(canonical)
+        continue
+      assert engine.evaluate(expression) == ExprEngine(mode=mode, cache_size=0).evaluate(canonical)
+
+
+class TestResultCache:
+  '''
+  Test the ExprEngine result cache.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def engine_fixture(self):
+    '''An ExprEngine object with a small cache'''
+    self.engine = ExprEngine(cache_size=2)
+
+  def test_result_cache_hit(self):
+    '''Evaluating another spelling of an expression hits the cache'''
+    assert self.engine.evaluate("2*3") == 6 and self.engine.evaluate(" 02 * +3 ") == 6
+    assert self.engine.results.hits == 1 and self.engine.results.misses == 1
+
+  def test_result_cache_eviction(self):
+    '''The result cache never grows past its size limit'''
+    for i in range(5):
+      self.engine.evaluate(f'{i}+1')
+    assert len(self.engine.results) == 2 and self.engine.results.evictions == 3
+
+  def test_result_cache_mode_change(self):
+    '''Changing the precision mode drops results evaluated in the old mode'''
+    self.engine.evaluate("1/3")
+    self.engine.set_mode(FRACTION)
+    assert self.engine.evaluate("1/3") == fractions.Fraction(1, 3)
+
+  def test_result_cache_invalid(self):
+    '''Invalid expressions aren't cached, and raise every time'''
+    for i in range(2):
+      with pytest.raises(ZeroDivisionError):
+        self.engine.evaluate("1/0")
+    assert len(self.engine.results) == 0
+
+  def test_result_cache_stats(self):
+    '''The stats hold the counters of both caches'''
+    self.engine.evaluate("1+1")
+    self.engine.evaluate("1+1")
+    stats = self.engine.stats
+    assert stats["results"]["hit_rate"] == 0.5 and stats["programs"]["misses"] == 1
@@ -0,0 +1,109 @@
+import pytest
+from calc.History import History
+
+
+class TestAdd:
+  '''
+  Test the History.add function and reading entries back, from the ring
+  buffer and from the data file.
+
+  Excluded Test Cases:
+    1) Expressions with tabs or newlines
+        - these are never produced by the calculator
+  '''
+  @pytest.fixture(autouse=True)
+  def history_fixture(self, tmp_path):
+    '''A History object with a small ring buffer, stored in a temporary directory'''
+    self.path = str(tmp_path / "history")
+    self.history = History(self.path, capacity=3)
+    for i in range(10):
+      self.history.add(f'{i}+{i}', None if i == 5 else str(2 * i))
+    yield
+    self.history.close()
+
+  def test_add_recent(self):
+    '''Read the newest entry, which is in the ring buffer'''
+    assert self.history[-1] == ("9+9", "18") and len(self.history) == 10
+
+  def test_add_spilled(self):
+    '''Read the oldest entry, which is only in the data file'''
+    assert self.history[0] == ("0+0", "0")
+
+  def test_add_invalid(self):
+    '''Read an entry that couldn't be solved'''
+    assert self.history[5] == ("5+5", None)
+
+  def test_add_out_of_range(self):
+    '''Read an entry past the end of the history'''
+    with pytest.raises(IndexError):
+      self.history[10]
+
+  def test_add_reopen(self):
+    '''Reopen the history, which keeps every entry'''
+    self.history.close()
+    self.history = History(self.path, capacity=3)
+    assert list(self.history) == [(f'{i}+{i}', None if i == 5 else str(2 * i)) for i in range(10)]
+
+  def test_add_reopen_partial(self):
+    '''Reopen a history whose last entry was only partly written'''
+    self.history.close()
+    with open(self.path, "ab") as data:
+      data.write(b"1+")
+    with open(self.path + ".idx", "ab") as index:
+      index.write(b"\x01\x02")
+    self.history = History(self.path, capacity=3)
+    self.history.add("1+2", "3")
+    assert len(self.history) == 11 and self.history[10] == ("1+2", "3")
+    self.history.close()
+    self.history = History(self.path, capacity=3)
+    assert self.history[10] == ("1+2", "3") and self.history[9] == ("9+9", "18")
+
+
+class TestSearch:
+  '''
+  Test the History.search function.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def history_fixture(self):
+    '''A session History object with a few entries'''
+    self.history = History(capacity=2)
+    for expression, result in [("12+34", "46"), ("5*6", "30"), ("123-3", "120"),
+                               ("1/0", None), ("3.5*2", "7")]:
+      self.history.add(expression, result)
+    yield
+    self.history.close()
+
+  def test_search_substring(self):
+    '''Search for text in the middle of expressions, newest first'''
+    assert self.history.search("23") == [2]
+    assert self.history.search("*") == [4, 1]
+
+  def test_search_result(self):
+    '''Search for text in a result'''
+    assert self.history.search("120") == [2]
+
+  def test_search_prefix(self):
+    '''Search for expressions or results starting with text'''
+    assert self.history.search("12", prefix=True) == [2, 0]
+    assert self.history.search("30", prefix=True) == [1]
+
+  def test_search_limit(self):
+    '''Only the newest matches up to the limit are returned'''
+    assert self.history.search("3", limit=2) == [4, 2]
+
+  def test_search_empty(self):
+    '''Searching for nothing returns the newest entries'''
+    assert self.history.search("", limit=3) == [4, 3, 2]
+
+  def test_search_no_match(self):
+    '''Search for text that isn't in any entry'''
+    assert self.history.search("999") == []
+
+  def test_search_after_add(self):
+    '''Entries added after the index is built are found'''
+    self.history.search("123")
+    self.history.add("9123", "9123")
+    assert self.history.search("123") == [5, 2]
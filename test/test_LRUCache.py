@@ -0,0 +1,42 @@
+import pytest
+from calc.LRUCache import LRUCache
+
+
+class TestLRUCache:
+  '''
+  Test the LRUCache eviction order and counters.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def cache_fixture(self):
+    '''An LRUCache object that holds two entries'''
+    self.cache = LRUCache(2)
+
+  def test_lru_evicts_oldest(self):
+    '''The least recently used entry is evicted first'''
+    self.cache.put("a", 1)
+    self.cache.put("b", 2)
+    self.cache.get("a")
+    self.cache.put("c", 3)
+    assert "a" in self.cache and "b" not in self.cache and self.cache.evictions == 1
+
+  def test_lru_counters(self):
+    '''Lookups are counted as hits or misses'''
+    self.cache.put("a", 1)
+    assert self.cache.get("a") == 1 and self.cache.get("b", 0) == 0
+    assert self.cache.stats == { "hits": 1, "misses": 1, "evictions": 0, "hit_rate": 0.5,
+                                 "size": 1, "maxsize": 2 }
+
+  def test_lru_clear(self):
+    '''Clearing the cache doesn't count as evicting'''
+    self.cache.put("a", 1)
+    self.cache.clear()
+    assert len(self.cache) == 0 and self.cache.evictions == 0
+
+  def test_lru_no_room(self):
+    '''A cache with no room doesn't store anything'''
+    cache = LRUCache(0)
+    cache.put("a", 1)
+    assert len(cache) == 0 and cache.evictions == 0
@@ -0,0 +1,132 @@
+import io
+
+import pytest
+from calc.Matrix import (LUCache, SingularMatrixError, content_key, factorize, parse_matrix,
+                         read_csv)
+
+
+def grid_laplacian(side):
+  '''
+  Build the nodal matrix of a side x side grid of 1 ohm resistors, with
+  every node also tied to ground through 1 ohm so it isn't singular
+  '''
+  rows = []
+  for node in range(side * side):
+    row = { node: 5.0 }
+    r, c = divmod(node, side)
+    for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+      if 0 <= r + dr < side and 0 <= c + dc < side:
+        row[node + dr * side + dc] = -1.0
+      else:
+        row[node] -= 1.0
+    rows.append(row)
+  return rows
+
+
+def residual(rows, x, b):
+  '''Return the largest entry of Ax - b'''
+  return max(abs(sum(value * x[column] for column, value in row.items()) - b[i])
+             for i, row in enumerate(rows))
+
+
+class TestParse:
+  '''
+  Test reading matrices typed by hand and from CSV files.
+
+  Excluded Test Cases:
+    1) Files that can't be opened
+        - the OSError is left to the caller
+  '''
+  def test_parse_matrix(self):
+    '''Parse rows separated by commas and spaces, keeping only nonzeros'''
+    assert parse_matrix("1, 0 2\n\n0,3,0\n0 0 1") == [{0: 1.0, 2: 2.0}, {1: 3.0}, {2: 1.0}]
+
+  @pytest.mark.parametrize("text", ["1 2 3\n4 5\n6 7 8", "1 2 3\n4 5 6", "1 0\n0 1 0"])
+  def test_parse_matrix_ragged(self, text):
+    '''Parse rows with a value missing or extra, which mustn't be padded with zeros'''
+    with pytest.raises(ValueError, match="Row"):
+      parse_matrix(text)
+
+  def test_read_csv(self):
+    '''Read a CSV file, where empty fields are zero and blank lines are skipped'''
+    infile = io.StringIO("4,,1\n\n0, -2 ,0\n,,\n1,0,5\n")
+    assert read_csv(infile) == [{0: 4.0, 2: 1.0}, {1: -2.0}, {0: 1.0, 2: 5.0}]
+
+  def test_read_csv_ragged(self):
+    '''Read a CSV file with a row that has a field missing'''
+    with pytest.raises(ValueError, match="Line 3"):
+      read_csv(io.StringIO("1,0,2\n0,1,0\n3,1\n"))
+
+  def test_read_csv_bad_value(self):
+    '''Read a CSV file with a field that isn't a number'''
+    with pytest.raises(ValueError, match="Line 2"):
+      read_csv(io.StringIO("1,0\nx,1\n"))
+
+  def test_content_key(self):
+    '''Matrices with the same contents have the same key, however they were built'''
+    assert content_key([{1: 2.0, 0: 1.0}, {1: 3.0}]) == content_key(parse_matrix("1 2\n0 3"))
+    assert content_key(parse_matrix("1 2\n0 3")) != content_key(parse_matrix("1 2\n3 0"))
+
+
+class TestFactorize:
+  '''
+  Test factorizing and solving, densely and sparsely.
+
+  Excluded Test Cases:
+    1) Badly conditioned matrices
+        - partial pivoting bounds the error, but not to a testable tolerance
+  '''
+  @pytest.mark.parametrize("sparse", [False, True])
+  def test_solve(self, sparse):
+    '''Solve a system that needs pivoting, with a known solution'''
+    rows = parse_matrix("0 2 1\n1 1 1\n2 1 0")
+    x = factorize(rows, sparse).solve([7, 6, 4])
+    assert x == pytest.approx([1, 2, 3])
+
+  @pytest.mark.parametrize("sparse", [False, True])
+  def test_grid(self, sparse):
+    '''Solve the nodal equations of a resistor grid'''
+    rows = grid_laplacian(12)
+    b = [float(i % 7) for i in range(len(rows))]
+    assert residual(rows, factorize(rows, sparse).solve(b), b) < 1e-9
+
+  @pytest.mark.parametrize("sparse", [False, True])
+  def test_singular(self, sparse):
+    '''Factorize a matrix with linearly dependent rows'''
+    with pytest.raises(SingularMatrixError):
+      factorize(parse_matrix("1 2 3\n2 4 6\n0 1 1"), sparse)
+
+  def test_not_square(self):
+    '''Factorize a matrix with more columns than rows'''
+    with pytest.raises(ValueError):
+      factorize(parse_matrix("1 2 3\n4 5 6"))
+
+  def test_automatic_storage(self):
+    '''Factorize large, mostly zero matrices sparsely and small ones densely'''
+    assert factorize(grid_laplacian(10)).sparse
+    assert not factorize(parse_matrix("1 2\n3 4")).sparse
+
+
+class TestLUCache:
+  '''
+  Test reusing factorizations across solves.
+
+  Excluded Test Cases:
+    1) Eviction
+        - covered by the LRUCache tests
+  '''
+  def test_reuse(self):
+    '''Solve the same matrix twice with different right hand sides'''
+    cache = LUCache()
+    rows = grid_laplacian(10)
+    b = [1.0] * len(rows)
+    x, cached = cache.solve(rows, b)
+    assert not cached
+    x, cached = cache.solve([dict(row) for row in rows], [2.0] * len(rows))
+    assert cached and cache.stats["hits"] == 1
+    assert residual(rows, x, [2.0] * len(rows)) < 1e-9
+
+  def test_rhs_length(self):
+    '''Solve with a right hand side of the wrong length'''
+    with pytest.raises(ValueError):
+      LUCache().solve(parse_matrix("1 0\n0 1"), [1.0])
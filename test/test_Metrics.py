@@ -0,0 +1,77 @@
+import json
+import pytest
+from calc.Metrics import BUCKETS, ENV_VAR, Histogram, Metrics, from_environment
+
+
+class TestHistogram:
+  '''
+  Test the Histogram.record and Histogram.percentile functions.
+
+  Excluded Test Cases:
+    1) Negative values
+        - latencies and block counts are never negative
+  '''
+  @pytest.fixture(autouse=True)
+  def histogram_fixture(self):
+    '''A Histogram object with 90 small values and 10 big ones'''
+    self.histogram = Histogram("test")
+    for i in range(90):
+      self.histogram.record(100)
+    for i in range(10):
+      self.histogram.record(5000)
+
+  def test_histogram_counts(self):
+    '''Values are counted in the bucket of their bit length'''
+    assert self.histogram.buckets[7] == 90 and self.histogram.buckets[13] == 10
+    assert self.histogram.count == 100 and self.histogram.max == 5000
+
+  def test_histogram_percentiles(self):
+    '''Percentiles are the upper end of the bucket they fall in, or the maximum'''
+    assert self.histogram.percentile(0.5) == 127 and self.histogram.percentile(0.99) == 5000
+
+  def test_histogram_huge_value(self):
+    '''Values too big for any bucket go in the last one'''
+    self.histogram.record(2 ** 100)
+    assert self.histogram.buckets[BUCKETS - 1] == 1
+
+  def test_histogram_empty(self):
+    '''An empty histogram has no percentiles'''
+    assert Histogram("empty").summary()["p99"] == 0
+
+
+class TestTimed:
+  '''
+  Test the Metrics.timed decorator and Metrics.dump function.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_timed_disabled(self):
+    '''When disabled, functions are left as they are'''
+    func = lambda: 1
+    assert Metrics(enabled=False).timed("func")(func) is func
+
+  def test_timed_enabled(self):
+    '''When enabled, each call is recorded, including ones that raise'''
+    metrics = Metrics(enabled=True)
+    func = metrics.timed("func", blocks=True)(lambda fail: 1 / (not fail))
+    func(False)
+    with pytest.raises(ZeroDivisionError):
+      func(True)
+    assert metrics.histograms["func"].count == 2 and metrics.histograms["func.blocks"].count == 2
+
+  def test_dump(self, tmp_path):
+    '''Dump the histograms and extra data as JSON'''
+    path = tmp_path / "metrics.json"
+    metrics = Metrics(enabled=True, path=str(path))
+    metrics.record("redraw", 1500)
+    metrics.dump(extra={ "caches": {} })
+    data = json.loads(path.read_text())
+    assert data["histograms"]["redraw"]["count"] == 1 and data["caches"] == {}
+
+  @pytest.mark.parametrize("value, enabled, path", [("", False, None), ("0", False, None),
+                                                    ("1", True, None), ("out.json", True, "out.json")])
+  def test_from_environment(self, value, enabled, path):
+    '''The environment variable turns instrumentation on, and names the dump file'''
+    metrics = from_environment({ ENV_VAR: value })
+    assert metrics.enabled == enabled and metrics.path == path
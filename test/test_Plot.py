@@ -0,0 +1,139 @@
+import math
+
+import pytest
+from calc.ExprEngine import ExprError
+from calc.Plot import Function, View, decimate, power_of_two_step, sample
+
+
+class TestFunction:
+  '''
+  Test the Plot.Function class and its sample cache.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_function_evaluate(self):
+    '''Evaluate a function of x'''
+    assert Function("x*x-1")(3.0) == 8
+
+  def test_function_undefined(self):
+    '''A function is None where it divides by zero'''
+    assert Function("1/x")(0.0) is None
+
+  def test_function_scientific(self):
+    '''Evaluate a function of x with scientific functions, None outside their domain'''
+    function = Function("sin(x)^2 + sqrt(x)")
+    assert function(1.0) == pytest.approx(math.sin(1) ** 2 + 1)
+    assert function(-1.0) is None
+
+  def test_function_cached(self):
+    '''A sample is only evaluated once'''
+    function = Function("x+1")
+    function(2.0)
+    function(2.0)
+    assert function.evaluations == 1
+
+  def test_function_invalid(self):
+    '''Compile an expression using a variable other than x'''
+    with pytest.raises(ExprError):
+      Function("y+1")
+
+
+class TestSample:
+  '''
+  Test the Plot.sample function.
+
+  Excluded Test Cases:
+    1) Features narrower than the base step, which may be missed
+        - adaptive sampling only refines where the base samples show a bend
+  '''
+  def test_sample_line(self):
+    '''A straight line is only sampled at the base step and its midpoints'''
+    points = sample(Function("2*x"), 0, 4, 1.0, 1 / 64, 0.01)
+    assert [x for x, y in points] == [0, 0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4]
+
+  def test_sample_refined(self):
+    '''A curve is sampled more densely where it bends'''
+    points = sample(Function("x*x*x"), -4, 4, 1.0, 1 / 64, 0.01)
+    xs = [x for x, y in points]
+    assert xs == sorted(xs) and len(xs) == len(set(xs))
+    assert min(b - a for a, b in zip(xs, xs[1:])) < 0.1
+    assert all(y == x * x * x for x, y in points)
+
+  def test_sample_pole(self):
+    '''Undefined points are kept, so the line breaks there'''
+    points = sample(Function("1/x"), -1, 1, 0.5, 1 / 8, 0.01)
+    assert (0.0, None) in points
+
+  def test_sample_reuses_cache(self):
+    '''Panning by a fraction of the base step evaluates only the new part'''
+    function = Function("x*x")
+    sample(function, 0, 10, 1.0, 0.25, 0.1)
+    evaluations = function.evaluations
+    sample(function, 0.3, 10.3, 1.0, 0.25, 0.1)
+    assert 0 < function.evaluations - evaluations <= 4
+
+  def test_power_of_two_step(self):
+    '''Steps are rounded down to powers of two'''
+    assert power_of_two_step(0.3) == 0.25 and power_of_two_step(4) == 4
+
+
+class TestView:
+  '''
+  Test the Plot.View class.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def view_fixture(self):
+    '''A view of -10 to 10 both ways, on a 200 by 100 pixel canvas'''
+    self.view = View(-10, 10, -10, 10, 200, 100)
+
+  def test_view_pixels(self):
+    '''Convert points to pixels and back'''
+    assert self.view.to_pixel(0, 0) == (100, 50) and self.view.from_pixel(200, 0) == (10, 10)
+
+  def test_view_pan(self):
+    '''Panning moves the plane with the mouse'''
+    self.view.pan(10, 5)
+    assert (self.view.x_min, self.view.y_min) == (-11, -9)
+
+  def test_view_zoom(self):
+    '''Zooming keeps the point under the mouse in place'''
+    self.view.zoom(2, 150, 50)
+    assert (self.view.x_min, self.view.x_max, self.view.y_max) == (-2.5, 7.5, 5)
+
+  def test_view_fit(self):
+    '''Fitting leaves out a pole's extreme values'''
+    points = [(x, float(x)) for x in range(100)] + [(100, 1e9), (101, None)]
+    self.view.fit(points, margin=0)
+    assert self.view.y_min == 2 and self.view.y_max < 100
+
+
+class TestDecimate:
+  '''
+  Test the Plot.decimate function.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def view_fixture(self):
+    '''A view of 0 to 10 across 10 pixels, and 0 to 100 up 100 pixels'''
+    self.view = View(0, 10, 0, 100, 10, 100)
+
+  def test_decimate_column(self):
+    '''A column of samples within a pixel row gets a single vertex'''
+    points = [(x / 10, 50.0) for x in range(100)]
+    assert decimate(points, self.view) == [[c for column in range(10) for c in (column, 50.0)]]
+
+  def test_decimate_spike(self):
+    '''A spike within a column keeps its lowest and highest vertex'''
+    points = [(0.1, 50.0), (0.5, 90.0), (0.9, 50.0), (1.5, 50.0)]
+    assert decimate(points, self.view) == [[0, 50.0, 0, 10.0, 1, 50.0]]
+
+  def test_decimate_breaks(self):
+    '''Undefined points break the line, and lone vertices are dropped'''
+    points = [(0.5, 1.0), (1.5, 2.0), (2.5, None), (3.5, 4.0), (4.5, None)]
+    assert decimate(points, self.view) == [[0, 99.0, 1, 98.0]]
@@ -0,0 +1,96 @@
+import decimal
+import fractions
+import pytest
+from calc.ResultFormatter import ResultFormatter, ENGINEERING, FIXED, SCIENTIFIC
+
+
+class TestFormatFixed:
+  '''
+  Test the ResultFormatter.format function in fixed mode, which
+  is used for calculator totals by default.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def formatter_fixture(self):
+    '''A ResultFormatter object in fixed mode with 15 digits'''
+    self.formatter = ResultFormatter(FIXED, 15)
+
+  @pytest.mark.parametrize("value, expected", [
+    (6, "6"), (-42, "-42"), (0, "0"), (2.0, "2"), (2.5, "2.5"), (-0.5, "-0.5"),
+    (2 / 3, "0.666666666666667"), (0.1 + 0.2, "0.3"), (0.00001, "0.00001"),
+    (1e-6, "1e-6"), (-1.5e-10, "-1.5e-10"), (1e300, "1e300"), (-0.0, "0"),
+    (123456789012345, "123456789012345"), (1234567890123456, "1.23456789012346e15"),
+    (10 ** 20, "1e20"), (decimal.Decimal("0.1"), "0.1"),
+    (fractions.Fraction(1, 3), "0.333333333333333"), (fractions.Fraction(-5, 2), "-2.5")])
+  def test_format_fixed(self, value, expected):
+    '''Format a value in fixed mode'''
+    assert self.formatter.format(value) == expected
+
+  def test_format_fixed_huge_int(self):
+    '''Format an int too big to convert to a float or a string'''
+    assert self.formatter.format(-3 * 10 ** 5000) == "-3e5000"
+
+  def test_format_fixed_round_trip(self):
+    '''Format floats that fit the digit budget, which should read back the same'''
+    for value in [0.1, 2.675, 1 / 8, 123.456, 99999.00001]:
+      assert float(self.formatter.format(value)) == value
+
+  @pytest.mark.parametrize("value", [float("inf"), float("-inf"), float("nan")])
+  def test_format_non_finite(self, value):
+    '''Format a value that isn't a finite number'''
+    with pytest.raises(ValueError):
+      self.formatter.format(value)
+
+  def test_format_digit_budget(self):
+    '''Format values with a smaller digit budget'''
+    formatter = ResultFormatter(FIXED, 3)
+    assert formatter.format(2 / 3) == "0.667" and formatter.format(12345) == "1.23e4"
+
+
+class TestFormatScientific:
+  '''
+  Test the ResultFormatter.format function in scientific mode.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.mark.parametrize("value, expected", [
+    (6, "6"), (1500, "1.5e3"), (0.5, "5e-1"), (-2.5e-7, "-2.5e-7"), (0, "0")])
+  def test_format_scientific(self, value, expected):
+    '''Format a value in scientific mode'''
+    assert ResultFormatter(SCIENTIFIC).format(value) == expected
+
+
+class TestFormatEngineering:
+  '''
+  Test the ResultFormatter.format function in engineering mode.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.mark.parametrize("value, expected", [
+    (6, "6"), (15000, "15e3"), (1500000, "1.5e6"), (0.0047, "4.7e-3"),
+    (0.47, "470e-3"), (-220e-12, "-220e-12"), (999, "999")])
+  def test_format_engineering(self, value, expected):
+    '''Format a value in engineering mode'''
+    assert ResultFormatter(ENGINEERING).format(value) == expected
+
+
+class TestInit:
+  '''
+  Test the ResultFormatter constructor.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_init_invalid_mode(self):
+    '''Create a formatter with an unknown mode'''
+    with pytest.raises(ValueError):
+      ResultFormatter("hex")
+
+  def test_init_invalid_digits(self):
+    '''Create a formatter with no significant digits'''
+    with pytest.raises(ValueError):
+      ResultFormatter(FIXED, 0)
@@ -0,0 +1,116 @@
+import math
+
+import pytest
+from calc.ExprEngine import ExprError
+from calc.Roots import Equation, RootSolver, brent, parse_equation, unknown
+
+
+class TestParse:
+  '''
+  Test turning equations into expressions in one unknown.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_parse_equation(self):
+    '''Move the right hand side of an equation to the left'''
+    assert parse_equation("x*x = 2") == "(x*x )-( 2)"
+    assert parse_equation("x - 1") == "x - 1"
+
+  @pytest.mark.parametrize("text", ["x = 1 = 2", " = 2", "x ="])
+  def test_parse_equation_invalid(self, text):
+    '''Parse equations with too many or empty sides'''
+    with pytest.raises(ExprError):
+      parse_equation(text)
+
+  def test_unknown(self):
+    '''Find the one unknown of an expression'''
+    assert unknown("t*t - 3*t") == "t"
+    with pytest.raises(ExprError):
+      unknown("x + y")
+    with pytest.raises(ExprError):
+      unknown("1 + 2")
+
+  def test_unknown_scientific(self):
+    '''Find the one unknown of an expression with functions and constants, which aren't unknowns'''
+    assert unknown("sin(x) - e/pi") == "x"
+
+
+class TestBrent:
+  '''
+  Test refining a bracket with Brent's method.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_brent(self):
+    '''Refine a bracket of Wallis's cubic'''
+    f = lambda x: x * x * x - 2 * x - 5
+    root, iterations = brent(f, 2.0, 3.0, f(2.0), f(3.0))
+    assert root == pytest.approx(2.0945514815423265, abs=1e-15) and iterations < 12
+
+  def test_brent_flat(self):
+    '''Refine a bracket of a root where the function is flat, which falls back to bisection'''
+    f = lambda x: (x - 1) ** 5
+    root, iterations = brent(f, 0.0, 3.0, f(0.0), f(3.0))
+    assert root == pytest.approx(1, abs=1e-3)
+
+
+class TestSolve:
+  '''
+  Test finding every root in an interval.
+
+  Excluded Test Cases:
+    1) Roots where the function touches zero without changing sign
+        - only found when a scan point lands on them, see RootSolver.solve
+  '''
+  @pytest.fixture(autouse=True)
+  def solver_fixture(self):
+    '''A RootSolver object with one worker process'''
+    self.solver = RootSolver(workers=1)
+    yield
+    self.solver.close()
+
+  @pytest.mark.parametrize("text, roots", [
+    ("(x-1)*(x-2)*(x-3)", [1, 2, 3]),
+    ("x*x = 2", [-math.sqrt(2), math.sqrt(2)]),
+    ("t % 1 - 0.5", [-1.5, -0.5, 0.5, 1.5, 2.5]),
+    ("1/(x-0.3)", []),
+    ("x*x + 1", []),
+    ("sin(pi*x)", [-1, 0, 1, 2]),
+    ("ln(x) = 1", [math.e]),
+  ])
+  def test_solve(self, text, roots):
+    '''Solve equations with several roots, roots on scan points, jumps and poles'''
+    assert self.solver.solve(text, -2.0, 3.0)["roots"] == pytest.approx(roots, abs=1e-12)
+
+  def test_reuse(self):
+    '''Solve again after moving the interval a little, reusing the scan and brackets'''
+    first = self.solver.solve("x*x*x - 2*x - 5", -10.0, 10.0)
+    moved = self.solver.solve("x*x*x - 2*x - 5", -10.5, 10.0)
+    assert moved["roots"] == first["roots"] and moved["cached_brackets"] == 1
+    assert moved["evaluations"] < first["evaluations"] / 2
+    assert self.solver.solve("x*x*x - 2*x - 5", -10.5, 10.0)["cached"]
+
+  def test_parallel(self):
+    '''Refine many brackets in a worker process, which gives the same roots'''
+    serial = self.solver.solve("x % 0.01 - 0.004", 0.0, 1.0, scan_points=10000)
+    parallel = RootSolver(workers=1)
+    try:
+      result = parallel.solve("x % 0.01 - 0.004", 0.0, 1.0, True, scan_points=10000)
+    finally:
+      parallel.close()
+    assert len(result["roots"]) == 100 and result["roots"] == serial["roots"]
+
+  def test_invalid_interval(self):
+    '''Solve over an interval whose start isn't before its end'''
+    with pytest.raises(ValueError):
+      self.solver.solve("x", 1.0, 1.0)
+
+  def test_equation_scan_cache(self):
+    '''Scan an equation twice, evaluating only the first time'''
+    equation = Equation("x - 0.25")
+    equation.brackets(0.0, 1.0)
+    evaluations = equation.evaluations
+    roots, brackets = equation.brackets(0.0, 1.0)
+    assert roots == [0.25] and brackets == [] and equation.evaluations == evaluations + 2
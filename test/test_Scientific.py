@@ -0,0 +1,165 @@
+import math
+
+import pytest
+from calc import Scientific
+from calc.ExprEngine import PUSH, VAR, ExprError, run
+from calc.Scientific import (DomainError, ScientificEngine, compile_scientific, factorial,
+                             solve_scientific)
+from calc.Sweep import sweep
+
+
+class TestCompile:
+  '''
+  Test parsing scientific expressions and folding their constants.
+
+  Excluded Test Cases:
+    1) Implied multiplication by a function, like "2 sin(x)"
+        - a function call is only parsed where an operand is expected
+  '''
+  @pytest.mark.parametrize("expression, result", [
+    ("2^3^2", 512),
+    ("-2^2", -4),
+    ("2^-1", 0.5),
+    ("2pi^2", 2 * math.pi ** 2),
+    ("3!^2", 36),
+    ("2^3!", 64),
+    ("-3!", -6),
+    ("(1+2)!", 6),
+    ("sin(0)!", 1),
+    ("sin(pi/2)^2", 1),
+    ("sqrt(16)", 4),
+    ("log(1000) + ln(e)", 4),
+  ])
+  def test_precedence(self, expression, result):
+    '''Compile and run expressions whose result depends on precedence and associativity'''
+    assert run(compile_scientific(expression)) == pytest.approx(result)
+
+  @pytest.mark.parametrize("expression", ["sin 1", "sin(", "2 sin(1)", "foo", "sin(1,2)", "!3"])
+  def test_invalid(self, expression):
+    '''Compile expressions that aren't valid'''
+    with pytest.raises(ExprError):
+      compile_scientific(expression)
+
+  def test_fold_constant_expression(self):
+    '''Fold an expression without variables into a single number'''
+    assert compile_scientific("sqrt(2)/2 + 5! - 2^10") == ((PUSH, math.sqrt(2) / 2 + 120 - 1024),)
+
+  def test_fold_around_variable(self):
+    '''Fold the constant parts of an expression, leaving only the operations on a variable'''
+    program = compile_scientific("sqrt(2)/2 * sin(x) + 2^10", variables=("x",))
+    assert [code for code, arg in program].count(PUSH) == 2
+    assert (VAR, "x") in program
+    assert run(program, { "x": 1.0 }) == pytest.approx(math.sqrt(2) / 2 * math.sin(1) + 1024)
+
+  def test_error_not_folded(self):
+    '''Leave an operation that raises in the program, to raise when it runs'''
+    program = compile_scientific("1/0")
+    with pytest.raises(ZeroDivisionError):
+      run(program)
+
+
+class TestFunctions:
+  '''
+  Test the functions, factorial and power of the Scientific module.
+
+  Excluded Test Cases:
+    1) Complex results
+        - only real results are supported
+  '''
+  def test_factorial_int(self):
+    '''Find an exact int factorial'''
+    assert factorial(25) == math.factorial(25)
+
+  def test_factorial_float(self):
+    '''Find the factorial of a float through the gamma function'''
+    assert factorial(5.0) == 120.0
+    assert factorial(0.5) == pytest.approx(math.sqrt(math.pi) / 2)
+
+  def test_factorial_cached(self):
+    '''Reuse a cached factorial'''
+    factorial(1234)
+    hits = Scientific._factorials.stats["hits"]
+    factorial(1234)
+    assert Scientific._factorials.stats["hits"] == hits + 1
+
+  @pytest.mark.parametrize("expression, error", [
+    ("sqrt(-1)", DomainError),
+    ("ln(0)", DomainError),
+    ("(-1)!", DomainError),
+    ("gamma(0)", DomainError),
+    ("(-8)^(1/3)", DomainError),
+    ("9^9^9", OverflowError),
+    ("200.0!", OverflowError),
+  ])
+  def test_out_of_domain(self, expression, error):
+    '''Apply a function or power where it isn't defined or too large'''
+    with pytest.raises(error):
+      run(compile_scientific(expression))
+
+  def test_domain_error_is_arithmetic(self):
+    '''Raise domain errors that are treated like a division by zero'''
+    assert issubclass(DomainError, ArithmeticError)
+
+
+class TestScientificEngine:
+  '''
+  Test evaluating and formatting scientific expressions.
+
+  Excluded Test Cases:
+    1) Angles in degrees
+        - every angle is in radians
+  '''
+  @pytest.fixture(autouse=True)
+  def engine_fixture(self):
+    '''A scientific engine'''
+    self.engine = ScientificEngine()
+
+  @pytest.mark.parametrize("expression, result", [
+    ("sin(pi/6)^2 + cos(pi/6)^2", "1"),
+    ("5!", "120"),
+    ("gamma(5)", "24"),
+    ("1/0", "Error: Division by zero"),
+    ("sqrt(-4)", "Error: sqrt is undefined at -4"),
+    ("2 +", "Error: Incomplete expression"),
+  ])
+  def test_solve(self, expression, result):
+    '''Solve an expression into the text shown'''
+    assert solve_scientific(expression, self.engine) == result
+
+  def test_program_cached(self):
+    '''Compile an expression once for every spelling of it'''
+    self.engine.evaluate("sin( 1 )")
+    self.engine.evaluate("sin(1)")
+    assert self.engine.stats["hits"] == 1
+
+  def test_variables(self):
+    '''Evaluate an expression for values of a variable'''
+    assert self.engine.evaluate("x^2 + 1", { "x": 3 }) == 10
+
+  @pytest.mark.skipif(Scientific.numpy is None, reason="NumPy is not installed")
+  def test_array(self):
+    '''Evaluate an expression at an array of values, with NaN outside the domain'''
+    values = Scientific.numpy.array([-1.0, 0.0, 3.0])
+    with Scientific.numpy.errstate(all="ignore"):
+      result = self.engine.evaluate("sqrt(x) + x!", { "x": values })
+    assert math.isnan(result[0])
+    assert list(result[1:]) == pytest.approx([1, math.sqrt(3) + 6])
+
+
+class TestSweepFunctions:
+  '''
+  Test sweeping expressions with functions.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_sweep_functions(self):
+    '''Sweep an expression with functions and a power'''
+    result = sweep("sin(x)^2 + cos(x)^2", { "x": [i / 10 for i in range(50)] }, vectorized=False)
+    assert result["finite"] == 50
+    assert result["mean"] == pytest.approx(1)
+
+  def test_sweep_domain_error(self):
+    '''Count the points outside a function's domain as non-finite'''
+    result = sweep("sqrt(x)", { "x": [-1.0, 4.0, 9.0] }, vectorized=False)
+    assert (result["finite"], result["min"], result["max"]) == (2, 2, 3)
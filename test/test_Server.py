@@ -0,0 +1,126 @@
+import asyncio
+import json
+import socket
+
+import pytest
+import calc.Server
+from calc.BatchEval import solve_line
+from calc.Server import EvalServer, load_test, open_connection
+
+LINES = ["3+4*2", "-12.5/4%3", "2/0", "7%4", "", "1/3", "2+"]
+
+
+async def exchange(server, data, answers):
+  '''Send data to a server over one connection, and read answers lines back'''
+  reader, writer = await open_connection(server.address)
+  writer.write(data)
+  await writer.drain()
+  lines = [(await reader.readline()).decode() for i in range(answers)]
+  writer.close()
+  return lines
+
+
+async def serve_and(func, unix_path=None, **kwargs):
+  '''Start an EvalServer on a free port (or unix_path), call func with it, and close it'''
+  server = EvalServer(**kwargs)
+  if unix_path is None:
+    await server.start_tcp()
+  else:
+    await server.start_unix(unix_path)
+  try:
+    return await func(server)
+  finally:
+    await server.close()
+
+
+class TestServe:
+  '''
+  Test answering lines sent to the EvalServer.
+
+  Excluded Test Cases:
+    1) Clients that never read their answers
+        - stopping reading at MAX_PENDING relies on the OS socket buffers
+          filling, which depends on the platform
+  '''
+  def test_pipelined(self):
+    '''Send many lines at once, which are answered in order as the calculator would'''
+    data = "".join(line + "\n" for line in LINES * 100).encode()
+    answers = asyncio.run(serve_and(lambda server: exchange(server, data, len(LINES) * 100)))
+    assert answers == [solve_line(line) + "\n" for line in LINES * 100]
+
+  def test_last_line(self):
+    '''Send a last line without a newline before closing'''
+    async def send(server):
+      reader, writer = await open_connection(server.address)
+      writer.write(b"1+1\n2*3")
+      writer.write_eof()
+      return (await reader.read()).decode()
+    assert asyncio.run(serve_and(send)) == "2\n6\n"
+
+  def test_offloaded(self):
+    '''Send long lines, solved in a worker process, between short ones'''
+    lines = ["1+1", "+".join(["1"] * 20), "2*3", "9" * 30 + "*0", "4/2"]
+    data = "".join(line + "\n" for line in lines).encode()
+    answers = asyncio.run(serve_and(lambda server: exchange(server, data, len(lines)),
+                                    workers=1, heavy_length=20))
+    assert answers == ["2\n", "20\n", "6\n", "0\n", "2\n"]
+
+  def test_too_long(self, monkeypatch):
+    '''Send a line longer than the limit, which is answered with NaN and skipped'''
+    monkeypatch.setattr(calc.Server, "MAX_LINE_LENGTH", 100)
+    monkeypatch.setattr(calc.Server, "READ_SIZE", 64)
+    data = b"1+1\n" + b"1" * 500 + b"\n2+2\n"
+    answers = asyncio.run(serve_and(lambda server: exchange(server, data, 3)))
+    assert answers == ["2\n", "NaN\n", "4\n"]
+
+  def test_stats(self):
+    '''Ask for the stats after some requests'''
+    answers = asyncio.run(serve_and(lambda server: exchange(server, b"1+1\n2+2\n#stats\n#x\n", 4)))
+    stats = json.loads(answers[2])
+    # Lines that arrive together are counted together, commands included
+    assert stats["connections"] == 1 and stats["connection"]["requests"] == 4
+    assert answers[3] == "Error: Unknown command\n"
+
+  @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets aren't supported")
+  def test_unix_socket(self, tmp_path):
+    '''Serve on a Unix socket'''
+    path = str(tmp_path / "calc.sock")
+    answers = asyncio.run(serve_and(lambda server: exchange(server, b"5*5\n", 1), path))
+    assert answers == ["25\n"]
+
+  @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets aren't supported")
+  def test_unix_socket_replaces_stale(self, tmp_path):
+    '''Serve on a Unix socket left behind by a server that didn't close it'''
+    path = str(tmp_path / "calc.sock")
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(path)
+    stale.close()
+    answers = asyncio.run(serve_and(lambda server: exchange(server, b"5*5\n", 1), path))
+    assert answers == ["25\n"]
+
+  @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets aren't supported")
+  def test_unix_socket_not_a_socket(self, tmp_path):
+    '''Refuse to serve on a path that holds a regular file, leaving the file alone'''
+    path = tmp_path / "notes.txt"
+    path.write_text("keep me")
+    with pytest.raises(FileExistsError, match="notes.txt"):
+      asyncio.run(EvalServer().start_unix(str(path)))
+    assert path.read_text() == "keep me"
+
+
+class TestLoadTest:
+  '''
+  Test the load generator against a server.
+
+  Excluded Test Cases:
+    1) The rate measured
+        - depends on the machine
+  '''
+  def test_load_test(self):
+    '''Run a small load test over several connections'''
+    async def load(server):
+      result = await load_test(server.address, ["1+2", "3*4"], 1000, connections=4, window=16)
+      return result, server.stats()
+    result, stats = asyncio.run(serve_and(load))
+    assert result["requests"] == 1000 and result["requests_per_second"] > 0
+    assert stats["requests"] == 1000 and stats["pending"] == 0
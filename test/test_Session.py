@@ -0,0 +1,123 @@
+import io
+import pytest
+from calc.CalcCore import CalcCore
+from calc.Session import (BUTTON, KEY, SessionError, SessionRecorder, check_sessions,
+                          encode_session, find_divergence, main_replay, random_session,
+                          read_session, replay, run_sessions)
+
+
+class TestRecord:
+  '''
+  Test the SessionRecorder and read_session functions.
+
+  Excluded Test Cases:
+    1) Delays longer than the longest a record can hold
+        - these are clamped to about 71 minutes, and take that long to test
+  '''
+  def test_record_round_trip(self, tmp_path):
+    '''Record a session to a file and read it back'''
+    times = iter([0.0, 0.25, 0.5, 1.5])
+    path = tmp_path / "session.bin"
+    recorder = SessionRecorder(str(path), clock=lambda: next(times))
+    recorder.button(7)
+    recorder.key("+")
+    recorder.button("=")
+    recorder.close("7")
+    assert read_session(str(path)) == ([(0.25, BUTTON, 7), (0.25, KEY, "+"), (1.0, BUTTON, "=")], "7")
+
+  def test_record_no_trailer(self):
+    '''Read a log that was never finished, e.g. because the app was killed'''
+    outfile = io.BytesIO()
+    SessionRecorder(outfile).key("5")
+    assert read_session(io.BytesIO(outfile.getvalue()))[1] is None
+
+  def test_record_truncated(self):
+    '''Read a log that stops part way through a record'''
+    data = encode_session([(0, KEY, "5")], "5")
+    with pytest.raises(SessionError):
+      read_session(io.BytesIO(data[:-12]))
+
+  def test_record_truncated_trailer(self):
+    '''Read a log that stops part way through its trailer'''
+    data = encode_session([(0, KEY, "5")], "5")
+    with pytest.raises(SessionError):
+      read_session(io.BytesIO(data[:-3]))
+
+  def test_record_truncated_text(self):
+    '''Read a log that stops part way through a record's text, which isn't read as a shorter text'''
+    outfile = io.BytesIO()
+    SessionRecorder(outfile).button("+/-")
+    for cut in (1, 2, 3):
+      with pytest.raises(SessionError, match="Truncated"):
+        read_session(io.BytesIO(outfile.getvalue()[:-cut]))
+
+  def test_record_truncated_display(self):
+    '''Read a log that stops part way through its final display, including inside a character'''
+    data = encode_session([(0, KEY, "5")], "5\u00b2")
+    for cut in (1, 2):
+      with pytest.raises(SessionError, match="Truncated"):
+        read_session(io.BytesIO(data[:-cut]))
+
+  def test_record_invalid_text(self):
+    '''Read a log whose text isn't UTF-8'''
+    data = encode_session([(0, KEY, "5")], "5")
+    with pytest.raises(SessionError):
+      read_session(io.BytesIO(data[:-1] + b"\xff"))
+
+  def test_replay_truncated_file(self, tmp_path, capsys):
+    '''Replay a truncated log from the command line, which reports an error'''
+    path = tmp_path / "session.bin"
+    path.write_bytes(encode_session([(0, KEY, "5")], "5")[:-3])
+    assert main_replay(str(path)) == 1
+    assert "Error: Truncated session log" in capsys.readouterr().err
+
+  def test_record_not_a_log(self):
+    '''Read a file that isn't a session log'''
+    with pytest.raises(SessionError):
+      read_session(io.BytesIO(b"1+1\n"))
+
+
+class TestReplay:
+  '''
+  Test the replay function and the divergence checks.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_replay(self):
+    '''Replay a session through a new calculator core'''
+    events = [(0, BUTTON, 1), (0, KEY, "2"), (0, BUTTON, "*"), (0, KEY, "3"), (0, KEY, "=")]
+    assert replay(events).display == "36"
+
+  def test_replay_realtime(self):
+    '''Replay a session at the recorded speed'''
+    now = [0.0]
+    sleeps = []
+    def sleep(seconds):
+      sleeps.append(seconds)
+      now[0] += seconds
+    events = [(0.5, KEY, "1"), (0.25, KEY, "+"), (0, KEY, "1")]
+    core = replay(events, realtime=True, sleep=sleep, clock=lambda: now[0])
+    assert sleeps == [0.5, 0.25] and core.expression == "1+1"
+
+  def test_replay_divergence(self):
+    '''A core whose preview is wrong is caught'''
+    core = CalcCore()
+    core.feed("1+2")
+    core.preview_text = "4"
+    with pytest.raises(AssertionError):
+      find_divergence(core, 0)
+
+  def test_random_sessions(self):
+    '''Random sessions don't diverge, and round trip through the log'''
+    count, seconds, divergences = check_sessions(range(200), 40)
+    assert count == 8000 and divergences == []
+
+  def test_random_sessions_parallel(self):
+    '''Random sessions are checked across worker processes'''
+    count, seconds, divergences = run_sessions(40, 10, workers=2, chunk_size=10)
+    assert count == 400 and divergences == []
+
+  def test_random_session_reproducible(self):
+    '''The same seed gives the same session'''
+    assert random_session(5, 20) == random_session(5, 20)
@@ -0,0 +1,164 @@
+import math
+import random
+import statistics
+
+import pytest
+from calc.Statistics import (Accumulator, QuantileSketch, Regression, Statistics, add_chunk,
+                             add_text, read_file)
+
+
+class TestAccumulator:
+  '''
+  Test the one-pass mean and variance.
+
+  Excluded Test Cases:
+    1) Values whose sum overflows
+        - no measured data comes close
+  '''
+  VALUES = [1e9 + random.Random(0).gauss(0, 1) for i in range(1000)]
+
+  def test_add(self):
+    '''Add values one at a time, with a mean large next to their spread'''
+    accumulator = Accumulator()
+    for value in self.VALUES:
+      accumulator.add(value)
+    assert accumulator.mean == pytest.approx(statistics.fmean(self.VALUES), abs=1e-6)
+    assert accumulator.variance == pytest.approx(statistics.variance(self.VALUES), rel=1e-9)
+    assert (accumulator.min, accumulator.max) == (min(self.VALUES), max(self.VALUES))
+
+  def test_add_many(self):
+    '''Add values in chunks and one at a time, which gives the same result'''
+    accumulator = Accumulator()
+    accumulator.add_many(self.VALUES[:300])
+    for value in self.VALUES[300:310]:
+      accumulator.add(value)
+    accumulator.add_many(self.VALUES[310:])
+    accumulator.add_many([])
+    assert accumulator.count == len(self.VALUES)
+    assert accumulator.variance == pytest.approx(statistics.variance(self.VALUES), rel=1e-9)
+
+  def test_single_value(self):
+    '''Add one value, which has no variance'''
+    accumulator = Accumulator()
+    accumulator.add(4.0)
+    assert accumulator.mean == 4.0 and accumulator.variance == 0.0
+
+
+class TestRegression:
+  '''
+  Test the one-pass least squares line.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_line(self):
+    '''Fit points on a line, added one at a time and in a chunk'''
+    regression = Regression()
+    regression.add_many([0.0, 1.0, 2.0], [1.0, 3.0, 5.0])
+    regression.add(3.0, 7.0)
+    assert regression.slope == pytest.approx(2) and regression.intercept == pytest.approx(1)
+    assert regression.r == pytest.approx(1)
+
+  def test_vertical(self):
+    '''Fit points that all have the same x'''
+    regression = Regression()
+    regression.add_many([2.0, 2.0], [1.0, 3.0])
+    assert math.isnan(regression.slope) and math.isnan(regression.r)
+
+
+class TestQuantileSketch:
+  '''
+  Test the bounded memory percentiles.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.mark.parametrize("fraction", [0.01, 0.25, 0.5, 0.75, 0.99])
+  def test_relative_accuracy(self, fraction):
+    '''Find percentiles of values of both signs over many orders of magnitude'''
+    rand = random.Random(1)
+    values = [rand.lognormvariate(0, 3) * rand.choice((-1, 1)) for i in range(10000)]
+    sketch = QuantileSketch(0.01)
+    sketch.add_many(values)
+    exact = sorted(values)[round(fraction * (len(values) - 1))]
+    assert sketch.quantile(fraction) == pytest.approx(exact, rel=0.03)
+
+  def test_ends_and_zeros(self):
+    '''Find the min, max and median of values that are mostly zero'''
+    sketch = QuantileSketch()
+    sketch.add_many([0.0, 0.0, 0.0, -2.5, 7.0])
+    assert (sketch.quantile(0), sketch.quantile(0.5), sketch.quantile(1)) == (-2.5, 0.0, 7.0)
+
+  def test_bounded(self):
+    '''Add values over more magnitudes than the sketch has buckets for'''
+    sketch = QuantileSketch(0.01, max_buckets=100)
+    sketch.add_many([10.0 ** power for power in range(-100, 100)])
+    assert len(sketch.positive) <= 100
+    assert sketch.quantile(0.99) == pytest.approx(1e97, rel=0.02)
+
+
+class TestImport:
+  '''
+  Test adding typed values and reading data files.
+
+  Excluded Test Cases:
+    1) Files of 100M rows
+        - memory use only depends on the chunk size, which is tested
+          by reading a file in small chunks
+  '''
+  def test_add_text(self):
+    '''Add typed values, with and without an x'''
+    data = Statistics()
+    add_text("1\n\n2\n3, 9\n", data)
+    assert data.summary()["count"] == 3 and data.regression.mean_x == pytest.approx(4 / 3)
+
+  def test_add_text_invalid(self):
+    '''Add a typed line that isn't a value'''
+    with pytest.raises(ValueError, match="Line 2"):
+      add_text("1\nx\n", Statistics())
+
+  def test_skip_nonfinite(self):
+    '''Add values that aren't finite, which are skipped'''
+    data = Statistics()
+    data.add_many([1.0, math.nan, 3.0, math.inf])
+    data.add(math.nan)
+    summary = data.summary()
+    assert summary["count"] == 2 and summary["skipped"] == 3 and summary["mean"] == 2.0
+
+  @pytest.mark.parametrize("chunk_size", [7, 1 << 20])
+  def test_read_file(self, tmp_path, chunk_size):
+    '''Read a CSV file with a header and blank lines, in chunks of whole lines'''
+    path = tmp_path / "data.csv"
+    path.write_text("time,volts\n" + "".join(f'{i},{2 * i + 1}\n' for i in range(100)) + "\n")
+    data = Statistics()
+    assert read_file(path, data, chunk_size) == 1
+    summary = data.summary()
+    assert summary["count"] == 100 and summary["mean"] == 100.0
+    assert summary["slope"] == pytest.approx(2) and summary["intercept"] == pytest.approx(1)
+
+  def test_read_one_column(self, tmp_path):
+    '''Read a file of one value per line, without a final newline'''
+    path = tmp_path / "data.txt"
+    path.write_text("3\n1\n2")
+    data = Statistics()
+    read_file(path, data, 4)
+    assert (data.values.count, data.values.min, data.values.max) == (3, 1.0, 3.0)
+
+  def test_chunk_blank_line(self):
+    '''Add a chunk with a blank line, whose total number of fields still matches one per line'''
+    data = Statistics()
+    assert add_chunk(b"1\n\n2 3\n", data, 1) == 0
+    assert (data.values.count, data.values.max) == (2, 2.0)
+
+  def test_chunk_ragged_lines(self):
+    '''Add a chunk of x and y lines where a short line would shift the pairs after it'''
+    data = Statistics()
+    assert add_chunk(b"1,2\n3\n4,5,6\n", data, 2) == 1
+    assert data.values.count == 2 and data.regression.mean_x == 2.5
+
+  def test_read_empty(self, tmp_path):
+    '''Read an empty file'''
+    path = tmp_path / "empty.csv"
+    path.write_text("")
+    data = Statistics()
+    assert read_file(path, data) == 0 and len(data) == 0
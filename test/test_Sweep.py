@@ -0,0 +1,124 @@
+import pytest
+from calc import Sweep
+from calc.ExprEngine import ExprError, compile_expr
+from calc.Sweep import map_program, parse_bindings, parse_values, run_lists, sweep
+
+
+class TestParse:
+  '''
+  Test the Sweep.parse_values and Sweep.parse_bindings functions.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_parse_range(self):
+    '''Parse a range of evenly spaced values, including both ends'''
+    assert parse_values(" 0:1:5 ") == [0, 0.25, 0.5, 0.75, 1]
+
+  def test_parse_single_value_range(self):
+    '''Parse a range of a single value'''
+    assert parse_values("2:3:1") == [2]
+
+  def test_parse_list(self):
+    '''Parse a comma separated list of values'''
+    assert parse_values("1, -2.5,3e2") == [1, -2.5, 300]
+
+  @pytest.mark.parametrize("text", ["", "1:2", "0:1:0", "a,b", "1:2:3:4"])
+  def test_parse_invalid_values(self, text):
+    '''Parse values that aren't a range or list of numbers'''
+    with pytest.raises(ValueError):
+      parse_values(text)
+
+  def test_parse_bindings(self):
+    '''Parse a binding per line, skipping blank lines'''
+    assert parse_bindings("x = 1,2\n\n  y=0:1:3\n") == {"x": [1, 2], "y": [0, 0.5, 1]}
+
+  def test_parse_invalid_binding(self):
+    '''Parse a line that isn't a binding'''
+    with pytest.raises(ValueError):
+      parse_bindings("x 1,2")
+
+
+class TestSweep:
+  '''
+  Test the Sweep.sweep function, evaluating as lists and, if NumPy is
+  installed, as arrays.
+
+  Excluded Test Cases:
+    1) Sweeps too large to run quickly
+        - the benchmark covers those
+  '''
+  @pytest.fixture(autouse=True, params=[False, True], ids=["lists", "numpy"])
+  def sweep_fixture(self, request):
+    '''Whether to sweep with NumPy, skipping the NumPy tests if it isn't installed'''
+    if request.param and Sweep.numpy is None:
+      pytest.skip("NumPy is not installed")
+    self.vectorized = request.param
+
+  def test_sweep_summary(self):
+    '''Summarize a sweep over one variable'''
+    result = sweep("x*x-2*x", {"x": parse_values("-2:3:6")}, vectorized=self.vectorized)
+    assert result["points"] == result["finite"] == 6 and result["vectorized"] == self.vectorized
+    assert result["min"] == -1 and result["min_at"] == {"x": 1}
+    assert result["max"] == 8 and result["max_at"] == {"x": -2}
+    assert result["mean"] == pytest.approx(13 / 6)
+
+  def test_sweep_grid(self):
+    '''Sweep over every combination of two variables'''
+    result = sweep("x*10+y", {"x": [1, 2, 3], "y": [4, 5]}, vectorized=self.vectorized)
+    assert result["points"] == 6 and result["min"] == 14 and result["max"] == 35
+    assert result["max_at"] == {"x": 3, "y": 5} and result["mean"] == pytest.approx(24.5)
+
+  def test_sweep_chunks(self):
+    '''Sweep in chunks smaller than the grid, which give the same summary'''
+    bindings = {"x": parse_values("-1:1:101"), "y": [1, 2, 3]}
+    whole = sweep("x*y-y", bindings, vectorized=self.vectorized)
+    chunked = sweep("x*y-y", bindings, chunk_size=7, vectorized=self.vectorized)
+    for key in ("points", "finite", "min", "max", "min_at", "max_at"):
+      assert chunked[key] == whole[key]
+    assert chunked["mean"] == pytest.approx(whole["mean"])
+
+  def test_sweep_non_finite(self):
+    '''Points that divide by zero are counted, but left out of the summary'''
+    result = sweep("1/x", {"x": [-1, 0, 2, 4]}, chunk_size=2, vectorized=self.vectorized)
+    assert result["points"] == 4 and result["finite"] == 3
+    assert result["min"] == -1 and result["max"] == 0.5
+
+  def test_sweep_nothing_finite(self):
+    '''A sweep without finite results has no summary'''
+    result = sweep("x%0", {"x": [1, 2]}, vectorized=self.vectorized)
+    assert result["finite"] == 0 and result["min"] is None and result["mean"] is None
+
+  def test_sweep_constant(self):
+    '''Sweep an expression that doesn't use its variable'''
+    result = sweep("3*4", {"x": [1, 2]}, vectorized=self.vectorized)
+    assert result["points"] == 2 and result["mean"] == 12
+
+  def test_sweep_unknown_variable(self):
+    '''Sweep an expression using a variable that isn't bound'''
+    with pytest.raises(ExprError):
+      sweep("x+z", {"x": [1]}, vectorized=self.vectorized)
+
+
+class TestRunLists:
+  '''
+  Test the Sweep.run_lists function, shared by the list paths of sweeps,
+  roots and columns.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_run_lists(self):
+    '''Run a program on lists of values'''
+    program = compile_expr("x*y + 1", literal=float, variables=("x", "y"))
+    assert run_lists(program, map_program(program), { "x": [1.0, 2.0], "y": [3.0, 4.0] }, 2) == [4.0, 9.0]
+
+  def test_run_lists_division_by_zero(self):
+    '''Run a program that divides by zero at one point, which is None while the others are kept'''
+    program = compile_expr("1/x", literal=float, variables=("x",))
+    assert run_lists(program, map_program(program), { "x": [2.0, 0.0, 4.0] }, 3) == [0.5, None, 0.25]
+
+  def test_run_lists_constant(self):
+    '''Run a program without variables, whose single value is repeated'''
+    program = compile_expr("2*3", literal=float)
+    assert run_lists(program, map_program(program), {}, 3) == [6.0, 6.0, 6.0]
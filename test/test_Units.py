@@ -0,0 +1,93 @@
+import pytest
+from calc.Units import (Quantity, UnitEngine, UnitError, UnitFormatter, compile_units, dimension,
+                        exponents, lookup, solve_units)
+
+
+class TestDimensions:
+  '''
+  Test packing dimensions and resolving units.
+
+  Excluded Test Cases:
+    1) Exponents outside -128 to 127
+        - no physical quantity comes close
+  '''
+  def test_dimension_round_trip(self):
+    '''Unpack a packed dimension with negative exponents'''
+    assert exponents(dimension(2, 1, -3, -2)) == [2, 1, -3, -2, 0, 0, 0]
+
+  def test_dimension_arithmetic(self):
+    '''Adding packed dimensions adds their exponents'''
+    assert dimension(2, 1, -3, -1) - dimension(0, 0, 0, 1) == dimension(2, 1, -3, -2)
+
+  @pytest.mark.parametrize("name, value, dims", [
+    ("mA", 1e-3, [0, 0, 0, 1, 0, 0, 0]),
+    ("kg", 1.0, [0, 1, 0, 0, 0, 0, 0]),
+    ("m", 1.0, [1, 0, 0, 0, 0, 0, 0]),
+    ("k", 1e3, [0] * 7),
+    ("cm^2", 1e-4, [2, 0, 0, 0, 0, 0, 0]),
+    ("s^-1", 1.0, [0, 0, -1, 0, 0, 0, 0]),
+  ])
+  def test_lookup(self, name, value, dims):
+    '''Resolve units, prefixes and powers'''
+    unit = lookup(name)
+    assert unit.value == pytest.approx(value) and exponents(unit.dim) == dims
+
+  def test_lookup_unknown(self):
+    '''Resolve a name that isn't a unit'''
+    with pytest.raises(UnitError):
+      lookup("furlong")
+
+
+class TestUnitEngine:
+  '''
+  Test evaluating and formatting expressions with units.
+
+  Excluded Test Cases:
+    1) Temperatures in degrees Celsius
+        - only kelvin is supported, as offsets don't scale
+  '''
+  @pytest.fixture(autouse=True)
+  def engine_fixture(self):
+    '''A unit engine and formatter'''
+    self.engine = UnitEngine()
+    self.formatter = UnitFormatter()
+
+  @pytest.mark.parametrize("expression, result", [
+    ("4.7k ohm * 2 mA", "9.4 V"),
+    ("5 V + 3 mV", "5.003 V"),
+    ("1/2 ms", "500 Hz"),
+    ("-2 mA", "-2 mA"),
+    ("(2+3) mA", "5 mA"),
+    ("9.81 m/s^2 * 70 kg", "686.7 N"),
+    ("1 h / 1 min", "60"),
+    ("3 mg", "3 mg"),
+    ("4.7e3 µA * 1 Ω", "4.7 mV"),
+    ("2 m * 3 s", "6 m s"),
+    ("0 V", "0 V"),
+  ])
+  def test_solve(self, expression, result):
+    '''Solve an expression, showing the result in the best SI prefix'''
+    assert solve_units(expression, self.engine, self.formatter) == result
+
+  @pytest.mark.parametrize("expression, error", [
+    ("5 V + 3 mA", "Can't add V and A"),
+    ("2 furlong", 'Unknown unit "furlong"'),
+    ("1 V / 0 A", "Division by zero"),
+  ])
+  def test_solve_errors(self, expression, error):
+    '''Solve an expression that can't be solved'''
+    assert solve_units(expression, self.engine, self.formatter) == f'Error: {error}'
+
+  def test_evaluate_quantity(self):
+    '''Evaluate to a quantity in SI base units'''
+    assert self.engine.evaluate("2 kohm * 3 mA") == Quantity(6.0, dimension(2, 1, -3, -1))
+
+  def test_units_checked_when_compiled(self):
+    '''Dimensions are checked when compiling, before anything is run'''
+    with pytest.raises(UnitError):
+      compile_units("1 m + (2 s / 0)")
+
+  def test_units_folded(self):
+    '''A number times a unit compiles to a single number in base units'''
+    program, dim = compile_units("4.7k ohm")
+    assert len(program) == 1 and program[0][1] == pytest.approx(4700)
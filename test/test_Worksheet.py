@@ -0,0 +1,144 @@
+import pytest
+from calc.Worksheet import SheetText, Worksheet, diff_lines, parse_sheet
+
+
+class TestParse:
+  '''
+  Test the Worksheet.parse_sheet and Worksheet.diff_lines functions.
+
+  Excluded Test Cases:
+    None
+  '''
+  def test_parse_sheet(self):
+    '''Parse cells, skipping lines that aren't cells'''
+    cells, line_names = parse_sheet("r = 4.7e3\n\nnot a cell\n  tau=r*2")
+    assert cells == {"r": " 4.7e3", "tau": "r*2"} and line_names == ["r", None, None, "tau"]
+
+  def test_parse_sheet_redefined(self):
+    '''The last line defining a name wins'''
+    assert parse_sheet("x = 1\nx = 2")[0] == {"x": " 2"}
+
+  @pytest.mark.parametrize("old, new, expected", [
+    ("abcde", "abXde", (2, 3, 3)),
+    ("abcde", "abcde", (5, 5, 5)),
+    ("abde", "abcde", (2, 2, 3)),
+    ("abcde", "ae", (1, 4, 1)),
+    ("", "ab", (0, 0, 2)),
+  ])
+  def test_diff_lines(self, old, new, expected):
+    '''Find the lines that differ between two lists of lines'''
+    assert diff_lines(list(old), list(new)) == expected
+
+
+class TestWorksheet:
+  '''
+  Test the Worksheet class.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def worksheet_fixture(self):
+    '''A worksheet of an RC circuit'''
+    self.worksheet = Worksheet()
+    self.worksheet.load({"r": "4.7e3", "c": "1e-6", "tau": "r*c", "twice": "tau*2", "other": "5"})
+
+  def test_worksheet_values(self):
+    '''Cells are evaluated from the cells they refer to'''
+    assert self.worksheet.value("tau") == pytest.approx(4.7e-3)
+    assert self.worksheet.value("twice") == pytest.approx(9.4e-3)
+
+  def test_worksheet_recompute_dependents(self):
+    '''Changing a cell recomputes only it and its dependents, in order'''
+    assert self.worksheet.set("r", "1000") == ["r", "tau", "twice"]
+    assert self.worksheet.value("twice") == pytest.approx(2e-3)
+
+  def test_worksheet_unchanged_value(self):
+    '''A change that leaves a value as it was doesn't recompute its dependents'''
+    assert self.worksheet.set("r", "4700") == ["r"]
+
+  def test_worksheet_load_only_changes(self):
+    '''Loading the same cells again recomputes nothing'''
+    assert self.worksheet.load({"r": "4.7e3", "c": "1e-6", "tau": "r*c", "twice": "tau*2",
+                                "other": "5"}) == []
+
+  def test_worksheet_unknown_name(self):
+    '''A cell referring to an undefined name has an error until it is defined'''
+    self.worksheet.set("y", "x+1")
+    assert self.worksheet.error("y") == 'Unknown name "x"'
+    assert self.worksheet.set("x", "2") == ["x", "y"] and self.worksheet.value("y") == 3
+
+  def test_worksheet_remove(self):
+    '''Removing a cell gives its dependents an error'''
+    self.worksheet.remove("c")
+    assert "c" not in self.worksheet and self.worksheet.error("tau") == 'Unknown name "c"'
+    assert self.worksheet.error("twice") == 'Refers to "tau", which has an error'
+
+  @pytest.mark.parametrize("expression, error", [("r/0", "Division by zero"), ("r*", "Incomplete expression")])
+  def test_worksheet_errors(self, expression, error):
+    '''A cell that can't be evaluated has an error, and no value'''
+    self.worksheet.set("bad", expression)
+    assert self.worksheet.value("bad") is None and self.worksheet.error("bad").startswith(error)
+
+  def test_worksheet_cycle(self):
+    '''Cells in a cycle, and cells that refer to one, have errors'''
+    self.worksheet.set("after", "other+twice")
+    self.worksheet.set("c", "twice")
+    assert self.worksheet.error("c") == self.worksheet.error("tau") == "Circular reference"
+    assert self.worksheet.error("twice") == "Circular reference"
+    assert self.worksheet.error("after") == "Refers to a circular reference"
+
+  def test_worksheet_break_cycle(self):
+    '''Breaking a cycle recomputes the cells that were in it'''
+    self.worksheet.set("c", "twice")
+    self.worksheet.set("c", "2e-6")
+    assert self.worksheet.value("twice") == pytest.approx(1.88e-2)
+
+  def test_worksheet_self_reference(self):
+    '''A cell that refers to itself is a cycle'''
+    self.worksheet.set("x", "x+1")
+    assert self.worksheet.error("x") == "Circular reference"
+
+  def test_worksheet_large(self):
+    '''Changing the end of a long chain of cells recomputes only the end'''
+    worksheet = Worksheet()
+    worksheet.load({ f'c{i}': f'c{i - 1}+1' if i else "0" for i in range(5000) })
+    assert worksheet.value("c4999") == 4999
+    assert worksheet.set("c4997", "0") == ["c4997", "c4998", "c4999"]
+    assert worksheet.value("c4999") == 2
+
+
+class TestSheetText:
+  '''
+  Test the Worksheet.SheetText class.
+
+  Excluded Test Cases:
+    None
+  '''
+  @pytest.fixture(autouse=True)
+  def sheet_fixture(self):
+    '''A sheet of a few cells'''
+    self.sheet = SheetText()
+    self.sheet.update("a = 1\nb = a+1\n\nc = b*2")
+
+  def test_sheet_edit_line(self):
+    '''Editing a line only updates that cell and its dependents'''
+    assert self.sheet.update("a = 1\nb = a+2\n\nc = b*2") == (1, 2, 2, ["b", "c"])
+    assert self.sheet.worksheet.value("c") == 6
+
+  def test_sheet_insert_line(self):
+    '''Inserting a line adds its cell'''
+    assert self.sheet.update("a = 1\nb = a+1\nd = c\n\nc = b*2") == (2, 2, 3, ["d"])
+    assert self.sheet.line_names == ["a", "b", "d", None, "c"]
+
+  def test_sheet_delete_line(self):
+    '''Deleting a line removes its cell'''
+    self.sheet.update("b = a+1\n\nc = b*2")
+    assert "a" not in self.sheet.worksheet and self.sheet.worksheet.error("c") is not None
+
+  def test_sheet_redefined(self):
+    '''A name defined twice takes the last definition, and the other once one is deleted'''
+    self.sheet.update("a = 1\nb = a+1\n\nc = b*2\na = 5")
+    assert self.sheet.worksheet.value("c") == 12
+    self.sheet.update("a = 1\nb = a+1\n\nc = b*2")
+    assert self.sheet.worksheet.value("c") == 4